@@ -0,0 +1,338 @@
+"""
+Benchmarks dos serviços de análise e das rotas principais
+
+Cada tamanho (número de partidas) corre num processo próprio com uma base
+SQLite sintética (ligas de 20 equipas, épocas de 380 jogos, golos Poisson),
+para que os caches partilhados pelo processo (MatchStore, ELO, features)
+não passem de um tamanho para o seguinte. Para cada caso são registados
+débito, latência p50/p99 e pico de memória (tracemalloc); o resultado vai
+para um JSON que pode ser comparado com o de outro commit.
+
+Uso:
+    python benchmarks/run_benchmarks.py --sizes 1000,10000,100000,1000000
+    python benchmarks/run_benchmarks.py --baseline benchmarks/results/main.json --threshold 0.25
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+DEFAULT_SIZES = (1000, 10000, 100000, 1000000)
+TEAMS_PER_LEAGUE = 20
+SEASONS_PER_LEAGUE = 10
+INSERT_CHUNK = 20000
+# Acima disto a lista de dicts de generate_comprehensive_analysis não cabe num benchmark razoável
+MAX_DICT_MATCHES = 200000
+# Métricas comparadas com a baseline (maior = pior)
+REGRESSION_METRICS = ('p50_ms', 'peak_memory_kb')
+
+def seed_database(db, Team, Match, n_matches: int, seed: int = 7) -> dict:
+    """
+    Gera ligas sintéticas com n_matches partidas
+    A última época de cada liga está a meio: jogos passados finalizados,
+    jogos futuros agendados (para as rotas de oportunidades).
+    """
+    rng = np.random.default_rng(seed)
+    now = datetime.now().replace(minute=0, second=0, microsecond=0)
+    matches_per_season = TEAMS_PER_LEAGUE * (TEAMS_PER_LEAGUE - 1)
+    n_seasons = max(1, math.ceil(n_matches / matches_per_season))
+    n_leagues = max(1, math.ceil(n_seasons / SEASONS_PER_LEAGUE))
+    seasons_per_league = math.ceil(n_seasons / n_leagues)
+    n_teams = n_leagues * TEAMS_PER_LEAGUE
+    
+    db.session.execute(Team.__table__.insert(), [
+        {'id': team_id, 'api_id': team_id, 'name': f'Equipa {team_id}',
+         'popular_name': f'Equipa {team_id}', 'abbreviation': f'E{team_id}'[:10]}
+        for team_id in range(1, n_teams + 1)
+    ])
+    
+    attack = rng.normal(0, 0.25, n_teams + 1)
+    defence = rng.normal(0, 0.25, n_teams + 1)
+    pairs = np.array([(h, a) for h in range(TEAMS_PER_LEAGUE) for a in range(TEAMS_PER_LEAGUE) if h != a])
+    
+    rows = []
+    for season in range(n_seasons):
+        league, season_index = season % n_leagues, season // n_leagues
+        teams = league * TEAMS_PER_LEAGUE + 1 + pairs[rng.permutation(len(pairs))]
+        home_id, away_id = teams[:, 0], teams[:, 1]
+        
+        # Épocas anuais; a última começa 19 semanas antes de hoje (metade das 38 jornadas)
+        start = now - timedelta(days=365 * (seasons_per_league - 1 - season_index) + 133 - league % 7)
+        k = np.arange(len(pairs))
+        dates = [start + timedelta(days=int(day), hours=16) for day in (k // 10) * 7 + k % 3]
+        
+        home_goals = rng.poisson(np.exp(0.35 + attack[home_id] - defence[away_id]))
+        away_goals = rng.poisson(np.exp(0.1 + attack[away_id] - defence[home_id]))
+        
+        for i in range(len(pairs)):
+            finished = dates[i] < now
+            rows.append({
+                'api_id': len(rows) + 1,
+                'home_team_id': int(home_id[i]),
+                'away_team_id': int(away_id[i]),
+                'home_score': int(home_goals[i]) if finished else 0,
+                'away_score': int(away_goals[i]) if finished else 0,
+                'status': 'finalizado' if finished else 'agendado',
+                'match_date': dates[i],
+                'championship_id': season + 1,
+                'championship_name': f'Liga {league + 1} - Época {season_index + 1}'
+            })
+            if len(rows) == n_matches:
+                break
+        if len(rows) == n_matches:
+            break
+    
+    for start in range(0, len(rows), INSERT_CHUNK):
+        db.session.execute(Match.__table__.insert(), rows[start:start + INSERT_CHUNK])
+    db.session.commit()
+    
+    # Época em curso da primeira liga (tem jogos finalizados e agendados)
+    current = next((season + 1 for season in range(n_seasons - 1, -1, -1) if season % n_leagues == 0), 1)
+    return {'teams': n_teams, 'leagues': n_leagues, 'championships': n_seasons,
+            'current_championship': current, 'finished_championship': 1}
+
+def measure(fn, repeat: int, setup=None) -> dict:
+    """Corre fn `repeat` vezes (após um aquecimento) e uma vez sob tracemalloc"""
+    if setup:
+        setup()
+    fn()
+    
+    durations = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - started)
+    
+    if setup:
+        setup()
+    tracemalloc.start()
+    try:
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    
+    durations = np.array(durations)
+    return {
+        'iterations': repeat,
+        'throughput_per_s': round(repeat / durations.sum(), 3) if durations.sum() else None,
+        'mean_ms': round(durations.mean() * 1000, 3),
+        'p50_ms': round(float(np.percentile(durations, 50)) * 1000, 3),
+        'p99_ms': round(float(np.percentile(durations, 99)) * 1000, 3),
+        'peak_memory_kb': round(peak / 1024, 1)
+    }
+
+def timed(fn) -> float:
+    started = time.perf_counter()
+    fn()
+    return round(time.perf_counter() - started, 3)
+
+def run_size(n_matches: int, repeat: int, warm_cache: bool) -> dict:
+    """Benchmarks de um tamanho (corre no processo filho)"""
+    workdir = tempfile.mkdtemp(prefix='football-bench-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    sys.path.insert(0, ROOT)
+    
+    from src.main import app
+    from src.models.football import db, Team, Match
+    from src.services.advanced_analytics import BatchStatsCalculator, PredictionEngine
+    from src.services.analysis_cache import analysis_cache
+    from src.services.backtest import backtest_engine
+    from src.services.elo_rating import elo_engine
+    from src.services.fixture_predictions import fixture_predictions
+    from src.services.head_to_head import h2h_index
+    from src.services.market_rollups import market_rollups
+    from src.services.match_store import FINISHED, match_store
+    from src.services.odds_125_system import OddsTargetSystem
+    from src.services.response_cache import response_cache
+    from src.services.season_simulator import season_simulator
+    from src.services.team_features import team_features
+    from src.services.team_stats import TeamStatsRecalculator
+    
+    result = {'matches': n_matches, 'setup_s': {}, 'cases': {}}
+    with app.app_context():
+        dataset = {}
+        result['setup_s']['seed'] = timed(lambda: dataset.update(seed_database(db, Team, Match, n_matches)))
+        result['dataset'] = dataset
+        result['setup_s']['team_stats'] = timed(lambda: TeamStatsRecalculator.recalculate('full'))
+        result['setup_s']['elo'] = timed(elo_engine.update)
+        result['setup_s']['match_store'] = timed(match_store.refresh)
+        result['setup_s']['h2h_index'] = timed(h2h_index.update)
+        result['setup_s']['team_features'] = timed(team_features.refresh)
+        result['setup_s']['fixture_predictions'] = timed(fixture_predictions.refresh)
+        result['setup_s']['market_rollups'] = timed(market_rollups.rebuild)
+        
+        engine = PredictionEngine()
+        odds_system = OddsTargetSystem()
+        home_id, away_id = 1, 2
+        ratings = elo_engine.get_ratings([home_id, away_id])
+        current = dataset['current_championship']
+        
+        columns = match_store.columns()
+        scheduled = np.flatnonzero(columns.status != FINISHED)[:200]
+        fixtures = [{'home_team_id': match['home_team_id'], 'away_team_id': match['away_team_id'],
+                     'match_date': match['match_date'], 'championship_name': ''}
+                    for match in match_store.match_dicts(scheduled)]
+        fixture_teams = team_features.get({team for f in fixtures for team in (f['home_team_id'], f['away_team_id'])})
+        
+        cases = {}
+        if n_matches <= MAX_DICT_MATCHES:
+            all_matches = match_store.match_dicts(np.arange(columns.size))
+            cases['service.generate_comprehensive_analysis'] = lambda: engine.generate_comprehensive_analysis(
+                home_id, away_id, all_matches, ratings)
+        else:
+            result['cases']['service.generate_comprehensive_analysis'] = {
+                'skipped': f'mais de {MAX_DICT_MATCHES} partidas em lista de dicts'}
+        cases['service.generate_analysis_from_store'] = lambda: engine.generate_analysis_from_store(
+            home_id, away_id, match_store, ratings=ratings, h2h_index=h2h_index)
+        cases['service.batch_team_metrics'] = lambda: BatchStatsCalculator.calculate_from_store(match_store)
+        cases['service.find_high_confidence_bets'] = lambda: odds_system.find_high_confidence_bets(
+            fixtures, fixture_teams)
+        cases['service.season_simulation'] = lambda: season_simulator.simulate(current, n_simulations=10000)
+        cases['service.backtest_season'] = lambda: backtest_engine.run([dataset['finished_championship']])
+        
+        client = app.test_client()
+        
+        def route(method, url, **kwargs):
+            def call():
+                response = client.open(url, method=method, **kwargs)
+                if response.status_code >= 500:
+                    raise RuntimeError(f'{method} {url}: {response.status_code}')
+            return call
+        
+        routes = {
+            'route.GET /api/football/teams': route('GET', '/api/football/teams'),
+            'route.GET /api/football/matches': route('GET', '/api/football/matches?limit=50'),
+            'route.POST /api/advanced/analyze-match': route(
+                'POST', '/api/advanced/analyze-match', json={'home_team_id': home_id, 'away_team_id': away_id}),
+            'route.POST /api/advanced/analyze-matches (10)': route(
+                'POST', '/api/advanced/analyze-matches', json={'pairings': [
+                    [f['home_team_id'], f['away_team_id']] for f in fixtures[:10]]}),
+            'route.GET /api/advanced/team-metrics': route('GET', '/api/advanced/team-metrics'),
+            'route.GET /api/advanced/league-analysis': route('GET', f'/api/advanced/league-analysis/{current}'),
+            'route.POST /api/odds/find-125-opportunities': route(
+                'POST', '/api/odds/find-125-opportunities', json={'championship_id': current}),
+            'route.GET /api/odds/daily-recommendations': route('GET', '/api/odds/daily-recommendations'),
+            'route.GET /api/odds/market-analysis': route('GET', '/api/odds/market-analysis')
+        }
+        
+        for name, fn in cases.items():
+            result['cases'][name] = measure(fn, repeat)
+        # Sem --warm-cache cada pedido mede o trabalho da rota, não os caches de respostas e de análises
+        def clear_caches():
+            response_cache.clear()
+            analysis_cache.clear()
+        
+        setup = None if warm_cache else clear_caches
+        for name, fn in routes.items():
+            try:
+                result['cases'][name] = measure(fn, repeat, setup)
+            except RuntimeError as e:
+                result['cases'][name] = {'error': str(e)}
+    
+    result['max_rss_kb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return result
+
+def compare(current: dict, baseline: dict, threshold: float) -> list:
+    """Casos cujo p50 ou pico de memória pioraram mais do que `threshold` (fração)"""
+    regressions = []
+    for size, result in current['results'].items():
+        base_cases = baseline.get('results', {}).get(size, {}).get('cases', {})
+        for name, case in result['cases'].items():
+            base = base_cases.get(name)
+            if not base:
+                continue
+            for metric in REGRESSION_METRICS:
+                if case.get(metric) is None or not base.get(metric):
+                    continue
+                change = case[metric] / base[metric] - 1
+                if change > threshold:
+                    regressions.append({'size': size, 'case': name, 'metric': metric,
+                                        'baseline': base[metric], 'current': case[metric],
+                                        'change': round(change, 3)})
+    return regressions
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks dos serviços de análise e das rotas')
+    parser.add_argument('--sizes', default=','.join(str(size) for size in DEFAULT_SIZES),
+                        help='Números de partidas, separados por vírgulas')
+    parser.add_argument('--repeat', type=int, default=20, help='Execuções medidas por caso')
+    parser.add_argument('--output', help='Ficheiro JSON de resultados (por omissão results/<commit>.json)')
+    parser.add_argument('--baseline', help='JSON de outro commit para comparar')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='Piora relativa (p50, memória) que conta como regressão')
+    parser.add_argument('--warm-cache', action='store_true', help='Não limpar o cache de respostas entre pedidos')
+    parser.add_argument('--worker', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--worker-output', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.worker:
+        with open(args.worker_output, 'w') as f:
+            json.dump(run_size(args.worker, args.repeat, args.warm_cache), f)
+        return
+    
+    commit = git_commit()
+    report = {'commit': commit, 'created_at': datetime.utcnow().isoformat(), 'python': platform.python_version(),
+              'platform': platform.platform(), 'repeat': args.repeat, 'results': {}}
+    
+    for size in [int(size) for size in args.sizes.split(',') if size]:
+        print(f'-> {size} partidas', flush=True)
+        with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as f:
+            worker_output = f.name
+        command = [sys.executable, os.path.abspath(__file__), '--worker', str(size),
+                   '--worker-output', worker_output, '--repeat', str(args.repeat)]
+        if args.warm_cache:
+            command.append('--warm-cache')
+        subprocess.run(command, check=True)
+        with open(worker_output) as f:
+            result = json.load(f)
+        os.unlink(worker_output)
+        report['results'][str(size)] = result
+        
+        for name, case in result['cases'].items():
+            if 'p50_ms' in case:
+                print(f"   {name:<45} p50 {case['p50_ms']:>10.2f} ms  p99 {case['p99_ms']:>10.2f} ms  "
+                      f"{case['throughput_per_s']:>9.1f}/s  pico {case['peak_memory_kb']:>10.0f} KB")
+            else:
+                print(f"   {name:<45} {case.get('skipped') or case.get('error')}")
+    
+    output = args.output or os.path.join(RESULTS_DIR, f'{commit}.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f'Resultados em {output}')
+    
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSÃO {regression['size']} {regression['case']} {regression['metric']}: "
+                  f"{regression['baseline']} -> {regression['current']} (+{regression['change']:.0%})")
+        if regressions:
+            sys.exit(1)
+        print(f"Sem regressões acima de {args.threshold:.0%} face a {baseline.get('commit')}")
+
+if __name__ == '__main__':
+    main()
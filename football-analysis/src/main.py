@@ -3,15 +3,23 @@ import sys
 from flask import Flask, send_from_directory, request, jsonify
 from flask_cors import CORS
 
-# Adicionar o diretório src ao path para imports
+# Adicionar o diretório src e o seu pai ao path (imports src.*, também com python src/main.py)
 sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from models.user import db
-from models.football import Team, Player, Match, TeamStats, Prediction
-from routes.user import user_bp
-from routes.football import football_bp
-from routes.advanced import advanced_bp
-from routes.odds_125 import odds_bp
+from src.models.database import db, init_database
+from src.models.football import Team, Player, Match, TeamStats, Prediction, FixturePrediction, MarketDailyRollup
+from src.models.migrations import upgrade_schema, explain_hot_queries
+from src.services.elo_rating import elo_engine
+from src.services.fixture_predictions import fixture_predictions
+from src.services.jobs import JobRunner
+from src.services.market_rollups import market_rollups
+from src.services.metrics import request_metrics
+from src.routes.user import user_bp
+from src.routes.football import football_bp
+from src.routes.advanced import advanced_bp
+from src.routes.odds_125 import odds_bp
+from src.routes.jobs import jobs_bp
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
 app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
@@ -23,17 +31,22 @@ app.register_blueprint(user_bp, url_prefix='/api')
 app.register_blueprint(football_bp, url_prefix='/api/football')
 app.register_blueprint(advanced_bp, url_prefix='/api/advanced')
 app.register_blueprint(odds_bp, url_prefix='/api/odds')
+app.register_blueprint(jobs_bp, url_prefix='/api/jobs')
+
+# Latência, queries SQL e chamadas à API por endpoint (/metrics e Server-Timing)
+request_metrics.init_app(app)
 
 # Configuração da base de dados para Vercel (usar SQLite em memória para demo)
-if os.environ.get('VERCEL'):
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+if os.environ.get('DATABASE_URL'):
+    # Base de dados alternativa (ex.: benchmarks com ligas sintéticas)
+    database_uri = os.environ['DATABASE_URL']
+elif os.environ.get('VERCEL'):
+    database_uri = 'sqlite:///:memory:'
 else:
-    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
-
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    database_uri = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
 
-# Inicializar base de dados
-db.init_app(app)
+# Inicializar base de dados (um só db para todos os modelos; WAL e pragmas no SQLite)
+init_database(app, database_uri)
 
 @app.route('/')
 def index():
@@ -52,6 +65,12 @@ with app.app_context():
     try:
         db.create_all()
         
+        # Migrar bases de dados existentes (colunas e índices novos)
+        upgrade_schema(db.engine, Team.metadata)
+        
+        # Jobs cujo processo deixou de renovar o heartbeat (ex.: reinício) não serão retomados
+        JobRunner.recover_orphans()
+        
         # Dados de demonstração para Vercel
         if os.environ.get('VERCEL') and Team.query.count() == 0:
             # Adicionar algumas equipas de demonstração
@@ -85,10 +104,48 @@ with app.app_context():
                 db.session.add(stat)
             
             db.session.commit()
+        
+        # Ratings ELO das partidas finalizadas ainda não processadas (as leituras não escrevem)
+        if Match.query.filter(Match.status == 'finalizado').first():
+            elo_engine.update()
+        
+        # Materializar previsões numa base existente que ainda não as tenha (depois dos dados de demonstração)
+        if FixturePrediction.query.first() is None and Match.query.filter(Match.status != 'finalizado').first():
+            fixture_predictions.refresh()
+        
+        # Agregados diários de mercado numa base existente que ainda não os tenha
+        if MarketDailyRollup.query.first() is None and Match.query.filter(Match.status == 'finalizado').first():
+            market_rollups.rebuild()
             
     except Exception as e:
         print(f"Erro ao inicializar base de dados: {e}")
 
+@app.cli.command('check-query-plans')
+def check_query_plans():
+    """Verifica (EXPLAIN QUERY PLAN) que as queries das rotas usam índices"""
+    results = explain_hot_queries(db.engine)
+    for result in results:
+        status = 'OK  ' if result['uses_index'] else 'FAIL'
+        print(f"{status} {result['query']}: {' | '.join(result['plan'])}")
+    
+    if not all(result['uses_index'] for result in results):
+        sys.exit(1)
+
+@app.cli.command('refresh-predictions')
+def refresh_predictions():
+    """Pontua todas as partidas por jogar e reescreve a tabela fixture_predictions"""
+    result = fixture_predictions.refresh()
+    print(f"{result['predictions']} previsões ({result['opportunities']} oportunidades) "
+          f"de {result['fixtures']} partidas por jogar")
+    for phase, milliseconds in result['timings'].items():
+        print(f'  {phase}: {milliseconds} ms')
+
+@app.cli.command('rebuild-market-rollups')
+def rebuild_market_rollups():
+    """Recalcula todos os agregados diários de mercado (market_daily_rollups)"""
+    result = market_rollups.rebuild()
+    print(f"{result['rows_written']} linhas (campeonato, dia) escritas")
+
 # Para Vercel, exportar a aplicação
 if __name__ == '__main__':
     if os.environ.get('VERCEL'):
@@ -0,0 +1,53 @@
+import sqlite3
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Instância única partilhada por todos os modelos (users, teams, matches, ...)
+db = SQLAlchemy()
+
+# Aplicadas a cada nova ligação SQLite
+SQLITE_PRAGMAS = (
+    ('journal_mode', 'WAL'),  # Leitores não bloqueiam durante as escritas da sincronização
+    ('synchronous', 'NORMAL'),  # Seguro com WAL; fsync só nos checkpoints
+    ('busy_timeout', '5000'),  # ms à espera do lock de escrita antes de "database is locked"
+    ('cache_size', '-65536'),  # 64 MB de cache de páginas por ligação
+    ('mmap_size', '268435456'),  # 256 MB de leituras por memória mapeada
+    ('temp_store', 'MEMORY'),
+)
+# Opções do engine SQLite (timeout do driver em segundos, igual ao busy_timeout)
+SQLITE_ENGINE_OPTIONS = {
+    'connect_args': {'timeout': 5, 'check_same_thread': False},
+    'pool_size': 10,
+    'max_overflow': 10
+}
+
+def init_database(app, database_uri: str):
+    """Configura o engine (opções de concorrência para SQLite) e liga o db à aplicação"""
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_uri
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    if database_uri.startswith('sqlite') and ':memory:' not in database_uri:
+        # Em memória o Flask-SQLAlchemy usa uma ligação única (StaticPool), sem pool_size
+        app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', SQLITE_ENGINE_OPTIONS)
+    db.init_app(app)
+
+@event.listens_for(Engine, 'connect')
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in SQLITE_PRAGMAS:
+            cursor.execute(f'PRAGMA {name}={value}')
+    finally:
+        cursor.close()
+
+def sqlite_pragmas(engine) -> dict:
+    """Valores efetivos dos pragmas numa ligação do engine (para diagnóstico)"""
+    if engine.dialect.name != 'sqlite':
+        return {}
+    with engine.connect() as connection:
+        return {
+            name: connection.exec_driver_sql(f'PRAGMA {name}').scalar()
+            for name, _ in SQLITE_PRAGMAS
+        }
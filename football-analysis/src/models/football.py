@@ -1,7 +1,5 @@
-from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
-
-db = SQLAlchemy()
+from src.models.database import db
 
 class Team(db.Model):
     __tablename__ = 'teams'
@@ -44,12 +42,22 @@ class Match(db.Model):
     championship_id = db.Column(db.Integer, nullable=False)
     championship_name = db.Column(db.String(100), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Índices desenhados para as queries das rotas (ver models/migrations.py)
+    __table_args__ = (
+        db.Index('ix_matches_status_date', 'status', 'match_date'),  # market-analysis
+        db.Index('ix_matches_championship_status', 'championship_id', 'status'),  # league-analysis, find-125
+        db.Index('ix_matches_match_date', 'match_date'),  # daily-recommendations, listagem por data
+        db.Index('ix_matches_home_team_date', 'home_team_id', 'match_date'),  # histórico por equipa
+        db.Index('ix_matches_away_team_date', 'away_team_id', 'match_date'),
+    )
 
 class TeamStats(db.Model):
     __tablename__ = 'team_stats'
     
     id = db.Column(db.Integer, primary_key=True)
-    team_id = db.Column(db.Integer, db.ForeignKey('teams.id'), nullable=False)
+    team_id = db.Column(db.Integer, db.ForeignKey('teams.id'), nullable=False, index=True)
     matches_played = db.Column(db.Integer, default=0)
     wins = db.Column(db.Integer, default=0)
     draws = db.Column(db.Integer, default=0)
@@ -73,8 +81,117 @@ class Prediction(db.Model):
     confidence = db.Column(db.Float, nullable=False)
     odds = db.Column(db.Float, nullable=False)
     match_date = db.Column(db.DateTime, nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     
     home_team = db.relationship('Team', foreign_keys=[home_team_id])
     away_team = db.relationship('Team', foreign_keys=[away_team_id])
 
+
+class TeamRating(db.Model):
+    __tablename__ = 'team_ratings'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    team_id = db.Column(db.Integer, unique=True, nullable=False)  # api_id da equipa (como em Match)
+    rating = db.Column(db.Float, nullable=False, default=1500.0)
+    matches_rated = db.Column(db.Integer, default=0)
+    last_match_date = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class RatingState(db.Model):
+    __tablename__ = 'rating_state'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    last_match_id = db.Column(db.Integer)  # Match.id da última partida processada
+    last_match_date = db.Column(db.DateTime)
+    matches_processed = db.Column(db.Integer, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class DataChange(db.Model):
+    __tablename__ = 'data_changes'
+    
+    # Versão dos dados partilhada pelos processos: cada escrita insere uma linha na sua transação
+    id = db.Column(db.Integer, primary_key=True)  # número da versão
+    reason = db.Column(db.String(50), nullable=False)
+    namespace = db.Column(db.String(30), default='data')  # 'data' (partidas, estatísticas, ratings) ou 'predictions'
+    team_ids = db.Column(db.Text)  # JSON com os api_id afetados; NULL = todas as equipas
+    origin = db.Column(db.String(100))  # host:pid do processo que escreveu
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class Job(db.Model):
+    __tablename__ = 'jobs'
+    
+    id = db.Column(db.String(36), primary_key=True)  # uuid4
+    job_type = db.Column(db.String(50), nullable=False)
+    params = db.Column(db.Text)  # JSON
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, succeeded, failed
+    progress = db.Column(db.Float, default=0.0)  # 0 a 1
+    message = db.Column(db.String(255))
+    result = db.Column(db.Text)  # JSON
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    worker_id = db.Column(db.String(100))  # host:pid do processo que executa o job
+    heartbeat_at = db.Column(db.DateTime)  # renovado enquanto o job está em fila ou a correr
+    
+    __table_args__ = (
+        db.Index('ix_jobs_type_status', 'job_type', 'status'),  # jobs ativos do mesmo tipo
+    )
+
+class FixturePrediction(db.Model):
+    __tablename__ = 'fixture_predictions'
+    
+    # Previsões materializadas das partidas por jogar (reescritas após cada sincronização)
+    id = db.Column(db.Integer, primary_key=True)
+    match_id = db.Column(db.Integer, db.ForeignKey('matches.id'), unique=True, nullable=False)
+    home_team_id = db.Column(db.Integer, nullable=False)  # api_id (como em Match)
+    away_team_id = db.Column(db.Integer, nullable=False)
+    home_team_name = db.Column(db.String(100))
+    away_team_name = db.Column(db.String(100))
+    championship_id = db.Column(db.Integer, nullable=False)
+    championship_name = db.Column(db.String(100))
+    match_date = db.Column(db.DateTime, nullable=False)
+    recommended_bet = db.Column(db.String(30))  # None se nenhum cenário 1.25 se aplica
+    confidence = db.Column(db.Float, nullable=False, default=0.0)
+    probability = db.Column(db.Float, nullable=False, default=0.0)
+    expected_value = db.Column(db.Float, nullable=False, default=0.0)
+    risk_level = db.Column(db.String(20))
+    supporting_factors = db.Column(db.Text)  # JSON
+    market_probabilities = db.Column(db.Text)  # JSON: todos os mercados do modelo de Poisson
+    data_version = db.Column(db.Integer)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('ix_fixture_predictions_date_confidence', 'match_date', 'confidence'),  # daily-recommendations
+        db.Index('ix_fixture_predictions_championship_confidence', 'championship_id', 'confidence'),  # find-125
+        db.Index('ix_fixture_predictions_confidence', 'confidence'),  # find-125 (todos os campeonatos)
+    )
+
+class MarketDailyRollup(db.Model):
+    __tablename__ = 'market_daily_rollups'
+    
+    # Agregados das partidas finalizadas por (campeonato, dia), mantidos pelo MarketRollups
+    id = db.Column(db.Integer, primary_key=True)
+    championship_id = db.Column(db.Integer, nullable=False)
+    day = db.Column(db.Date, nullable=False)
+    matches = db.Column(db.Integer, nullable=False, default=0)
+    home_wins = db.Column(db.Integer, nullable=False, default=0)
+    draws = db.Column(db.Integer, nullable=False, default=0)
+    away_wins = db.Column(db.Integer, nullable=False, default=0)
+    home_goals = db.Column(db.Integer, nullable=False, default=0)
+    away_goals = db.Column(db.Integer, nullable=False, default=0)
+    both_scored = db.Column(db.Integer, nullable=False, default=0)
+    # Histograma do total de golos por partida (goals_6 = 6 ou mais)
+    goals_0 = db.Column(db.Integer, nullable=False, default=0)
+    goals_1 = db.Column(db.Integer, nullable=False, default=0)
+    goals_2 = db.Column(db.Integer, nullable=False, default=0)
+    goals_3 = db.Column(db.Integer, nullable=False, default=0)
+    goals_4 = db.Column(db.Integer, nullable=False, default=0)
+    goals_5 = db.Column(db.Integer, nullable=False, default=0)
+    goals_6 = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.UniqueConstraint('championship_id', 'day', name='uq_market_rollups_championship_day'),
+        db.Index('ix_market_rollups_day', 'day'),  # market-analysis (todos os campeonatos)
+    )
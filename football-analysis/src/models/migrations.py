@@ -0,0 +1,107 @@
+import re
+from datetime import datetime, timedelta
+from typing import Dict, List
+from sqlalchemy import inspect, text
+
+# Valor inicial das colunas acrescentadas a tabelas com linhas (SQL sobre a própria linha)
+BACKFILLS = {
+    # Sem isto as partidas antigas ficavam com NULL e o cálculo incremental nunca as via
+    ('matches', 'updated_at'): 'COALESCE(created_at, CURRENT_TIMESTAMP)',
+    # Versões anteriores aos namespaces eram todas alterações dos dados
+    ('data_changes', 'namespace'): "'data'"
+}
+
+def upgrade_schema(engine, metadata) -> List[str]:
+    """
+    Atualiza uma base de dados existente (ex.: app.db) para o esquema atual
+    Cria tabelas em falta, acrescenta colunas novas com ALTER TABLE (com o
+    valor inicial de BACKFILLS) e cria os índices declarados nos modelos.
+    Pode ser executado repetidamente.
+    """
+    applied = []
+    metadata.create_all(engine)
+    inspector = inspect(engine)
+    
+    with engine.begin() as connection:
+        for table in metadata.sorted_tables:
+            existing_columns = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing_columns:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+                applied.append(f'add column {table.name}.{column.name}')
+                
+                backfill = BACKFILLS.get((table.name, column.name))
+                if backfill:
+                    connection.execute(text(f'UPDATE {table.name} SET {column.name} = {backfill} '
+                                            f'WHERE {column.name} IS NULL'))
+                    applied.append(f'backfill {table.name}.{column.name}')
+            
+            existing_indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing_indexes:
+                    index.create(connection, checkfirst=True)
+                    applied.append(f'create index {index.name}')
+        
+        if applied:
+            # Atualizar estatísticas do planeador para os novos índices
+            connection.execute(text('ANALYZE'))
+    
+    return applied
+
+def hot_queries() -> Dict:
+    """
+    Queries das rotas mais usadas, construídas pelas mesmas funções que as
+    rotas chamam (com valores de exemplo), para o plano verificado ser o
+    das queries reais. Precisa de um contexto da aplicação.
+    """
+    from src.models.football import Match, Team, TeamStats
+    from src.routes.football import matches_page_query
+    from src.routes.odds_125 import upcoming_matches_query
+    from src.services.fixture_predictions import FixturePredictionMaterializer
+    from src.services.market_rollups import MarketRollups
+    
+    day = datetime(2024, 1, 1)
+    next_day = day + timedelta(days=1)
+    return {
+        'find-125-opportunities (campeonato)': FixturePredictionMaterializer.top(
+            FixturePredictionMaterializer.window(date_to=next_day, championship_id=1), 0.82, 10),
+        'find-125-opportunities (todos)': FixturePredictionMaterializer.top(
+            FixturePredictionMaterializer.window(date_to=next_day), 0.82, 10),
+        'daily-recommendations': FixturePredictionMaterializer.top(
+            FixturePredictionMaterializer.window(date_from=day, date_to=next_day), 0.82, 3),
+        'market-analysis (dias)': MarketRollups.summary_query(date_from=day.date()),
+        'market-analysis (campeonato)': MarketRollups.summary_query(championship_id=1),
+        'market-prices': upcoming_matches_query(next_day, 1),
+        'league-analysis': Match.query.filter_by(championship_id=1),
+        'matches (listagem)': matches_page_query([], 201),
+        'matches (campeonato e estado)': matches_page_query(
+            [Match.championship_id == 1, Match.status == 'finalizado'], 201),
+        'team-stats por equipa': TeamStats.query.filter_by(team_id=1),
+        'equipa por api_id': Team.query.filter_by(api_id=1)
+    }
+
+FULL_SCAN = re.compile(r'^SCAN (TABLE )?(\w+)$')
+
+def explain_hot_queries(engine) -> List[Dict]:
+    """
+    Executa EXPLAIN QUERY PLAN para cada query de hot_queries()
+    Uma query falha se o plano contiver um SCAN da tabela sem índice
+    """
+    results = []
+    
+    with engine.connect() as connection:
+        for name, query in hot_queries().items():
+            statement = query.statement if hasattr(query, 'statement') else query
+            sql = statement.compile(dialect=engine.dialect, compile_kwargs={'literal_binds': True})
+            rows = connection.execute(text(f'EXPLAIN QUERY PLAN {sql}')).fetchall()
+            plan = [row[-1] for row in rows]
+            full_scans = [detail for detail in plan if FULL_SCAN.match(detail)]
+            results.append({
+                'query': name,
+                'plan': plan,
+                'uses_index': not full_scans
+            })
+    
+    return results
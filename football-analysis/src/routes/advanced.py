@@ -1,8 +1,15 @@
 from flask import Blueprint, request, jsonify
 from src.models.football import db, Team, Player, Match, TeamStats, Prediction
 from src.services.football_api import FootballAPIService, DataProcessor, StatsCalculator
-from src.services.advanced_analytics import AdvancedStatsCalculator, PredictionEngine
+from src.services.advanced_analytics import AdvancedStatsCalculator, BatchStatsCalculator, PredictionEngine
+from src.services.analysis_cache import analysis_cache
+from src.services.data_version import data_version
+from src.services.elo_rating import elo_engine
+from src.services.head_to_head import h2h_index
+from src.services.match_store import match_store
+from src.services.season_simulator import season_simulator
 from datetime import datetime, timedelta
+import numpy as np
 import os
 
 advanced_bp = Blueprint('advanced', __name__)
@@ -12,6 +19,43 @@ API_KEY = os.getenv('FOOTBALL_API_KEY', 'test_a8c37778328495ac24c5d0d3c3923b')
 api_service = FootballAPIService(API_KEY)
 prediction_engine = PredictionEngine()
 
+# Limite de confrontos por pedido em /analyze-matches
+MAX_BATCH_PAIRINGS = 100
+
+# Limite de simulações por pedido síncrono em /season-simulation
+MAX_SIMULATIONS = 100000
+
+def _format_match_analysis(analysis, home_team, away_team):
+    """Resposta de /analyze-match a partir da análise do PredictionEngine"""
+    return {
+        'match_info': {
+            'home_team': home_team.popular_name,
+            'away_team': away_team.popular_name
+        },
+        'home_team_metrics': {
+            'elo_rating': round(analysis['home_team_analysis']['elo_rating'], 2),
+            'form_index': round(analysis['home_team_analysis']['form_index'], 3),
+            'goals_per_match': round(analysis['home_team_analysis']['attacking_efficiency']['goals_per_match'], 2),
+            'goals_conceded_per_match': round(analysis['home_team_analysis']['defensive_solidity']['goals_conceded_per_match'], 2),
+            'home_points_per_match': round(analysis['home_team_analysis']['home_performance']['points_per_match'], 2)
+        },
+        'away_team_metrics': {
+            'elo_rating': round(analysis['away_team_analysis']['elo_rating'], 2),
+            'form_index': round(analysis['away_team_analysis']['form_index'], 3),
+            'goals_per_match': round(analysis['away_team_analysis']['attacking_efficiency']['goals_per_match'], 2),
+            'goals_conceded_per_match': round(analysis['away_team_analysis']['defensive_solidity']['goals_conceded_per_match'], 2),
+            'away_points_per_match': round(analysis['away_team_analysis']['away_performance']['points_per_match'], 2)
+        },
+        'head_to_head': analysis['head_to_head'],
+        'match_probabilities': {
+            'home_win': round(analysis['match_probabilities']['home_win'] * 100, 2),
+            'draw': round(analysis['match_probabilities']['draw'] * 100, 2),
+            'away_win': round(analysis['match_probabilities']['away_win'] * 100, 2)
+        },
+        'value_bets': analysis['value_bets'],
+        'recommendation': analysis['recommendation']
+    }
+
 @advanced_bp.route('/analyze-match', methods=['POST'])
 def analyze_match():
     """Análise avançada de uma partida"""
@@ -30,56 +74,76 @@ def analyze_match():
         if not home_team or not away_team:
             return jsonify({'error': 'Equipas não encontradas na base de dados'}), 404
         
-        # Buscar todas as partidas para análise
-        all_matches = Match.query.all()
-        match_dicts = []
-        
-        for match in all_matches:
-            match_dicts.append({
-                'home_team_id': match.home_team_id,
-                'away_team_id': match.away_team_id,
-                'home_score': match.home_score,
-                'away_score': match.away_score,
-                'status': match.status,
-                'match_date': match.match_date
-            })
+        # Gerar análise completa a partir do armazém colunar de partidas (memoizada por versão dos dados)
+        analysis = analysis_cache.get_or_compute(home_team_id, away_team_id, lambda: prediction_engine.generate_analysis_from_store(
+            home_team_id, away_team_id, match_store,
+            ratings=elo_engine.get_ratings([home_team_id, away_team_id]),
+            h2h_index=h2h_index
+        ))
         
-        # Gerar análise completa
-        analysis = prediction_engine.generate_comprehensive_analysis(
-            home_team_id, away_team_id, match_dicts
-        )
+        return jsonify(_format_match_analysis(analysis, home_team, away_team))
         
-        # Preparar resposta
-        response = {
-            'match_info': {
-                'home_team': home_team.popular_name,
-                'away_team': away_team.popular_name
-            },
-            'home_team_metrics': {
-                'elo_rating': round(analysis['home_team_analysis']['elo_rating'], 2),
-                'form_index': round(analysis['home_team_analysis']['form_index'], 3),
-                'goals_per_match': round(analysis['home_team_analysis']['attacking_efficiency']['goals_per_match'], 2),
-                'goals_conceded_per_match': round(analysis['home_team_analysis']['defensive_solidity']['goals_conceded_per_match'], 2),
-                'home_points_per_match': round(analysis['home_team_analysis']['home_performance']['points_per_match'], 2)
-            },
-            'away_team_metrics': {
-                'elo_rating': round(analysis['away_team_analysis']['elo_rating'], 2),
-                'form_index': round(analysis['away_team_analysis']['form_index'], 3),
-                'goals_per_match': round(analysis['away_team_analysis']['attacking_efficiency']['goals_per_match'], 2),
-                'goals_conceded_per_match': round(analysis['away_team_analysis']['defensive_solidity']['goals_conceded_per_match'], 2),
-                'away_points_per_match': round(analysis['away_team_analysis']['away_performance']['points_per_match'], 2)
-            },
-            'head_to_head': analysis['head_to_head'],
-            'match_probabilities': {
-                'home_win': round(analysis['match_probabilities']['home_win'] * 100, 2),
-                'draw': round(analysis['match_probabilities']['draw'] * 100, 2),
-                'away_win': round(analysis['match_probabilities']['away_win'] * 100, 2)
-            },
-            'value_bets': analysis['value_bets'],
-            'recommendation': analysis['recommendation']
-        }
-        
-        return jsonify(response)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@advanced_bp.route('/analyze-matches', methods=['POST'])
+def analyze_matches():
+    """
+    Análise avançada de várias partidas num só pedido
+    Corpo: {"pairings": [{"home_team_id": 1, "away_team_id": 2}, ...]} (ou pares [1, 2]).
+    As métricas de cada equipa são calculadas uma vez para todos os confrontos.
+    """
+    try:
+        data = request.get_json() or {}
+        pairings = []
+        for pairing in data.get('pairings') or []:
+            if isinstance(pairing, dict):
+                pairing = (pairing.get('home_team_id'), pairing.get('away_team_id'))
+            if not isinstance(pairing, (list, tuple)) or len(pairing) != 2 or not all(pairing):
+                return jsonify({'error': 'Cada confronto precisa de home_team_id e away_team_id'}), 400
+            try:
+                pairings.append((int(pairing[0]), int(pairing[1])))
+            except (TypeError, ValueError):
+                return jsonify({'error': 'home_team_id e away_team_id têm de ser inteiros'}), 400
+        
+        if not pairings:
+            return jsonify({'error': 'Lista de confrontos (pairings) é obrigatória'}), 400
+        if len(pairings) > MAX_BATCH_PAIRINGS:
+            return jsonify({'error': f'Máximo de {MAX_BATCH_PAIRINGS} confrontos por pedido'}), 400
+        
+        # Buscar todas as equipas numa query
+        team_ids = {team_id for pairing in pairings for team_id in pairing}
+        teams = {team.api_id: team for team in Team.query.filter(Team.api_id.in_(team_ids)).all()}
+        found = [pairing for pairing in pairings if pairing[0] in teams and pairing[1] in teams]
+        
+        # Confrontos já em cache; os restantes são calculados juntos e guardados
+        analyses = {pairing: analysis_cache.get(*pairing) for pairing in set(found)}
+        missing = [pairing for pairing, analysis in analyses.items() if analysis is None]
+        if missing:
+            version = data_version.current
+            computed = prediction_engine.generate_batch_analysis_from_store(
+                missing, match_store,
+                ratings=elo_engine.get_ratings(list({team_id for pairing in missing for team_id in pairing})),
+                h2h_index=h2h_index
+            )
+            for pairing, analysis in zip(missing, computed):
+                analysis_cache.put(pairing[0], pairing[1], analysis, version)
+                analyses[pairing] = analysis
+        
+        results = []
+        for home_team_id, away_team_id in pairings:
+            if home_team_id in teams and away_team_id in teams:
+                result = _format_match_analysis(analyses[(home_team_id, away_team_id)], teams[home_team_id], teams[away_team_id])
+            else:
+                result = {'error': 'Equipas não encontradas na base de dados'}
+            results.append(dict(result, home_team_id=home_team_id, away_team_id=away_team_id))
+        
+        return jsonify({
+            'total_pairings': len(pairings),
+            'teams_analyzed': len({team_id for pairing in missing for team_id in pairing}),
+            'cached_pairings': len(analyses) - len(missing),
+            'analyses': results
+        })
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -92,32 +156,18 @@ def team_deep_analysis(team_api_id):
         if not team:
             return jsonify({'error': 'Equipa não encontrada'}), 404
         
-        # Buscar jogos da equipa
-        team_matches = Match.query.filter(
-            (Match.home_team_id == team_api_id) | (Match.away_team_id == team_api_id)
-        ).order_by(Match.match_date.desc()).all()
-        
-        # Preparar dados para análise
-        match_data = []
-        for match in team_matches:
-            is_home = match.home_team_id == team_api_id
-            match_data.append({
-                'is_home': is_home,
-                'goals_for': match.home_score if is_home else match.away_score,
-                'goals_against': match.away_score if is_home else match.home_score,
-                'status': match.status,
-                'match_date': match.match_date,
-                'opponent_id': match.away_team_id if is_home else match.home_team_id
-            })
+        # Jogos da equipa (mais recentes primeiro) a partir do armazém colunar
+        match_data = match_store.team_matches(team_api_id)[::-1]
         
-        # Calcular métricas avançadas
+        # Calcular métricas avançadas (versão vetorizada)
         stats_calc = AdvancedStatsCalculator()
+        team_metrics = BatchStatsCalculator.team_metrics_from_store(match_store, team_api_id)
         
-        elo_rating = stats_calc.calculate_elo_rating(match_data[-20:])  # Últimos 20 jogos
-        form_index = stats_calc.calculate_form_index(match_data[:10])   # Últimos 10 jogos
-        attacking_stats = stats_calc.calculate_attacking_efficiency(match_data)
-        defensive_stats = stats_calc.calculate_defensive_solidity(match_data)
-        home_away_performance = stats_calc.calculate_home_away_performance(match_data)
+        elo_rating = elo_engine.get_rating(team_api_id)  # Rating da liga (adversários reais)
+        form_index = team_metrics['form_index']   # Últimos 10 jogos
+        attacking_stats = team_metrics['attacking_efficiency']
+        defensive_stats = team_metrics['defensive_solidity']
+        home_away_performance = team_metrics['home_away_performance']
         
         # Análise de tendências (últimos 5 vs anteriores 5)
         recent_5 = match_data[:5]
@@ -136,7 +186,7 @@ def team_deep_analysis(team_api_id):
             'overall_metrics': {
                 'elo_rating': round(elo_rating, 2),
                 'form_index': round(form_index, 3),
-                'matches_analyzed': len([m for m in match_data if m['status'] == 'finalizado']),
+                'matches_analyzed': team_metrics['matches_played'],
                 'trend': trend
             },
             'attacking_metrics': {
@@ -178,6 +228,46 @@ def team_deep_analysis(team_api_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@advanced_bp.route('/team-metrics', methods=['GET'])
+def team_metrics_table():
+    """Tabela de métricas avançadas de todas as equipas (opcionalmente por campeonato)"""
+    try:
+        championship_id = request.args.get('championship_id', type=int)
+        
+        rows = None
+        if championship_id:
+            rows = np.flatnonzero(match_store.columns().championship_id == championship_id)
+        
+        team_ids, metrics = BatchStatsCalculator.calculate_from_store(match_store, rows)
+        names = {
+            team.api_id: team.popular_name
+            for team in Team.query.filter(Team.api_id.in_(team_ids.tolist())).all()
+        }
+        
+        result = []
+        for i, team_id in enumerate(team_ids.tolist()):
+            team_metrics = BatchStatsCalculator.team_metrics_dict(metrics, i)
+            result.append({
+                'team_id': team_id,
+                'team_name': names.get(team_id, 'Desconhecido'),
+                'matches_played': team_metrics['matches_played'],
+                'form_index': round(team_metrics['form_index'], 3),
+                'goals_per_match': round(team_metrics['attacking_efficiency']['goals_per_match'], 2),
+                'goals_conceded_per_match': round(team_metrics['defensive_solidity']['goals_conceded_per_match'], 2),
+                'clean_sheets_ratio': round(team_metrics['defensive_solidity']['clean_sheets_ratio'], 3),
+                'home_points_per_match': round(team_metrics['home_away_performance']['home']['points_per_match'], 2),
+                'away_points_per_match': round(team_metrics['home_away_performance']['away']['points_per_match'], 2)
+            })
+        
+        return jsonify({
+            'championship_id': championship_id,
+            'teams_count': len(result),
+            'teams': result
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @advanced_bp.route('/odds-calculator', methods=['POST'])
 def odds_calculator():
     """Calculadora de odds baseada em probabilidades"""
@@ -332,3 +422,39 @@ def league_analysis(championship_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+
+@advanced_bp.route('/season-simulation/<int:championship_id>', methods=['GET'])
+def season_simulation(championship_id):
+    """Projeção Monte Carlo da classificação final (título, top N e descida)"""
+    try:
+        simulations = min(max(request.args.get('simulations', 100000, type=int), 1000), MAX_SIMULATIONS)
+        seed = request.args.get('seed', 42, type=int)
+        workers = min(max(request.args.get('workers', 0, type=int), 0), os.cpu_count() or 1)
+        top_spots = request.args.get('top_spots', 4, type=int)
+        relegation_spots = request.args.get('relegation_spots', 4, type=int)
+        if top_spots < 0 or relegation_spots < 0:
+            return jsonify({'error': 'top_spots e relegation_spots não podem ser negativos'}), 400
+        
+        result = season_simulator.simulate(championship_id, n_simulations=simulations, seed=seed, workers=workers)
+        if result is None:
+            return jsonify({'error': 'Campeonato não encontrado ou sem dados'}), 404
+        
+        n_teams = len(result['team_ids'])
+        if top_spots > n_teams or relegation_spots > n_teams:
+            return jsonify({'error': f'top_spots e relegation_spots têm de estar entre 0 e {n_teams}'}), 400
+        
+        names = {
+            team.api_id: team.popular_name
+            for team in Team.query.filter(Team.api_id.in_(result['team_ids'].tolist())).all()
+        }
+        
+        return jsonify({
+            'championship_id': championship_id,
+            'simulations': result['simulations'],
+            'seed': result['seed'],
+            'matches_remaining': result['matches_remaining'],
+            'teams': season_simulator.summarize(result, names, top_spots=top_spots, relegation_spots=relegation_spots)
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
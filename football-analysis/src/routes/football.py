@@ -1,14 +1,39 @@
-from flask import Blueprint, request, jsonify
-from src.models.football import db, Team, Player, Match, TeamStats, Prediction
-from src.services.football_api import FootballAPIService, DataProcessor, StatsCalculator
+from flask import Blueprint, Response, current_app, request, jsonify
+from src.models.database import sqlite_pragmas
+from src.models.football import db, Team, Match, TeamStats, Prediction
+from src.services.football_api import FootballAPIService
+from src.services.analysis_cache import analysis_cache
+from src.services.championship_sync import ChampionshipSync, PhaseTimer
+from src.services.data_version import data_version
+from src.services.elo_rating import elo_engine
+from src.services.fixture_predictions import fixture_predictions
+from src.services.goal_model import goal_model
+from src.services.head_to_head import h2h_index
+from src.services.jobs import job_runner
+from src.services.live_scores import LiveScoresPoller
+from src.services.market_rollups import market_rollups
+from src.services.match_store import match_store
+from src.services.response_cache import response_cache
+from src.services.team_stats import TeamStatsRecalculator
+from src.services.team_features import team_features
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import aliased
 from datetime import datetime, timedelta
+import base64
+import queue
 import os
+import requests
 
 football_bp = Blueprint('football', __name__)
 
 # Configuração da API (usar chave de teste por padrão)
 API_KEY = os.getenv('FOOTBALL_API_KEY', 'test_a8c37778328495ac24c5d0d3c3923b')
 api_service = FootballAPIService(API_KEY)
+live_scores = LiveScoresPoller(api_service, data_version, market_rollups)
+
+# Paginação das listagens
+MATCHES_PAGE_SIZE = 200
+MAX_PAGE_SIZE = 1000
 
 @football_bp.route('/championships', methods=['GET'])
 def get_championships():
@@ -16,126 +41,157 @@ def get_championships():
     championships = api_service.get_championships()
     return jsonify(championships)
 
+@football_bp.route('/cache-stats', methods=['GET'])
+def get_cache_stats():
+    """Estatísticas dos caches (hit/miss)"""
+    return jsonify({
+        'upstream_http_cache': api_service.cache.stats() if api_service.cache else None,
+        'goal_model_cache': goal_model.stats(),
+        'team_features': team_features.stats(),
+        'data_version': data_version.stats(),
+        'response_cache': response_cache.stats(),
+        'analysis_cache': analysis_cache.stats(),
+        'fixture_predictions': fixture_predictions.stats(),
+        'market_rollups': market_rollups.stats(),
+        'live_scores': live_scores.stats(),
+        'sqlite_pragmas': sqlite_pragmas(db.engine)
+    })
+
+@football_bp.route('/live-scores', methods=['GET'])
+def get_live_scores():
+    """Último snapshot do ao vivo (sem chamar a API)"""
+    return jsonify(live_scores.snapshot())
+
+@football_bp.route('/live-scores/stream', methods=['GET'])
+def stream_live_scores():
+    """
+    Server-Sent Events com as alterações de marcador ao vivo
+    Todos os clientes partilham um único poller do upstream; o primeiro
+    evento é o snapshot completo, os seguintes só as partidas alteradas
+    """
+    subscriber, snapshot = live_scores.subscribe(current_app._get_current_object())
+    
+    def events():
+        try:
+            yield 'retry: 5000\n\n'
+            yield LiveScoresPoller.format_event('snapshot', snapshot)
+            while live_scores.is_subscribed(subscriber):
+                try:
+                    yield subscriber.get(timeout=15)
+                except queue.Empty:
+                    yield ': keep-alive\n\n'
+        finally:
+            live_scores.unsubscribe(subscriber)
+    
+    return Response(events(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+@job_runner.register('sync-championship')
+def run_championship_sync(params, progress):
+    """Job: busca, grava e atualiza os dados derivados de um campeonato"""
+    championship_id = params['championship_id']
+    timer = PhaseTimer()
+    
+    # Buscar dados do campeonato
+    progress(0.05, 'A obter dados da API')
+    with timer.phase('fetch'):
+        # Sempre revalidado no upstream: um erro falha o job em vez de gravar a cópia em cache
+        championship_data = api_service.get_championship_matches(championship_id, revalidate=True, raise_errors=True)
+    
+    if not championship_data:
+        raise LookupError('Campeonato não encontrado')
+    
+    # Ingestão em bloco de equipas e partidas
+    progress(0.4, 'A gravar equipas e partidas')
+    result = ChampionshipSync.sync(championship_data, championship_id, timer)
+    
+    # Atualizar armazém de partidas, confrontos diretos, ratings ELO e agregados diários do campeonato
+    progress(0.8, 'A atualizar partidas, confrontos, ratings e agregados de mercado')
+    with timer.phase('refresh'):
+        match_store.refresh()
+        h2h_index.update()
+        elo_engine.update()
+        market_rollups.refresh_championships([championship_id])
+    
+    # Previsões materializadas das partidas por jogar (lidas pelas rotas de odds)
+    progress(0.9, 'A atualizar previsões')
+    with timer.phase('predictions'):
+        predictions = fixture_predictions.refresh()
+    
+    return {
+        'message': 'Dados sincronizados com sucesso',
+        'championship_id': championship_id,
+        'teams_synced': result['teams_synced'],
+        'matches_synced': result['matches_synced'],
+        'matches_updated': result['matches_updated'],
+        'matches_skipped': result['matches_skipped'],
+        'predictions': predictions['predictions'],
+        'timings': timer.summary()
+    }
+
+@job_runner.register('calculate-stats')
+def run_stats_calculation(params, progress):
+    """Job: recalcula a tabela team_stats"""
+    progress(0.1, 'A recalcular estatísticas')
+    result = TeamStatsRecalculator.recalculate(params['mode'])
+    
+    progress(0.8, 'A atualizar previsões')
+    predictions = fixture_predictions.refresh()
+    
+    return {
+        'message': 'Estatísticas calculadas com sucesso',
+        'mode': result['mode'],
+        'teams_updated': result['teams_updated'],
+        'predictions': predictions['predictions'],
+        'timings': dict(result['timings'], predictions=predictions['timings'])
+    }
+
+def _run_or_enqueue(job_type: str, params: dict):
+    """
+    Por omissão agenda o job e responde 202 com o id (estado em /api/jobs/<id>);
+    com ?wait=true corre no próprio pedido e devolve o resultado
+    """
+    if request.args.get('wait', 'false').lower() == 'true':
+        try:
+            return jsonify(job_runner.run_inline(job_type, params))
+        except LookupError as e:
+            return jsonify({'error': str(e)}), 404
+        except requests.exceptions.RequestException as e:
+            db.session.rollback()
+            return jsonify({'error': f'Erro ao obter dados da API: {e}'}), 502
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({'error': str(e)}), 500
+    
+    job = job_runner.submit(job_type, params)
+    response = jsonify({'job_id': job['id'], 'status': job['status'], 'status_url': f"/api/jobs/{job['id']}"})
+    response.headers['Location'] = f"/api/jobs/{job['id']}"
+    return response, 202
+
 @football_bp.route('/sync-championship/<int:championship_id>', methods=['POST'])
 def sync_championship_data(championship_id):
-    """Sincroniza dados de um campeonato específico"""
-    try:
-        # Buscar dados do campeonato
-        championship_data = api_service.get_championship_matches(championship_id)
-        
-        if not championship_data:
-            return jsonify({'error': 'Campeonato não encontrado'}), 404
-        
-        teams_synced = 0
-        matches_synced = 0
-        
-        # Processar partidas
-        partidas = championship_data.get('partidas', {})
-        
-        for fase_name, fase_data in partidas.items():
-            if isinstance(fase_data, dict):
-                for chave_name, chave_data in fase_data.items():
-                    if isinstance(chave_data, dict):
-                        for tipo_jogo, jogo_data in chave_data.items():
-                            if isinstance(jogo_data, dict) and 'partida_id' in jogo_data:
-                                # Processar equipa mandante
-                                home_team_data = jogo_data.get('time_mandante', {})
-                                if home_team_data:
-                                    team_data = DataProcessor.process_team_data(home_team_data)
-                                    if team_data['api_id']:
-                                        existing_team = Team.query.filter_by(api_id=team_data['api_id']).first()
-                                        if not existing_team:
-                                            new_team = Team(**team_data)
-                                            db.session.add(new_team)
-                                            teams_synced += 1
-                                
-                                # Processar equipa visitante
-                                away_team_data = jogo_data.get('time_visitante', {})
-                                if away_team_data:
-                                    team_data = DataProcessor.process_team_data(away_team_data)
-                                    if team_data['api_id']:
-                                        existing_team = Team.query.filter_by(api_id=team_data['api_id']).first()
-                                        if not existing_team:
-                                            new_team = Team(**team_data)
-                                            db.session.add(new_team)
-                                            teams_synced += 1
-                                
-                                # Processar partida
-                                match_data = DataProcessor.process_match_data(jogo_data)
-                                match_data['championship_id'] = championship_id
-                                match_data['championship_name'] = championship_data.get('campeonato', {}).get('nome', '')
-                                
-                                if match_data['api_id']:
-                                    existing_match = Match.query.filter_by(api_id=match_data['api_id']).first()
-                                    if not existing_match:
-                                        new_match = Match(**match_data)
-                                        db.session.add(new_match)
-                                        matches_synced += 1
-        
-        db.session.commit()
-        
-        return jsonify({
-            'message': 'Dados sincronizados com sucesso',
-            'teams_synced': teams_synced,
-            'matches_synced': matches_synced
-        })
-        
-    except Exception as e:
-        db.session.rollback()
-        return jsonify({'error': str(e)}), 500
+    """Sincroniza dados de um campeonato específico (em segundo plano)"""
+    return _run_or_enqueue('sync-championship', {'championship_id': championship_id})
 
 @football_bp.route('/calculate-stats', methods=['POST'])
 def calculate_team_stats():
-    """Calcula estatísticas para todas as equipas"""
-    try:
-        teams = Team.query.all()
-        stats_updated = 0
-        
-        for team in teams:
-            # Buscar todas as partidas da equipa
-            matches = Match.query.filter(
-                (Match.home_team_id == team.api_id) | (Match.away_team_id == team.api_id)
-            ).all()
-            
-            # Converter para formato dict
-            match_dicts = []
-            for match in matches:
-                match_dicts.append({
-                    'home_team_id': match.home_team_id,
-                    'away_team_id': match.away_team_id,
-                    'home_score': match.home_score,
-                    'away_score': match.away_score,
-                    'status': match.status
-                })
-            
-            # Calcular estatísticas
-            stats = StatsCalculator.calculate_team_stats(match_dicts, team.api_id)
-            
-            # Atualizar ou criar registo de estatísticas
-            existing_stats = TeamStats.query.filter_by(team_id=team.id).first()
-            if existing_stats:
-                for key, value in stats.items():
-                    setattr(existing_stats, key, value)
-                existing_stats.last_updated = datetime.utcnow()
-            else:
-                stats['team_id'] = team.id
-                new_stats = TeamStats(**stats)
-                db.session.add(new_stats)
-            
-            stats_updated += 1
-        
-        db.session.commit()
-        
-        return jsonify({
-            'message': 'Estatísticas calculadas com sucesso',
-            'teams_updated': stats_updated
-        })
-        
-    except Exception as e:
-        db.session.rollback()
-        return jsonify({'error': str(e)}), 500
+    """
+    Calcula estatísticas para todas as equipas (em segundo plano)
+    mode=full (por omissão) recalcula todas; mode=incremental só as equipas
+    com partidas alteradas desde o último cálculo
+    """
+    data = request.get_json(silent=True) or {}
+    mode = data.get('mode') or request.args.get('mode', 'full')
+    
+    if mode not in ('full', 'incremental'):
+        return jsonify({'error': 'Modo inválido (use full ou incremental)'}), 400
+    
+    return _run_or_enqueue('calculate-stats', {'mode': mode})
 
 @football_bp.route('/teams', methods=['GET'])
+@response_cache.cached(ttl=300)  # Limite para escritas fora do data_version (ex.: edição direta da base)
 def get_teams():
     """Lista todas as equipas com suas estatísticas"""
     teams = db.session.query(Team, TeamStats).outerjoin(TeamStats).all()
@@ -171,28 +227,56 @@ def get_teams():
     return jsonify(result)
 
 @football_bp.route('/matches', methods=['GET'])
+@response_cache.cached(ttl=300)  # Limite para escritas fora do data_version (ex.: edição direta da base)
 def get_matches():
-    """Lista todas as partidas"""
-    matches = db.session.query(Match, Team.popular_name.label('home_name'), Team.popular_name.label('away_name')).join(
-        Team, Team.api_id == Match.home_team_id
-    ).join(
-        Team.query.filter(Team.api_id == Match.away_team_id).subquery(), 
-        Team.api_id == Match.away_team_id
-    ).all()
+    """
+    Lista partidas (mais recentes primeiro) com paginação por cursor
+    Filtros opcionais: championship_id, status, date_from, date_to (ISO).
+    O cursor da página seguinte vem no cabeçalho X-Next-Cursor e o total
+    filtrado em X-Total-Count (só na primeira página, ou com count=true).
+    """
+    try:
+        limit = min(max(1, request.args.get('limit', MATCHES_PAGE_SIZE, type=int)), MAX_PAGE_SIZE)
+        cursor = _decode_cursor(request.args.get('cursor'))
+        date_from = _parse_date_arg('date_from')
+        date_to = _parse_date_arg('date_to')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    # Simplificar a consulta
-    matches = Match.query.all()
-    result = []
+    championship_id = request.args.get('championship_id', type=int)
+    status = request.args.get('status')
     
-    for match in matches:
-        home_team = Team.query.filter_by(api_id=match.home_team_id).first()
-        away_team = Team.query.filter_by(api_id=match.away_team_id).first()
-        
+    filters = []
+    if championship_id:
+        filters.append(Match.championship_id == championship_id)
+    if status:
+        filters.append(Match.status == status)
+    if date_from:
+        filters.append(Match.match_date >= date_from)
+    if date_to:
+        filters.append(Match.match_date <= date_to)
+    
+    # O COUNT percorre todas as partidas filtradas: só na primeira página ou a pedido
+    total = None
+    if not cursor or request.args.get('count', 'false').lower() == 'true':
+        total = db.session.query(db.func.count(Match.id)).filter(*filters).scalar()
+    
+    if cursor:
+        cursor_date, cursor_id = cursor
+        filters.append(or_(
+            Match.match_date < cursor_date,
+            and_(Match.match_date == cursor_date, Match.id < cursor_id)
+        ))
+    
+    rows = matches_page_query(filters, limit + 1).all()
+    
+    result = []
+    for match, home_name, away_name in rows[:limit]:
         result.append({
             'id': match.id,
             'api_id': match.api_id,
-            'home_team': home_team.popular_name if home_team else 'Desconhecido',
-            'away_team': away_team.popular_name if away_team else 'Desconhecido',
+            'home_team': home_name or 'Desconhecido',
+            'away_team': away_name or 'Desconhecido',
             'home_score': match.home_score,
             'away_score': match.away_score,
             'status': match.status,
@@ -200,7 +284,27 @@ def get_matches():
             'championship_name': match.championship_name
         })
     
-    return jsonify(result)
+    response = jsonify(result)
+    if total is not None:
+        response.headers['X-Total-Count'] = str(total)
+    if len(rows) > limit:
+        last_match = rows[limit - 1][0]
+        response.headers['X-Next-Cursor'] = _encode_cursor(last_match.match_date, last_match.id)
+    return response
+
+def matches_page_query(filters: list, limit: int):
+    """Página da listagem de partidas com os nomes das duas equipas (uma só query, sem N+1)"""
+    home_team = aliased(Team)
+    away_team = aliased(Team)
+    return db.session.query(
+        Match, home_team.popular_name, away_team.popular_name
+    ).outerjoin(
+        home_team, home_team.api_id == Match.home_team_id
+    ).outerjoin(
+        away_team, away_team.api_id == Match.away_team_id
+    ).filter(*filters).order_by(
+        Match.match_date.desc(), Match.id.desc()
+    ).limit(limit)
 
 @football_bp.route('/predict-odds', methods=['POST'])
 def predict_odds():
@@ -260,6 +364,7 @@ def predict_odds():
         )
         
         db.session.add(prediction)
+        data_version.bump('predict-odds', [], namespace='predictions')
         db.session.commit()
         
         return jsonify({
@@ -288,18 +393,50 @@ def predict_odds():
 
 @football_bp.route('/predictions', methods=['GET'])
 def get_predictions():
-    """Lista todas as previsões"""
-    predictions = Prediction.query.order_by(Prediction.created_at.desc()).all()
+    """
+    Lista previsões (mais recentes primeiro) com paginação por cursor
+    Filtros opcionais: date_from, date_to (data da partida, ISO).
+    """
+    try:
+        limit = min(max(1, request.args.get('limit', MATCHES_PAGE_SIZE, type=int)), MAX_PAGE_SIZE)
+        cursor = _decode_cursor(request.args.get('cursor'))
+        date_from = _parse_date_arg('date_from')
+        date_to = _parse_date_arg('date_to')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    home_team = aliased(Team)
+    away_team = aliased(Team)
+    query = db.session.query(
+        Prediction, home_team.popular_name, away_team.popular_name
+    ).outerjoin(
+        home_team, home_team.id == Prediction.home_team_id
+    ).outerjoin(
+        away_team, away_team.id == Prediction.away_team_id
+    )
+    
+    filters = []
+    if date_from:
+        filters.append(Prediction.match_date >= date_from)
+    if date_to:
+        filters.append(Prediction.match_date <= date_to)
+    if cursor:
+        cursor_date, cursor_id = cursor
+        filters.append(or_(
+            Prediction.created_at < cursor_date,
+            and_(Prediction.created_at == cursor_date, Prediction.id < cursor_id)
+        ))
+    
+    rows = query.filter(*filters).order_by(
+        Prediction.created_at.desc(), Prediction.id.desc()
+    ).limit(limit + 1).all()
     
     result = []
-    for pred in predictions:
-        home_team = Team.query.get(pred.home_team_id)
-        away_team = Team.query.get(pred.away_team_id)
-        
+    for pred, home_name, away_name in rows[:limit]:
         result.append({
             'id': pred.id,
-            'home_team': home_team.popular_name if home_team else 'Desconhecido',
-            'away_team': away_team.popular_name if away_team else 'Desconhecido',
+            'home_team': home_name or 'Desconhecido',
+            'away_team': away_name or 'Desconhecido',
             'predicted_result': pred.predicted_result,
             'confidence': pred.confidence,
             'odds': pred.odds,
@@ -307,5 +444,33 @@ def get_predictions():
             'created_at': pred.created_at.isoformat()
         })
     
-    return jsonify(result)
+    response = jsonify(result)
+    if len(rows) > limit:
+        last_prediction = rows[limit - 1][0]
+        response.headers['X-Next-Cursor'] = _encode_cursor(last_prediction.created_at, last_prediction.id)
+    return response
 
+def _parse_date_arg(name: str):
+    """Lê um parâmetro de data ISO da query string (None se ausente)"""
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f'Data inválida em {name}: {value}')
+
+def _encode_cursor(sort_value: datetime, row_id: int) -> str:
+    """Cursor opaco com a posição (data, id) da última linha devolvida"""
+    raw = f"{sort_value.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+def _decode_cursor(cursor: str):
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+        sort_value, row_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(sort_value), int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError('Cursor inválido')
@@ -0,0 +1,40 @@
+from flask import Blueprint, request, jsonify
+from src.services.jobs import job_runner
+
+jobs_bp = Blueprint('jobs', __name__)
+
+@jobs_bp.route('/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Estado e progresso de um job"""
+    job = job_runner.get(job_id)
+    if not job:
+        return jsonify({'error': 'Job não encontrado'}), 404
+    return jsonify(job)
+
+@jobs_bp.route('', methods=['GET'])
+def list_jobs():
+    """Jobs mais recentes (opcionalmente por tipo)"""
+    limit = min(max(1, request.args.get('limit', 20, type=int)), 200)
+    return jsonify(job_runner.recent(limit, request.args.get('job_type')))
+
+@jobs_bp.route('/sync-championships', methods=['POST'])
+def sync_championships():
+    """Agenda a sincronização de vários campeonatos (corre em paralelo até JOB_WORKERS)"""
+    try:
+        data = request.get_json(silent=True) or {}
+        championship_ids = [int(championship_id) for championship_id in data.get('championship_ids', [])]
+        
+        if not championship_ids:
+            return jsonify({'error': 'championship_ids é obrigatório'}), 400
+        
+        jobs = [job_runner.submit('sync-championship', {'championship_id': championship_id})
+                for championship_id in dict.fromkeys(championship_ids)]
+        
+        return jsonify({
+            'max_parallel': job_runner.max_workers,
+            'jobs': [{'championship_id': job['params']['championship_id'], 'job_id': job['id'], 'status': job['status']}
+                     for job in jobs]
+        }), 202
+        
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
@@ -1,7 +1,15 @@
 from flask import Blueprint, request, jsonify
-from src.models.football import db, Team, Match, TeamStats, Prediction
-from src.services.odds_125_system import OddsTargetSystem, BettingStrategy, PerformanceTracker
+from src.models.football import db, Match, FixturePrediction
+from src.services.odds_125_system import OddsTargetSystem, BettingStrategy
+from src.services.goal_model import GoalModel, goal_model
+from src.services.backtest import backtest_engine
+from src.services.fixture_predictions import fixture_predictions
+from src.services.market_rollups import market_rollups
+from src.services.team_features import team_features
+from src.services.response_cache import response_cache
+from sqlalchemy import case, func, union
 from datetime import datetime, timedelta
+import math
 import os
 
 odds_bp = Blueprint('odds', __name__)
@@ -9,7 +17,9 @@ odds_bp = Blueprint('odds', __name__)
 # Instâncias dos sistemas
 odds_system = OddsTargetSystem()
 betting_strategy = BettingStrategy()
-performance_tracker = PerformanceTracker()
+
+# Maior janela (dias) de /market-analysis e /performance-tracking; acima disso timedelta pode transbordar
+MAX_WINDOW_DAYS = 3650
 
 @odds_bp.route('/find-125-opportunities', methods=['POST'])
 def find_125_opportunities():
@@ -19,67 +29,37 @@ def find_125_opportunities():
         championship_id = data.get('championship_id')
         days_ahead = data.get('days_ahead', 7)  # Próximos 7 dias por padrão
         
-        # Buscar partidas futuras
+        # Previsões materializadas das partidas futuras (SELECT pelos índices de fixture_predictions)
         future_date = datetime.now() + timedelta(days=days_ahead)
+        window = fixture_predictions.window(date_to=future_date, championship_id=championship_id)
         
-        if championship_id:
-            matches = Match.query.filter(
-                Match.championship_id == championship_id,
-                Match.match_date <= future_date,
-                Match.status != 'finalizado'
-            ).all()
-        else:
-            matches = Match.query.filter(
-                Match.match_date <= future_date,
-                Match.status != 'finalizado'
-            ).limit(50).all()  # Limitar a 50 jogos
-        
-        if not matches:
+        matches_analyzed = db.session.query(func.count(FixturePrediction.id)).filter(*window).scalar()
+        if not matches_analyzed:
             return jsonify({'message': 'Nenhuma partida encontrada para análise'}), 404
         
-        # Preparar dados das partidas
-        matches_data = []
-        team_ids = set()
-        
-        for match in matches:
-            matches_data.append({
-                'home_team_id': match.home_team_id,
-                'away_team_id': match.away_team_id,
-                'match_date': match.match_date,
-                'championship_name': match.championship_name
-            })
-            team_ids.add(match.home_team_id)
-            team_ids.add(match.away_team_id)
-        
-        # Buscar dados das equipas
-        teams_data = {}
-        for team_id in team_ids:
-            team = Team.query.filter_by(api_id=team_id).first()
-            if team:
-                stats = TeamStats.query.filter_by(team_id=team.id).first()
-                if stats:
-                    teams_data[team_id] = {
-                        'name': team.popular_name,
-                        'elo_rating': 1500,  # Valor padrão, seria calculado
-                        'goals_per_match': stats.goals_per_match,
-                        'goals_conceded_per_match': stats.goals_conceded_per_match,
-                        'win_percentage': stats.win_percentage,
-                        'form_index': 0.6  # Seria calculado dinamicamente
-                    }
-        
-        # Encontrar oportunidades de alta confiança
-        opportunities = odds_system.find_high_confidence_bets(matches_data, teams_data)
+        opportunity_filter = window + [FixturePrediction.confidence >= odds_system.min_confidence_threshold]
+        total_opportunities, avg_confidence, low_risk_count, medium_risk_count = db.session.query(
+            func.count(FixturePrediction.id),
+            func.avg(FixturePrediction.confidence),
+            func.sum(case((FixturePrediction.risk_level == 'Baixo', 1), else_=0)),
+            func.sum(case((FixturePrediction.risk_level == 'Médio', 1), else_=0))
+        ).filter(*opportunity_filter).one()
+        teams_analyzed = db.session.query(func.count()).select_from(
+            union(
+                db.session.query(FixturePrediction.home_team_id).filter(*window),
+                db.session.query(FixturePrediction.away_team_id).filter(*window)
+            ).subquery()
+        ).scalar()
+        
+        top_predictions = fixture_predictions.top(window, odds_system.min_confidence_threshold, 10).all()  # Top 10
         
         # Preparar resposta
         formatted_opportunities = []
-        for opp in opportunities[:10]:  # Top 10
-            home_team = Team.query.filter_by(api_id=opp['home_team_id']).first()
-            away_team = Team.query.filter_by(api_id=opp['away_team_id']).first()
-            
+        for opp in map(fixture_predictions.to_bet, top_predictions):
             formatted_opportunities.append({
-                'match': f"{home_team.popular_name if home_team else 'N/A'} vs {away_team.popular_name if away_team else 'N/A'}",
-                'home_team': home_team.popular_name if home_team else 'N/A',
-                'away_team': away_team.popular_name if away_team else 'N/A',
+                'match': f"{opp['home_team']} vs {opp['away_team']}",
+                'home_team': opp['home_team'],
+                'away_team': opp['away_team'],
                 'recommended_bet': opp['recommended_bet'],
                 'confidence': round(opp['confidence'] * 100, 1),
                 'probability': round(opp['probability'] * 100, 1),
@@ -90,37 +70,104 @@ def find_125_opportunities():
             })
         
         return jsonify({
-            'total_opportunities': len(opportunities),
+            'total_opportunities': total_opportunities,
             'high_confidence_bets': formatted_opportunities,
             'analysis_summary': {
-                'matches_analyzed': len(matches_data),
-                'teams_analyzed': len(teams_data),
-                'avg_confidence': round(sum(o['confidence'] for o in opportunities) / max(1, len(opportunities)) * 100, 1),
-                'low_risk_count': len([o for o in opportunities if o['risk_level'] == 'Baixo']),
-                'medium_risk_count': len([o for o in opportunities if o['risk_level'] == 'Médio'])
+                'matches_analyzed': matches_analyzed,
+                'teams_analyzed': teams_analyzed,
+                'avg_confidence': round((avg_confidence or 0) * 100, 1),
+                'low_risk_count': low_risk_count or 0,
+                'medium_risk_count': medium_risk_count or 0
             }
         })
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@odds_bp.route('/market-prices', methods=['POST'])
+def market_prices():
+    """Probabilidades e odds justas de todos os mercados (modelo de Poisson)"""
+    try:
+        data = request.get_json() or {}
+        fixtures = data.get('fixtures')
+        try:
+            lines = tuple(float(line) for line in data.get('lines', GoalModel.DEFAULT_LINES))
+            valid_lines = all(math.isfinite(line) for line in lines)
+        except (TypeError, ValueError):
+            valid_lines = False
+        if not valid_lines:
+            return jsonify({'error': 'lines tem de ser uma lista de números (ex.: [1.5, 2.5])'}), 400
+        
+        if fixtures:
+            try:
+                matches_data = [
+                    {'home_team_id': int(f['home_team_id']), 'away_team_id': int(f['away_team_id']), 'match_date': None}
+                    for f in fixtures
+                ]
+            except (KeyError, TypeError, ValueError):
+                return jsonify({'error': 'Cada partida precisa de home_team_id e away_team_id inteiros'}), 400
+        else:
+            future_date = datetime.now() + timedelta(days=data.get('days_ahead', 7))
+            query = upcoming_matches_query(future_date, data.get('championship_id'))
+            matches_data = [
+                {'home_team_id': home_id, 'away_team_id': away_id, 'match_date': match_date}
+                for home_id, away_id, match_date in query.all()
+            ]
+        
+        if not matches_data:
+            return jsonify({'message': 'Nenhuma partida encontrada para análise'}), 404
+        
+        # Estatísticas de todas as equipas envolvidas (snapshot em memória)
+        team_ids = {m['home_team_id'] for m in matches_data} | {m['away_team_id'] for m in matches_data}
+        teams_data = team_features.get(team_ids)
+        
+        priced = odds_system.price_markets(matches_data, teams_data, lines)
+        for prices in priced:
+            prices['home_team'] = teams_data[prices['home_team_id']]['name']
+            prices['away_team'] = teams_data[prices['away_team_id']]['name']
+            prices['match_date'] = prices['match_date'].strftime('%Y-%m-%d %H:%M') if prices['match_date'] else None
+        
+        return jsonify({
+            'model': {'type': 'poisson', 'version': goal_model.version, 'max_goals': goal_model.max_goals},
+            'matches_requested': len(matches_data),
+            'matches_priced': len(priced),
+            'markets': priced
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def upcoming_matches_query(future_date: datetime, championship_id=None):
+    """Partidas por jogar até future_date (opcionalmente de um campeonato)"""
+    query = db.session.query(
+        Match.home_team_id, Match.away_team_id, Match.match_date
+    ).filter(
+        Match.match_date <= future_date,
+        Match.status != 'finalizado'
+    )
+    if championship_id:
+        query = query.filter(Match.championship_id == championship_id)
+    return query
+
 @odds_bp.route('/daily-recommendations', methods=['GET'])
 def daily_recommendations():
     """Gera recomendações diárias de apostas"""
     try:
         bankroll = request.args.get('bankroll', 1000, type=float)
         
-        # Buscar partidas de hoje e amanhã
+        # Previsões materializadas das partidas de hoje e amanhã
         today = datetime.now().date()
         tomorrow = today + timedelta(days=1)
+        window = fixture_predictions.window(
+            date_from=datetime.combine(today, datetime.min.time()),
+            date_to=datetime.combine(tomorrow, datetime.max.time())
+        )
         
-        matches = Match.query.filter(
-            Match.match_date >= datetime.combine(today, datetime.min.time()),
-            Match.match_date <= datetime.combine(tomorrow, datetime.max.time()),
-            Match.status != 'finalizado'
+        top_predictions = fixture_predictions.top(
+            window, betting_strategy.min_confidence, betting_strategy.max_daily_bets
         ).all()
         
-        if not matches:
+        if not top_predictions and FixturePrediction.query.filter(*window).first() is None:
             return jsonify({
                 'message': 'Nenhuma partida encontrada para hoje/amanhã',
                 'recommendations': [],
@@ -132,40 +179,8 @@ def daily_recommendations():
                 }
             })
         
-        # Preparar dados (similar ao endpoint anterior)
-        matches_data = []
-        team_ids = set()
-        
-        for match in matches:
-            matches_data.append({
-                'home_team_id': match.home_team_id,
-                'away_team_id': match.away_team_id,
-                'match_date': match.match_date,
-                'championship_name': match.championship_name
-            })
-            team_ids.add(match.home_team_id)
-            team_ids.add(match.away_team_id)
-        
-        # Buscar dados das equipas
-        teams_data = {}
-        for team_id in team_ids:
-            team = Team.query.filter_by(api_id=team_id).first()
-            if team:
-                stats = TeamStats.query.filter_by(team_id=team.id).first()
-                if stats:
-                    teams_data[team_id] = {
-                        'name': team.popular_name,
-                        'elo_rating': 1500 + (stats.win_percentage - 50) * 10,
-                        'goals_per_match': stats.goals_per_match,
-                        'goals_conceded_per_match': stats.goals_conceded_per_match,
-                        'win_percentage': stats.win_percentage,
-                        'form_index': min(1.0, stats.win_percentage / 100)
-                    }
-        
-        # Encontrar oportunidades
-        opportunities = odds_system.find_high_confidence_bets(matches_data, teams_data)
-        
         # Gerar recomendações
+        opportunities = [fixture_predictions.to_bet(prediction) for prediction in top_predictions]
         recommendations = betting_strategy.generate_daily_recommendations(opportunities, bankroll)
         
         return jsonify(recommendations)
@@ -244,18 +259,27 @@ def bet_calculator():
         return jsonify({'error': str(e)}), 500
 
 @odds_bp.route('/performance-tracking', methods=['GET'])
+@response_cache.cached(ttl=300)  # Janela relativa ao dia atual (últimos N dias)
 def performance_tracking():
-    """Rastreamento de performance das previsões"""
+    """
+    Rastreamento de performance das previsões
+    Apostas do backtest walk-forward liquidadas com os marcadores reais nos
+    últimos ?days=N dias (por omissão 30); o histórico anterior só serve
+    para as features de cada dia.
+    """
     try:
-        # Buscar previsões dos últimos 30 dias
-        thirty_days_ago = datetime.now() - timedelta(days=30)
-        recent_predictions = Prediction.query.filter(
-            Prediction.created_at >= thirty_days_ago
-        ).all()
+        days = request.args.get('days', 30, type=int)
+        bankroll = request.args.get('bankroll', 1000, type=float)
+        if days is None or not 1 <= days <= MAX_WINDOW_DAYS:
+            return jsonify({'error': f'days tem de ser um inteiro entre 1 e {MAX_WINDOW_DAYS}'}), 400
+        
+        result = backtest_engine.run(bankroll=bankroll)
+        since = datetime.now() - timedelta(days=days)
+        recent_bets = [bet for bet in result['bets'] if bet['match_date'] and bet['match_date'] >= since]
         
-        if not recent_predictions:
+        if not recent_bets:
             return jsonify({
-                'message': 'Nenhuma previsão encontrada nos últimos 30 dias',
+                'message': f'Nenhuma aposta liquidada nos últimos {days} dias',
                 'metrics': {
                     'total_predictions': 0,
                     'win_rate': 0,
@@ -263,84 +287,110 @@ def performance_tracking():
                 }
             })
         
-        # Simular resultados para demonstração
-        # Em implementação real, teria resultados reais das apostas
-        total_predictions = len(recent_predictions)
-        simulated_wins = int(total_predictions * 0.78)  # 78% de acerto simulado
-        
-        # Calcular métricas
-        win_rate = (simulated_wins / total_predictions) * 100
-        total_stake = total_predictions * 100  # 100 por aposta
-        total_return = simulated_wins * 125  # 25% de lucro por vitória
-        roi = ((total_return - total_stake) / total_stake) * 100
-        
-        # Análise por tipo de aposta
-        bet_types = {}
-        for pred in recent_predictions:
-            bet_type = pred.predicted_result
-            if bet_type not in bet_types:
-                bet_types[bet_type] = {'count': 0, 'avg_confidence': 0}
-            bet_types[bet_type]['count'] += 1
-            bet_types[bet_type]['avg_confidence'] += pred.confidence
-        
-        # Calcular médias
-        for bet_type in bet_types:
-            bet_types[bet_type]['avg_confidence'] /= bet_types[bet_type]['count']
-            bet_types[bet_type]['avg_confidence'] = round(bet_types[bet_type]['avg_confidence'], 2)
+        report = backtest_engine.report(recent_bets, bankroll * max(1, len(result['seasons'])))
+        bet_types = {
+            bet_type: dict(entry, avg_confidence=round(
+                sum(bet['confidence'] for bet in recent_bets if bet['bet_type'] == bet_type) / entry['bets'] * 100, 2))
+            for bet_type, entry in report['by_bet_type'].items()
+        }
         
         return jsonify({
-            'period': '30 dias',
+            'period': f'{days} dias',
             'overall_metrics': {
-                'total_predictions': total_predictions,
-                'wins': simulated_wins,
-                'losses': total_predictions - simulated_wins,
-                'win_rate': round(win_rate, 2),
-                'roi': round(roi, 2),
-                'profit_loss': round(total_return - total_stake, 2),
-                'average_confidence': round(sum(p.confidence for p in recent_predictions) / total_predictions, 2)
+                'total_predictions': report['total_bets'],
+                'wins': report['wins'],
+                'losses': report['total_bets'] - report['wins'],
+                'win_rate': report['hit_rate'],
+                'roi': report['roi'],
+                'profit_loss': report['profit_loss'],
+                'total_staked': report['total_staked'],
+                'max_drawdown': report['max_drawdown'],
+                'brier_score': report['brier_score'],
+                'average_confidence': round(sum(bet['confidence'] for bet in recent_bets) / len(recent_bets) * 100, 2)
             },
             'bet_type_analysis': bet_types,
+            'calibration': report['calibration'],
             'monthly_trend': {
-                'improving': roi > 0,
-                'trend_direction': 'Positiva' if roi > 0 else 'Negativa',
-                'consistency': 'Alta' if win_rate >= 75 else 'Média' if win_rate >= 65 else 'Baixa'
+                'improving': report['roi'] > 0,
+                'trend_direction': 'Positiva' if report['roi'] > 0 else 'Negativa',
+                'consistency': 'Alta' if report['hit_rate'] >= 75 else 'Média' if report['hit_rate'] >= 65 else 'Baixa'
             },
             'recommendations': {
-                'continue_strategy': win_rate >= 75 and roi > 0,
-                'adjust_stake': roi < 0,
-                'focus_on_best_bet_type': max(bet_types.keys(), key=lambda x: bet_types[x]['count']) if bet_types else 'N/A'
+                'continue_strategy': report['hit_rate'] >= 75 and report['roi'] > 0,
+                'adjust_stake': report['roi'] < 0,
+                'focus_on_best_bet_type': max(bet_types, key=lambda x: bet_types[x]['profit_loss'])
             }
         })
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@odds_bp.route('/backtest', methods=['GET'])
+def backtest():
+    """Backtest walk-forward das recomendações com os resultados reais das partidas"""
+    try:
+        championship_ids = request.args.getlist('championship_id', type=int)
+        bankroll = request.args.get('bankroll', 1000, type=float)
+        workers = min(max(request.args.get('workers', 0, type=int), 0), os.cpu_count() or 1)
+        include_bets = request.args.get('include_bets', 'false').lower() == 'true'
+        
+        result = backtest_engine.run(championship_ids or None, bankroll=bankroll, workers=workers)
+        if not result['seasons']:
+            return jsonify({'error': 'Sem partidas finalizadas para o backtest'}), 404
+        
+        response = {
+            'initial_bankroll_per_season': bankroll,
+            'seasons': result['seasons'],
+            'overall': result['overall']
+        }
+        if include_bets:
+            response['bets'] = [
+                dict(bet, match_date=bet['match_date'].strftime('%Y-%m-%d %H:%M') if bet['match_date'] else None,
+                     stake=round(bet['stake'], 2), profit=round(bet['profit'], 2), bankroll=round(bet['bankroll'], 2))
+                for bet in result['bets']
+            ]
+        
+        return jsonify(response)
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @odds_bp.route('/market-analysis', methods=['GET'])
+@response_cache.cached(ttl=300)  # Janela relativa ao dia atual (últimos N dias)
 def market_analysis():
-    """Análise do mercado para identificar tendências"""
+    """
+    Análise do mercado para identificar tendências
+    Janela: ?days=N (por omissão 30) e/ou ?championship_id=X; só com o
+    campeonato, a época completa. Soma os agregados diários (market_daily_rollups)
+    em vez de ler as partidas.
+    """
     try:
-        # Buscar dados dos últimos jogos finalizados
-        recent_matches = Match.query.filter(
-            Match.status == 'finalizado',
-            Match.match_date >= datetime.now() - timedelta(days=30)
-        ).limit(200).all()
+        championship_id = request.args.get('championship_id', type=int)
+        days = request.args.get('days', type=int)
+        if days is None and championship_id is None:
+            days = 30
+        if days is not None and not 1 <= days <= MAX_WINDOW_DAYS:
+            return jsonify({'error': f'days tem de ser um inteiro entre 1 e {MAX_WINDOW_DAYS}'}), 400
         
-        if not recent_matches:
+        date_from = datetime.now().date() - timedelta(days=days) if days else None
+        summary = market_rollups.summarize(date_from=date_from, championship_id=championship_id)
+        
+        if not summary['matches']:
             return jsonify({'error': 'Dados insuficientes para análise'}), 404
         
         # Análises estatísticas
-        total_matches = len(recent_matches)
-        home_wins = sum(1 for m in recent_matches if m.home_score > m.away_score)
-        draws = sum(1 for m in recent_matches if m.home_score == m.away_score)
-        away_wins = sum(1 for m in recent_matches if m.home_score < m.away_score)
+        total_matches = summary['matches']
+        home_wins = summary['home_wins']
+        draws = summary['draws']
+        away_wins = summary['away_wins']
         
-        total_goals = sum(m.home_score + m.away_score for m in recent_matches)
+        total_goals = summary['home_goals'] + summary['away_goals']
         avg_goals = total_goals / total_matches
         
-        over_25_count = sum(1 for m in recent_matches if (m.home_score + m.away_score) > 2.5)
+        over_25_count = sum(summary['goal_histogram'][3:])
         over_25_percentage = (over_25_count / total_matches) * 100
         
-        both_scored = sum(1 for m in recent_matches if m.home_score > 0 and m.away_score > 0)
+        both_scored = summary['both_scored']
         btts_percentage = (both_scored / total_matches) * 100
         
         # Identificar padrões para odds 1.25
@@ -385,7 +435,8 @@ def market_analysis():
             })
         
         return jsonify({
-            'analysis_period': '30 dias',
+            'analysis_period': f'{days} dias' if days else 'Época completa',
+            'championship_id': championship_id,
             'sample_size': total_matches,
             'market_statistics': {
                 'home_wins': home_wins,
@@ -396,7 +447,11 @@ def market_analysis():
                 'away_win_percentage': round((away_wins / total_matches) * 100, 1),
                 'average_goals_per_match': round(avg_goals, 2),
                 'over_25_percentage': round(over_25_percentage, 1),
-                'btts_percentage': round(btts_percentage, 1)
+                'btts_percentage': round(btts_percentage, 1),
+                'goal_total_distribution': {
+                    (f'{goals}+' if goals == len(summary['goal_histogram']) - 1 else str(goals)): count
+                    for goals, count in enumerate(summary['goal_histogram'])
+                }
             },
             'identified_patterns': patterns,
             'market_opportunities': {
@@ -1,6 +1,6 @@
 import numpy as np
 from datetime import datetime, timedelta
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional
 from src.models.football import Match, Team, TeamStats
 import math
 
@@ -25,24 +25,30 @@ class AdvancedStatsCalculator:
             opponent_rating = match.get('opponent_rating', 1500)
             
             # Calcular resultado esperado
-            expected_score = 1 / (1 + 10**((opponent_rating - current_rating) / 400))
+            expected_score = AdvancedStatsCalculator.elo_expected_score(current_rating, opponent_rating)
             
             # Determinar resultado real
-            goals_for = match['goals_for']
-            goals_against = match['goals_against']
-            
-            if goals_for > goals_against:
-                actual_score = 1.0  # Vitória
-            elif goals_for == goals_against:
-                actual_score = 0.5  # Empate
-            else:
-                actual_score = 0.0  # Derrota
+            actual_score = AdvancedStatsCalculator.elo_actual_score(match['goals_for'], match['goals_against'])
             
             # Atualizar rating
             current_rating += k_factor * (actual_score - expected_score)
         
         return current_rating
     
+    @staticmethod
+    def elo_expected_score(rating: float, opponent_rating: float) -> float:
+        """Resultado esperado de uma equipa contra um adversário (fórmula ELO)"""
+        return 1 / (1 + 10**((opponent_rating - rating) / 400))
+    
+    @staticmethod
+    def elo_actual_score(goals_for: int, goals_against: int) -> float:
+        """Converte o resultado de um jogo em pontuação ELO (1 / 0.5 / 0)"""
+        if goals_for > goals_against:
+            return 1.0  # Vitória
+        elif goals_for == goals_against:
+            return 0.5  # Empate
+        return 0.0  # Derrota
+    
     @staticmethod
     def calculate_form_index(recent_matches: List[Dict], weight_decay: float = 0.9) -> float:
         """
@@ -212,6 +218,149 @@ class AdvancedStatsCalculator:
             'away': calculate_performance(away_matches)
         }
 
+class BatchStatsCalculator:
+    """
+    Versões vetorizadas (NumPy) das métricas do AdvancedStatsCalculator
+    Recebem um array por coluna com uma linha por participação de equipa
+    numa partida (team_idx, golos marcados/sofridos, casa/fora, finalizado,
+    data) e devolvem todas as métricas de todas as equipas numa só passagem.
+    Os resultados coincidem com as funções por equipa.
+    """
+    
+    @staticmethod
+    def calculate_team_metrics(team_idx: np.ndarray, goals_for: np.ndarray, goals_against: np.ndarray,
+                               is_home: np.ndarray, finished: np.ndarray, match_date: np.ndarray,
+                               n_teams: int, form_window: int = 10,
+                               weight_decay: float = 0.9) -> Dict[str, np.ndarray]:
+        """
+        Calcula forma, eficiência ofensiva, solidez defensiva e performance
+        casa/fora para n_teams equipas. match_date pode ser datetime64 ou
+        inteiro; empates na data mantêm a ordem de entrada (como sorted()).
+        """
+        team_idx = np.asarray(team_idx, dtype=np.int64)
+        goals_for = np.asarray(goals_for, dtype=np.float64)
+        goals_against = np.asarray(goals_against, dtype=np.float64)
+        is_home = np.asarray(is_home, dtype=bool)
+        finished = np.asarray(finished, dtype=bool)
+        dates = np.asarray(match_date).astype('datetime64[us]').astype(np.int64)
+        
+        def per_team(weights):
+            return np.bincount(team_idx, weights=weights, minlength=n_teams)
+        
+        total = per_team(None)
+        played = per_team(finished)
+        win = finished & (goals_for > goals_against)
+        draw = finished & (goals_for == goals_against)
+        loss = finished & (goals_for < goals_against)
+        
+        # Índice de forma: rank por data (mais recente primeiro) dentro de cada equipa
+        order = np.lexsort((np.arange(len(team_idx)), -dates, team_idx))
+        sorted_teams = team_idx[order]
+        group_start = np.searchsorted(sorted_teams, sorted_teams, side='left')
+        rank = np.empty(len(team_idx), dtype=np.int64)
+        rank[order] = np.arange(len(team_idx)) - group_start
+        
+        in_form = finished & (rank < form_window)
+        weight = np.where(in_form, weight_decay ** rank, 0.0)
+        match_score = np.where(win, 1.0, np.where(draw, 0.5, 0.0))
+        match_score = match_score + np.where(win, np.minimum(0.2, np.abs(goals_for - goals_against) * 0.05), 0.0)
+        form_weight = per_team(weight)
+        form_score = per_team(match_score * weight)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            form_index = np.where(form_weight > 0, form_score / form_weight, 0.5)
+        
+        # Eficiência ofensiva e solidez defensiva
+        scored = per_team(np.where(finished, goals_for, 0.0))
+        conceded = per_team(np.where(finished, goals_against, 0.0))
+        clean_sheets = per_team(finished & (goals_against == 0))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            goals_per_match = np.where(played > 0, scored / played, 0.0)
+            goals_conceded_per_match = np.where(played > 0, conceded / played, 0.0)
+            clean_sheets_ratio = np.where(played > 0, clean_sheets / played, 0.0)
+        
+        metrics = {
+            'matches_played': played.astype(np.int64),
+            'form_index': form_index,
+            'goals_per_match': goals_per_match,
+            'shots_conversion': np.minimum(0.3, goals_per_match * 0.15),
+            'attacking_third_entries': goals_per_match * 8,
+            'goals_conceded_per_match': goals_conceded_per_match,
+            'clean_sheets_ratio': clean_sheets_ratio,
+            'defensive_actions': np.where(total > 0, np.maximum(0, 20 - goals_conceded_per_match * 5), 0.0)
+        }
+        
+        # Performance em casa vs fora
+        for side, side_mask in (('home', is_home), ('away', ~is_home)):
+            wins = per_team(win & side_mask)
+            draws = per_team(draw & side_mask)
+            losses = per_team(loss & side_mask)
+            side_played = wins + draws + losses
+            with np.errstate(divide='ignore', invalid='ignore'):
+                points_per_match = np.where(side_played > 0, (wins * 3 + draws) / side_played, 0.0)
+            metrics[f'{side}_wins'] = wins.astype(np.int64)
+            metrics[f'{side}_draws'] = draws.astype(np.int64)
+            metrics[f'{side}_losses'] = losses.astype(np.int64)
+            metrics[f'{side}_goals_for'] = per_team(np.where(finished & side_mask, goals_for, 0.0)).astype(np.int64)
+            metrics[f'{side}_goals_against'] = per_team(np.where(finished & side_mask, goals_against, 0.0)).astype(np.int64)
+            metrics[f'{side}_points_per_match'] = points_per_match
+        
+        return metrics
+    
+    @staticmethod
+    def calculate_from_store(store, rows: Optional[np.ndarray] = None) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """Calcula as métricas de todas as equipas presentes nas partidas `rows` do MatchStore"""
+        data = store.appearances(rows)
+        metrics = BatchStatsCalculator.calculate_team_metrics(
+            data['team_idx'], data['goals_for'], data['goals_against'], data['is_home'],
+            data['finished'], data['match_date'], n_teams=len(data['team_ids'])
+        )
+        return data['team_ids'], metrics
+    
+    @staticmethod
+    def team_metrics_from_store(store, team_id: int) -> Dict:
+        """Métricas de uma única equipa a partir do seu slice no MatchStore"""
+        team_ids, metrics = BatchStatsCalculator.calculate_from_store(store, store.team_indices(team_id))
+        position = np.flatnonzero(team_ids == team_id)
+        if len(position) == 0:
+            # Sem partidas: mesmos valores por omissão das funções por equipa
+            metrics = BatchStatsCalculator.calculate_team_metrics(
+                [], [], [], [], [], np.empty(0, dtype='datetime64[us]'), n_teams=1
+            )
+            return BatchStatsCalculator.team_metrics_dict(metrics, 0)
+        return BatchStatsCalculator.team_metrics_dict(metrics, int(position[0]))
+    
+    @staticmethod
+    def team_metrics_dict(metrics: Dict[str, np.ndarray], i: int) -> Dict:
+        """Extrai as métricas de uma equipa no formato das funções por equipa"""
+        def side(name):
+            return {
+                'wins': int(metrics[f'{name}_wins'][i]),
+                'draws': int(metrics[f'{name}_draws'][i]),
+                'losses': int(metrics[f'{name}_losses'][i]),
+                'goals_for': int(metrics[f'{name}_goals_for'][i]),
+                'goals_against': int(metrics[f'{name}_goals_against'][i]),
+                'points_per_match': float(metrics[f'{name}_points_per_match'][i])
+            }
+        
+        return {
+            'matches_played': int(metrics['matches_played'][i]),
+            'form_index': float(metrics['form_index'][i]),
+            'attacking_efficiency': {
+                'goals_per_match': float(metrics['goals_per_match'][i]),
+                'shots_conversion': float(metrics['shots_conversion'][i]),
+                'attacking_third_entries': float(metrics['attacking_third_entries'][i])
+            },
+            'defensive_solidity': {
+                'goals_conceded_per_match': float(metrics['goals_conceded_per_match'][i]),
+                'clean_sheets_ratio': float(metrics['clean_sheets_ratio'][i]),
+                'defensive_actions': float(metrics['defensive_actions'][i])
+            },
+            'home_away_performance': {
+                'home': side('home'),
+                'away': side('away')
+            }
+        }
+
 class PredictionEngine:
     """Motor de previsões avançado"""
     
@@ -296,8 +445,13 @@ class PredictionEngine:
         return sorted(value_bets, key=lambda x: x['expected_value'], reverse=True)
     
     def generate_comprehensive_analysis(self, home_team_id: int, away_team_id: int, 
-                                     all_matches: List[Dict]) -> Dict:
-        """Gera análise completa de uma partida"""
+                                     all_matches: List[Dict],
+                                     ratings: Optional[Dict[int, float]] = None) -> Dict:
+        """
+        Gera análise completa de uma partida
+        Se `ratings` for fornecido (ex.: EloRatingEngine), usa esses ratings ELO
+        em vez de os recalcular a partir do histórico
+        """
         
         # Filtrar jogos de cada equipa
         home_matches = [m for m in all_matches if m['home_team_id'] == home_team_id or m['away_team_id'] == home_team_id]
@@ -320,39 +474,100 @@ class PredictionEngine:
         home_prepared = prepare_match_data(home_matches, home_team_id)
         away_prepared = prepare_match_data(away_matches, away_team_id)
         
-        # Calcular métricas avançadas
-        home_elo = self.stats_calculator.calculate_elo_rating(home_prepared[-20:])  # Últimos 20 jogos
-        away_elo = self.stats_calculator.calculate_elo_rating(away_prepared[-20:])
+        h2h_record = self.stats_calculator.calculate_head_to_head_record(home_team_id, away_team_id, all_matches)
         
-        home_form = self.stats_calculator.calculate_form_index(home_prepared[-10:])  # Últimos 10 jogos
-        away_form = self.stats_calculator.calculate_form_index(away_prepared[-10:])
+        return self._analyze_prepared_matches(home_team_id, away_team_id, home_prepared, away_prepared,
+                                              h2h_record, ratings)
+    
+    def generate_analysis_from_store(self, home_team_id: int, away_team_id: int, store,
+                                     ratings: Optional[Dict[int, float]] = None,
+                                     h2h_index=None) -> Dict:
+        """
+        Gera a mesma análise que generate_comprehensive_analysis, lendo o
+        histórico de cada equipa diretamente do MatchStore colunar
+        Com `h2h_index` (HeadToHeadIndex) o confronto direto é uma consulta O(1)
+        """
+        home_prepared = store.team_matches(home_team_id)
+        away_prepared = store.team_matches(away_team_id)
         
-        home_attack = self.stats_calculator.calculate_attacking_efficiency(home_prepared)
-        away_attack = self.stats_calculator.calculate_attacking_efficiency(away_prepared)
+        if h2h_index is not None:
+            h2h_record = h2h_index.get_record(home_team_id, away_team_id)
+        else:
+            h2h_matches = store.match_dicts(store.head_to_head_indices(home_team_id, away_team_id))
+            h2h_record = self.stats_calculator.calculate_head_to_head_record(home_team_id, away_team_id, h2h_matches)
         
-        home_defense = self.stats_calculator.calculate_defensive_solidity(home_prepared)
-        away_defense = self.stats_calculator.calculate_defensive_solidity(away_prepared)
+        return self._analyze_prepared_matches(home_team_id, away_team_id, home_prepared, away_prepared,
+                                              h2h_record, ratings)
+    
+    def generate_batch_analysis_from_store(self, pairings: List[Tuple[int, int]], store,
+                                           ratings: Optional[Dict[int, float]] = None,
+                                           h2h_index=None) -> List[Dict]:
+        """
+        Análise de várias partidas de uma vez (ex.: uma jornada)
+        As métricas de cada equipa distinta são calculadas uma única vez, mesmo
+        que a equipa apareça em vários confrontos; cada confronto só acrescenta
+        o histórico direto e as probabilidades
+        """
+        teams = {team_id for pairing in pairings for team_id in pairing}
+        team_analyses = {
+            team_id: self._team_analysis(team_id, store.team_matches(team_id), ratings)
+            for team_id in teams
+        }
         
-        home_performance = self.stats_calculator.calculate_home_away_performance(home_prepared)
-        away_performance = self.stats_calculator.calculate_home_away_performance(away_prepared)
+        analyses = []
+        for home_team_id, away_team_id in pairings:
+            if h2h_index is not None:
+                h2h_record = h2h_index.get_record(home_team_id, away_team_id)
+            else:
+                h2h_matches = store.match_dicts(store.head_to_head_indices(home_team_id, away_team_id))
+                h2h_record = self.stats_calculator.calculate_head_to_head_record(home_team_id, away_team_id, h2h_matches)
+            analyses.append(self._analyze_pairing(team_analyses[home_team_id], team_analyses[away_team_id], h2h_record))
+        return analyses
+    
+    def _team_analysis(self, team_id: int, prepared: List[Dict],
+                       ratings: Optional[Dict[int, float]] = None) -> Dict:
+        """Métricas de uma equipa (independentes do adversário)"""
+        if ratings and team_id in ratings:
+            elo = ratings[team_id]
+        else:
+            elo = self.stats_calculator.calculate_elo_rating(prepared[-20:])  # Últimos 20 jogos
         
-        h2h_record = self.stats_calculator.calculate_head_to_head_record(home_team_id, away_team_id, all_matches)
+        return {
+            'elo_rating': elo,
+            'form_index': self.stats_calculator.calculate_form_index(prepared[-10:]),  # Últimos 10 jogos
+            'attacking_efficiency': self.stats_calculator.calculate_attacking_efficiency(prepared),
+            'defensive_solidity': self.stats_calculator.calculate_defensive_solidity(prepared),
+            'performance': self.stats_calculator.calculate_home_away_performance(prepared)
+        }
+    
+    def _analyze_prepared_matches(self, home_team_id: int, away_team_id: int,
+                                  home_prepared: List[Dict], away_prepared: List[Dict],
+                                  h2h_record: Dict, ratings: Optional[Dict[int, float]] = None) -> Dict:
+        """Calcula métricas, probabilidades e apostas de valor a partir dos jogos preparados"""
+        return self._analyze_pairing(
+            self._team_analysis(home_team_id, home_prepared, ratings),
+            self._team_analysis(away_team_id, away_prepared, ratings),
+            h2h_record
+        )
+    
+    def _analyze_pairing(self, home_analysis: Dict, away_analysis: Dict, h2h_record: Dict) -> Dict:
+        """Probabilidades e apostas de valor de um confronto a partir das métricas das duas equipas"""
         
         # Dados das equipas para previsão
         home_team_data = {
-            'elo_rating': home_elo,
-            'form_index': home_form,
-            'attacking_efficiency': home_attack,
-            'defensive_solidity': home_defense,
-            'home_performance': home_performance['home']
+            'elo_rating': home_analysis['elo_rating'],
+            'form_index': home_analysis['form_index'],
+            'attacking_efficiency': home_analysis['attacking_efficiency'],
+            'defensive_solidity': home_analysis['defensive_solidity'],
+            'home_performance': home_analysis['performance']['home']
         }
         
         away_team_data = {
-            'elo_rating': away_elo,
-            'form_index': away_form,
-            'attacking_efficiency': away_attack,
-            'defensive_solidity': away_defense,
-            'away_performance': away_performance['away']
+            'elo_rating': away_analysis['elo_rating'],
+            'form_index': away_analysis['form_index'],
+            'attacking_efficiency': away_analysis['attacking_efficiency'],
+            'defensive_solidity': away_analysis['defensive_solidity'],
+            'away_performance': away_analysis['performance']['away']
         }
         
         # Calcular probabilidades
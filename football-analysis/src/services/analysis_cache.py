@@ -0,0 +1,151 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+from src.services.data_version import DataVersion, data_version
+
+class CachedAnalysis:
+    """Resultado de uma análise, com a versão dos dados em que foi calculado"""
+    
+    __slots__ = ('value', 'version', 'stored_at', 'size')
+    
+    def __init__(self, value: Any, version: int, size: int):
+        self.value = value
+        self.version = version
+        self.stored_at = time.time()
+        self.size = size
+
+class _Flight:
+    """Cálculo em curso de uma chave; os pedidos iguais esperam pelo mesmo resultado"""
+    
+    __slots__ = ('done', 'value', 'error')
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+class AnalysisCache:
+    """
+    Memoização das análises de partidas (PredictionEngine) por (casa, fora)
+    Cada entrada guarda a versão dos dados em que foi calculada. Depois de
+    uma sincronização só é recalculada se uma das duas equipas mudou
+    (DataVersion.changed_teams); as restantes continuam válidas na nova
+    versão. Entradas LRU com TTL e limite de bytes (tamanho do JSON).
+    Pedidos simultâneos para o mesmo confronto são agrupados: um calcula,
+    os outros esperam pelo seu resultado.
+    """
+    
+    def __init__(self, version: DataVersion, ttl: float = 600, max_bytes: int = 16 * 1024 * 1024):
+        self.version = version
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[Tuple[int, int], CachedAnalysis]' = OrderedDict()
+        self._inflight: Dict[Tuple[int, int], _Flight] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'coalesced': 0, 'revalidated': 0,
+                       'stale': 0, 'expired': 0, 'evictions': 0}
+    
+    def get_or_compute(self, home_team_id: int, away_team_id: int, compute: Callable[[], Any]) -> Any:
+        """Análise em cache ou calculada por compute() (uma só vez para pedidos simultâneos)"""
+        key = (home_team_id, away_team_id)
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is not None:
+                return entry.value
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+                version = self.version.current
+            else:
+                self._stats['coalesced'] += 1
+        
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+        
+        try:
+            flight.value = compute()
+            self.put(home_team_id, away_team_id, flight.value, version)
+            return flight.value
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.done.set()
+    
+    def get(self, home_team_id: int, away_team_id: int) -> Optional[Any]:
+        """Análise em cache (None se não existir ou já não for válida)"""
+        with self._lock:
+            entry = self._lookup((home_team_id, away_team_id))
+        return entry.value if entry is not None else None
+    
+    def put(self, home_team_id: int, away_team_id: int, value: Any, version: Optional[int] = None):
+        """Guarda uma análise calculada com os dados da versão `version` (por omissão a atual)"""
+        size = len(json.dumps(value, default=str))
+        if size > self.max_bytes:
+            return
+        key = (home_team_id, away_team_id)
+        entry = CachedAnalysis(value, self.version.current if version is None else version, size)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._stats['evictions'] += 1
+    
+    def _lookup(self, key: Tuple[int, int]) -> Optional[CachedAnalysis]:
+        """Entrada válida para a versão atual (com o lock adquirido); conta hit/miss"""
+        entry = self._entries.get(key)
+        if entry is not None and time.time() - entry.stored_at >= self.ttl:
+            self._remove(key)
+            self._stats['expired'] += 1
+            entry = None
+        
+        current = self.version.current
+        if entry is not None and entry.version != current:
+            changed = self.version.changed_teams(entry.version)
+            if changed is None or key[0] in changed or key[1] in changed:
+                self._remove(key)
+                self._stats['stale'] += 1
+                entry = None
+            else:
+                # Nenhuma das equipas mudou: a análise continua válida na nova versão
+                entry.version = current
+                self._stats['revalidated'] += 1
+        
+        if entry is None:
+            self._stats['misses'] += 1
+            return None
+        self._entries.move_to_end(key)
+        self._stats['hits'] += 1
+        return entry
+    
+    def _remove(self, key: Tuple[int, int]):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+    
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats, entries=len(self._entries), bytes=self._bytes, max_bytes=self.max_bytes,
+                         inflight=len(self._inflight), ttl=self.ttl)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        return stats
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+# Cache partilhado pelas rotas de análise
+analysis_cache = AnalysisCache(data_version)
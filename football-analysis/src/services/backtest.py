@@ -0,0 +1,273 @@
+import numpy as np
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+from src.services.advanced_analytics import AdvancedStatsCalculator
+from src.services.match_store import MatchStore, FINISHED, match_store
+from src.services.odds_125_system import OddsTargetSystem, BettingStrategy
+
+# Faixas de confiança para a calibração (limite inferior, limite superior)
+CALIBRATION_BUCKETS = ((0.80, 0.85), (0.85, 0.90), (0.90, 0.95), (0.95, 1.01))
+
+def settle_bet(bet_type: str, home_score: int, away_score: int) -> Optional[bool]:
+    """Resultado de uma aposta face ao marcador final (None se o mercado for desconhecido)"""
+    total_goals = home_score + away_score
+    outcomes = {
+        'home_win': home_score > away_score,
+        'draw': home_score == away_score,
+        'away_win': home_score < away_score,
+        'home_or_draw': home_score >= away_score,
+        'away_or_draw': home_score <= away_score,
+        'home_or_away': home_score != away_score,
+        'both_teams_score': home_score > 0 and away_score > 0,
+        'no_both_teams_score': home_score == 0 or away_score == 0
+    }
+    if bet_type in outcomes:
+        return outcomes[bet_type]
+    if bet_type.startswith('over_'):
+        return total_goals > float(bet_type[5:])
+    if bet_type.startswith('under_'):
+        return total_goals < float(bet_type[6:])
+    return None
+
+class TeamHistory:
+    """Estado de uma equipa construído só com as partidas já disputadas"""
+    
+    __slots__ = ('played', 'wins', 'goals_for', 'goals_against', 'elo_rating', 'recent')
+    
+    def __init__(self, initial_rating: float, form_window: int):
+        self.played = 0
+        self.wins = 0
+        self.goals_for = 0
+        self.goals_against = 0
+        self.elo_rating = initial_rating
+        self.recent = deque(maxlen=form_window)
+    
+    def features(self) -> Dict:
+        """Dados da equipa no formato esperado pelo OddsTargetSystem"""
+        played = max(1, self.played)
+        return {
+            'elo_rating': self.elo_rating,
+            'goals_per_match': self.goals_for / played,
+            'goals_conceded_per_match': self.goals_against / played,
+            'win_percentage': self.wins / played * 100,
+            'form_index': AdvancedStatsCalculator.calculate_form_index(list(self.recent))
+        }
+
+def _backtest_season(season: Dict, bankroll: float, min_history: int,
+                     k_factor: float, initial_rating: float, form_window: int) -> Dict:
+    """
+    Reproduz uma época dia a dia: as features de cada dia usam apenas as
+    partidas de dias anteriores, as apostas do dia são liquidadas com os
+    marcadores reais e só depois as partidas atualizam o histórico.
+    Função de módulo para poder correr num ProcessPoolExecutor.
+    """
+    odds_system = OddsTargetSystem()
+    strategy = BettingStrategy()
+    teams: Dict[int, TeamHistory] = {}
+    settled = []
+    current_bankroll = bankroll
+    
+    def history(team_id):
+        if team_id not in teams:
+            teams[team_id] = TeamHistory(initial_rating, form_window)
+        return teams[team_id]
+    
+    days = season['day']
+    boundaries = np.flatnonzero(np.diff(days)) + 1
+    for start, end in zip(np.concatenate([[0], boundaries]), np.concatenate([boundaries, [len(days)]])):
+        day_matches = [
+            {
+                'home_team_id': season['home_id'][i],
+                'away_team_id': season['away_id'][i],
+                'match_date': season['match_date'][i],
+                'home_score': season['home_score'][i],
+                'away_score': season['away_score'][i]
+            }
+            for i in range(start, end)
+        ]
+        
+        # Features com a informação disponível antes do dia
+        teams_data = {}
+        for match in day_matches:
+            for team_id in (match['home_team_id'], match['away_team_id']):
+                team = teams.get(team_id)
+                if team is not None and team.played >= min_history:
+                    teams_data[team_id] = team.features()
+        
+        bets = odds_system.find_high_confidence_bets(day_matches, teams_data)
+        recommendations = strategy.generate_daily_recommendations(bets, current_bankroll)
+        
+        # Cada recomendação identifica a partida; a aposta dá a data e a confiança sem arredondar
+        scores = {(m['home_team_id'], m['away_team_id']): (m['home_score'], m['away_score']) for m in day_matches}
+        bets_by_fixture = {(bet['home_team_id'], bet['away_team_id']): bet for bet in bets}
+        for recommendation in recommendations['recommendations']:
+            fixture = (recommendation['home_team_id'], recommendation['away_team_id'])
+            bet = bets_by_fixture[fixture]
+            home_score, away_score = scores[fixture]
+            won = settle_bet(recommendation['bet_type'], home_score, away_score)
+            if won is None:
+                continue
+            stake = recommendation['stake']
+            profit = stake * (strategy.target_odds - 1) if won else -stake
+            current_bankroll += profit
+            settled.append({
+                'match_date': bet['match_date'],
+                'home_team_id': bet['home_team_id'],
+                'away_team_id': bet['away_team_id'],
+                'bet_type': recommendation['bet_type'],
+                'confidence': bet['confidence'],
+                'stake': stake,
+                'won': won,
+                'profit': profit,
+                'bankroll': current_bankroll
+            })
+        
+        # Só agora as partidas do dia entram no histórico
+        for match in day_matches:
+            home = history(match['home_team_id'])
+            away = history(match['away_team_id'])
+            home_score, away_score = match['home_score'], match['away_score']
+            
+            expected_home = AdvancedStatsCalculator.elo_expected_score(home.elo_rating, away.elo_rating)
+            delta = k_factor * (AdvancedStatsCalculator.elo_actual_score(home_score, away_score) - expected_home)
+            home.elo_rating += delta
+            away.elo_rating -= delta
+            
+            for team, goals_for, goals_against in ((home, home_score, away_score), (away, away_score, home_score)):
+                team.played += 1
+                team.wins += goals_for > goals_against
+                team.goals_for += goals_for
+                team.goals_against += goals_against
+                team.recent.append({
+                    'goals_for': goals_for,
+                    'goals_against': goals_against,
+                    'status': 'finalizado',
+                    'match_date': match['match_date']
+                })
+    
+    return {
+        'championship_id': season['championship_id'],
+        'matches_replayed': len(days),
+        'days_replayed': len(boundaries) + 1 if len(days) else 0,
+        'bets': settled,
+        'report': BacktestEngine.report(settled, bankroll)
+    }
+
+class BacktestEngine:
+    """
+    Backtest walk-forward do OddsTargetSystem + BettingStrategy
+    Usa as partidas finalizadas do MatchStore, agrupadas por campeonato
+    (época). Cada época é reproduzida de forma independente, pelo que as
+    épocas podem correr em paralelo num ProcessPoolExecutor.
+    """
+    
+    def __init__(self, store: MatchStore, min_history: int = 3, k_factor: float = 32,
+                 initial_rating: float = 1500, form_window: int = 10):
+        self.store = store
+        self.min_history = min_history
+        self.k_factor = k_factor
+        self.initial_rating = initial_rating
+        self.form_window = form_window
+    
+    def seasons(self, championship_ids: Optional[List[int]] = None) -> List[Dict]:
+        """Partidas finalizadas de cada campeonato, por ordem cronológica, em listas simples"""
+        columns = self.store.columns()
+        mask = (columns.status == FINISHED) & ~np.isnat(columns.match_date)
+        if championship_ids:
+            mask &= np.isin(columns.championship_id, championship_ids)
+        rows = np.flatnonzero(mask)  # O snapshot já está ordenado por data
+        
+        seasons = []
+        for championship_id in np.unique(columns.championship_id[rows]).tolist():
+            idx = rows[columns.championship_id[rows] == championship_id]
+            seasons.append({
+                'championship_id': championship_id,
+                'day': columns.match_date[idx].astype('datetime64[D]').astype(np.int64),
+                'home_id': columns.home_id[idx].tolist(),
+                'away_id': columns.away_id[idx].tolist(),
+                'home_score': columns.home_score[idx].tolist(),
+                'away_score': columns.away_score[idx].tolist(),
+                'match_date': columns.match_date[idx].tolist()
+            })
+        return seasons
+    
+    def run(self, championship_ids: Optional[List[int]] = None, bankroll: float = 1000,
+            workers: int = 0) -> Dict:
+        """Backtest de todas as épocas (ou das indicadas), em paralelo se workers > 1"""
+        seasons = self.seasons(championship_ids)
+        arguments = (bankroll, self.min_history, self.k_factor, self.initial_rating, self.form_window)
+        
+        if workers and workers > 1 and len(seasons) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(_backtest_season, season, *arguments) for season in seasons]
+                results = [future.result() for future in futures]
+        else:
+            results = [_backtest_season(season, *arguments) for season in seasons]
+        
+        all_bets = sorted(
+            (bet for result in results for bet in result['bets']),
+            key=lambda bet: bet['match_date']
+        )
+        return {
+            'seasons': [
+                {key: value for key, value in result.items() if key != 'bets'}
+                for result in results
+            ],
+            'overall': self.report(all_bets, bankroll * max(1, len(results))),
+            'bets': all_bets
+        }
+    
+    @staticmethod
+    def report(bets: List[Dict], bankroll: float) -> Dict:
+        """Taxa de acerto, ROI, drawdown máximo, calibração e desempenho por mercado"""
+        if not bets:
+            return {'total_bets': 0, 'wins': 0, 'hit_rate': 0, 'total_staked': 0, 'profit_loss': 0,
+                    'roi': 0, 'max_drawdown': 0, 'brier_score': None, 'calibration': [], 'by_bet_type': {}}
+        
+        won = np.array([bet['won'] for bet in bets], dtype=np.float64)
+        confidence = np.array([bet['confidence'] for bet in bets])
+        stake = np.array([bet['stake'] for bet in bets])
+        profit = np.array([bet['profit'] for bet in bets])
+        
+        # Drawdown máximo da curva de bankroll (percentagem do pico)
+        curve = bankroll + np.cumsum(profit)
+        peaks = np.maximum.accumulate(np.concatenate([[bankroll], curve]))[1:]
+        max_drawdown = float(((peaks - curve) / peaks).max()) if len(curve) else 0.0
+        
+        calibration = []
+        for low, high in CALIBRATION_BUCKETS:
+            in_bucket = (confidence >= low) & (confidence < high)
+            if in_bucket.any():
+                calibration.append({
+                    'confidence_range': f'{int(low * 100)}-{min(100, int(high * 100))}%',
+                    'bets': int(in_bucket.sum()),
+                    'predicted_win_rate': round(float(confidence[in_bucket].mean()) * 100, 2),
+                    'actual_win_rate': round(float(won[in_bucket].mean()) * 100, 2)
+                })
+        
+        by_bet_type = {}
+        for bet in bets:
+            entry = by_bet_type.setdefault(bet['bet_type'], {'bets': 0, 'wins': 0, 'profit_loss': 0.0})
+            entry['bets'] += 1
+            entry['wins'] += int(bet['won'])
+            entry['profit_loss'] += bet['profit']
+        for entry in by_bet_type.values():
+            entry['hit_rate'] = round(entry['wins'] / entry['bets'] * 100, 2)
+            entry['profit_loss'] = round(entry['profit_loss'], 2)
+        
+        return {
+            'total_bets': len(bets),
+            'wins': int(won.sum()),
+            'hit_rate': round(float(won.mean()) * 100, 2),
+            'total_staked': round(float(stake.sum()), 2),
+            'profit_loss': round(float(profit.sum()), 2),
+            'roi': round(float(profit.sum() / stake.sum()) * 100, 2),
+            'max_drawdown': round(max_drawdown * 100, 2),
+            'brier_score': round(float(np.mean((confidence - won) ** 2)), 4),
+            'calibration': calibration,
+            'by_bet_type': by_bet_type
+        }
+
+# Instância partilhada pelas rotas
+backtest_engine = BacktestEngine(match_store)
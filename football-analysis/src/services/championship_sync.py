@@ -0,0 +1,160 @@
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, List, Tuple
+from sqlalchemy import or_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from src.models.football import db, Team, Match
+from src.services.data_version import data_version
+from src.services.football_api import DataProcessor
+
+class PhaseTimer:
+    """Mede o tempo (ms) de cada fase de um processo"""
+    
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+        self._started = time.perf_counter()
+    
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = round((time.perf_counter() - start) * 1000, 2)
+    
+    def summary(self) -> Dict[str, float]:
+        """Tempos por fase mais o total desde a criação"""
+        timings = dict(self.timings)
+        timings['total'] = round((time.perf_counter() - self._started) * 1000, 2)
+        return timings
+
+class ChampionshipSync:
+    """
+    Ingestão em bloco dos dados de um campeonato
+    Recolhe todas as equipas e partidas do payload, obtém os api_id já
+    existentes numa query por tabela e grava tudo com
+    INSERT ... ON CONFLICT DO UPDATE (SQLite) em lotes.
+    """
+    
+    BATCH_SIZE = 500
+    
+    TEAM_UPDATE_COLUMNS = ['name', 'popular_name', 'abbreviation', 'logo_url']
+    MATCH_UPDATE_COLUMNS = ['home_team_id', 'away_team_id', 'home_score', 'away_score', 'status',
+                            'match_date', 'championship_id', 'championship_name']
+    
+    @staticmethod
+    def iter_matches(championship_data: Dict) -> Iterator[Dict]:
+        """Percorre a estrutura aninhada partidas -> fase -> chave -> jogo"""
+        partidas = championship_data.get('partidas', {})
+        
+        for fase_name, fase_data in partidas.items():
+            if not isinstance(fase_data, dict):
+                continue
+            for chave_name, chave_data in fase_data.items():
+                if not isinstance(chave_data, dict):
+                    continue
+                for tipo_jogo, jogo_data in chave_data.items():
+                    if isinstance(jogo_data, dict) and 'partida_id' in jogo_data:
+                        yield jogo_data
+    
+    @staticmethod
+    def collect(championship_data: Dict, championship_id: int) -> Tuple[Dict[int, Dict], Dict[int, Dict], int]:
+        """Extrai equipas e partidas (únicas por api_id) do payload da API"""
+        championship_name = championship_data.get('campeonato', {}).get('nome', '')
+        teams = {}
+        matches = {}
+        skipped = 0
+        
+        for jogo_data in ChampionshipSync.iter_matches(championship_data):
+            for side in ('time_mandante', 'time_visitante'):
+                side_data = jogo_data.get(side, {})
+                if side_data:
+                    team_data = DataProcessor.process_team_data(side_data)
+                    if team_data['api_id']:
+                        teams[team_data['api_id']] = team_data
+            
+            match_data = DataProcessor.process_match_data(jogo_data)
+            match_data['championship_id'] = championship_id
+            match_data['championship_name'] = championship_name
+            
+            if not match_data['api_id']:
+                continue
+            if not (match_data['home_team_id'] and match_data['away_team_id'] and match_data['match_date']):
+                skipped += 1
+                continue
+            matches[match_data['api_id']] = match_data
+        
+        return teams, matches, skipped
+    
+    @staticmethod
+    def sync(championship_data: Dict, championship_id: int, timer: PhaseTimer = None) -> Dict:
+        """Grava as equipas e partidas do campeonato e devolve contagens e tempos"""
+        timer = timer or PhaseTimer()
+        
+        with timer.phase('parse'):
+            teams, matches, skipped = ChampionshipSync.collect(championship_data, championship_id)
+        
+        with timer.phase('prefetch'):
+            existing_teams = ChampionshipSync._existing_api_ids(Team, list(teams))
+            existing_matches = ChampionshipSync._existing_api_ids(Match, list(matches))
+        
+        now = datetime.utcnow()
+        
+        with timer.phase('teams_upsert'):
+            team_rows = [dict(team, created_at=now) for team in teams.values()]
+            teams_written = ChampionshipSync._upsert(Team, team_rows, ChampionshipSync.TEAM_UPDATE_COLUMNS)
+        
+        with timer.phase('matches_upsert'):
+            match_rows = [dict(match, created_at=now, updated_at=now) for match in matches.values()]
+            matches_written = ChampionshipSync._upsert(Match, match_rows, ChampionshipSync.MATCH_UPDATE_COLUMNS,
+                                                       touch_columns=['updated_at'])
+        
+        with timer.phase('commit'):
+            data_version.bump('sync-championship', teams)
+            db.session.commit()
+        
+        teams_new = len(set(teams) - existing_teams)
+        matches_new = len(set(matches) - existing_matches)
+        
+        return {
+            'teams_synced': teams_new,
+            'teams_updated': max(0, teams_written - teams_new),
+            'matches_synced': matches_new,
+            'matches_updated': max(0, matches_written - matches_new),
+            'matches_skipped': skipped,
+            'team_ids': list(teams),
+            'timings': timer.summary()
+        }
+    
+    @staticmethod
+    def _existing_api_ids(model, api_ids: List[int]) -> set:
+        """api_id já presentes na tabela (uma query)"""
+        if not api_ids:
+            return set()
+        rows = db.session.query(model.api_id).filter(model.api_id.in_(api_ids)).all()
+        return {row[0] for row in rows}
+    
+    @staticmethod
+    def _upsert(model, rows: List[Dict], update_columns: List[str], touch_columns: List[str] = ()) -> int:
+        """
+        INSERT ... ON CONFLICT(api_id) DO UPDATE em lotes
+        Só atualiza linhas cujos valores mudaram (touch_columns, ex. updated_at,
+        são escritas nessas linhas mas não contam como mudança); devolve o
+        número de linhas escritas
+        """
+        table = model.__table__
+        written = 0
+        
+        for start in range(0, len(rows), ChampionshipSync.BATCH_SIZE):
+            batch = rows[start:start + ChampionshipSync.BATCH_SIZE]
+            stmt = sqlite_insert(table).values(batch)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[table.c.api_id],
+                set_={column: stmt.excluded[column] for column in list(update_columns) + list(touch_columns)},
+                where=or_(*[table.c[column].is_distinct_from(stmt.excluded[column]) for column in update_columns])
+            )
+            result = db.session.execute(stmt)
+            written += max(0, result.rowcount or 0)
+        
+        return written
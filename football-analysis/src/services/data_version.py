@@ -0,0 +1,165 @@
+import json
+import os
+import socket
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Set
+from sqlalchemy import select
+from src.models.football import db, DataChange
+
+def process_origin() -> str:
+    """Identificador do processo atual (calculado a cada chamada: os workers podem ser forks)"""
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+class DataVersion:
+    """
+    Número de versão dos dados, partilhado pelos processos através da
+    tabela data_changes
+    Cada escrita (sincronização, recálculo de estatísticas, ratings, ao
+    vivo) insere uma linha na própria transação, com as equipas afetadas
+    (ou None = todas), para que os caches derivados só reconstruam o que
+    mudou desde a versão que têm. A versão atual é relida da base de dados
+    no máximo a cada `max_age` segundos; quando avança por escritas de
+    outro processo, correm os callbacks de on_external_change (estado em
+    memória como o MatchStore e os ratings ELO).
+    Cada alteração pertence a um namespace: 'data' para partidas,
+    estatísticas e ratings, outros (ex.: 'predictions') para escritas que
+    não mudam o que os caches das rotas leem; version_of(namespace) dá a
+    última versão de um namespace.
+    """
+    
+    DEFAULT_NAMESPACE = 'data'
+    
+    def __init__(self, max_history: int = 256, max_age: float = 1.0):
+        self.max_history = max_history
+        self.max_age = max_age
+        self._version = 0
+        self._changes: List[tuple] = []  # (versão, equipas afetadas ou None, motivo, data)
+        self._namespace_versions: Dict[str, int] = {}
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._listeners: List[Callable[[], object]] = []
+    
+    @property
+    def current(self) -> int:
+        if time.monotonic() - self._checked_at >= self.max_age:
+            self.sync()
+        return self._version
+    
+    def version_of(self, namespace: str = DEFAULT_NAMESPACE) -> int:
+        """Última versão com alterações no namespace (0 se nenhuma no histórico lido)"""
+        if time.monotonic() - self._checked_at >= self.max_age:
+            self.sync()
+        return self._namespace_versions.get(namespace, 0)
+    
+    def on_external_change(self, callback: Callable[[], object]):
+        """Regista um callback para quando outro processo altera os dados"""
+        self._listeners.append(callback)
+        return callback
+    
+    def bump(self, reason: str, team_ids: Optional[Iterable[int]] = None,
+             namespace: str = DEFAULT_NAMESPACE) -> int:
+        """
+        Nova versão na transação atual de db.session (fica visível no commit
+        de quem chama); team_ids=None indica que qualquer equipa pode ter mudado
+        """
+        change = DataChange(
+            reason=reason,
+            namespace=namespace,
+            team_ids=None if team_ids is None else json.dumps(sorted({int(team_id) for team_id in team_ids})),
+            origin=process_origin(),
+            created_at=datetime.utcnow()
+        )
+        db.session.add(change)
+        db.session.flush()
+        DataChange.query.filter(DataChange.id <= change.id - self.max_history).delete(synchronize_session=False)
+        
+        # A próxima leitura relê a base de dados (já com o commit)
+        self._checked_at = 0.0
+        return change.id
+    
+    def sync(self) -> int:
+        """Lê as versões confirmadas mais recentes; se vierem de outro processo, atualiza o estado derivado"""
+        if not self._sync_lock.acquire(blocking=False):
+            # Outra thread já está a sincronizar: usa a versão conhecida
+            return self._version
+        try:
+            rows = self._read_changes(self._version)
+            self._checked_at = time.monotonic()
+            if not rows:
+                return self._version
+            
+            # Só alterações dos dados de outro processo invalidam o estado em memória
+            origin = process_origin()
+            if any(row.origin != origin and (row.namespace or self.DEFAULT_NAMESPACE) == self.DEFAULT_NAMESPACE
+                   for row in rows):
+                for callback in self._listeners:
+                    callback()
+            
+            with self._lock:
+                if rows[0].id > self._version + 1:
+                    # Versões intermédias já apagadas da tabela: o histórico local deixa de as cobrir
+                    self._changes = []
+                for row in rows:
+                    team_ids = None if row.team_ids is None else frozenset(json.loads(row.team_ids))
+                    self._changes.append((row.id, team_ids, row.reason, row.created_at))
+                    self._namespace_versions[row.namespace or self.DEFAULT_NAMESPACE] = row.id
+                del self._changes[:-self.max_history]
+                self._version = rows[-1].id
+            return self._version
+        finally:
+            self._sync_lock.release()
+    
+    @staticmethod
+    def _read_changes(since: int) -> List:
+        """Linhas de data_changes depois de `since`, só as já confirmadas"""
+        query = select(
+            DataChange.id, DataChange.team_ids, DataChange.reason, DataChange.namespace, DataChange.origin,
+            DataChange.created_at
+        ).where(DataChange.id > since).order_by(DataChange.id)
+        
+        engine = db.engine
+        if engine.url.database in (None, '', ':memory:'):
+            # SQLite em memória tem uma única ligação (a da sessão)
+            return db.session.execute(query).all()
+        
+        # Ligação própria: não vê escritas ainda por confirmar na transação da sessão
+        with engine.connect() as connection:
+            return connection.execute(query).all()
+    
+    def changed_teams(self, since: int) -> Optional[Set[int]]:
+        """
+        Equipas alteradas depois da versão `since`
+        None se alguma alteração afetou todas as equipas ou se o histórico
+        já não cobre essa versão (reconstrução completa)
+        """
+        current = self.current
+        with self._lock:
+            if since >= current:
+                return set()
+            if not self._changes or self._changes[0][0] > since + 1:
+                return None
+            
+            changed = set()
+            for version, team_ids, _, _ in self._changes:
+                if version <= since:
+                    continue
+                if team_ids is None:
+                    return None
+                changed |= team_ids
+            return changed
+    
+    def stats(self) -> Dict:
+        version = self.current
+        with self._lock:
+            last = self._changes[-1] if self._changes else None
+        return {
+            'version': version,
+            'last_reason': last[2] if last else None,
+            'last_changed_at': last[3].isoformat() if last else None
+        }
+
+# Versão partilhada (o estado fica na tabela data_changes)
+data_version = DataVersion()
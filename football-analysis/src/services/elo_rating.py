@@ -0,0 +1,172 @@
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+from sqlalchemy import and_, or_
+from src.models.football import db, Match, TeamRating, RatingState
+from src.services.advanced_analytics import AdvancedStatsCalculator
+from src.services.data_version import data_version
+
+class EloRatingEngine:
+    """
+    Motor de ratings ELO para toda a liga
+    Processa cada partida finalizada uma única vez, por ordem cronológica,
+    usando o rating real do adversário. Os ratings e a última partida
+    processada ficam persistidos nas tabelas team_ratings / rating_state,
+    pelo que uma sincronização só aplica os resultados novos. Só update() e
+    rebuild() escrevem; as leituras usam os ratings já persistidos.
+    """
+    
+    def __init__(self, k_factor: float = 32, initial_rating: float = 1500):
+        self.k_factor = k_factor
+        self.initial_rating = initial_rating
+        self._ratings: Dict[int, float] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+    
+    def get_rating(self, team_id: int) -> float:
+        """Rating atual de uma equipa (api_id) - leitura O(1)"""
+        self._ensure_loaded()
+        return self._ratings.get(team_id, self.initial_rating)
+    
+    def get_ratings(self, team_ids: Optional[List[int]] = None) -> Dict[int, float]:
+        """Ratings de várias equipas (ou de todas, se team_ids for None)"""
+        self._ensure_loaded()
+        if team_ids is None:
+            return dict(self._ratings)
+        return {team_id: self._ratings.get(team_id, self.initial_rating) for team_id in team_ids}
+    
+    def update(self) -> Dict:
+        """
+        Aplica apenas as partidas finalizadas ainda não processadas
+        Se surgir uma partida finalizada anterior à última processada
+        (ex.: jogo adiado) ou se uma partida já processada mudou depois da
+        última atualização (ex.: correção do marcador), o histórico é
+        reprocessado por completo
+        """
+        with self._lock:
+            # Antes de ler as partidas: uma correção feita durante a atualização fica para a próxima
+            checked_at = datetime.utcnow()
+            state = RatingState.query.first()
+            if state is None or state.last_match_date is None:
+                return self._rebuild_locked(checked_at)
+            
+            processed = or_(
+                Match.match_date < state.last_match_date,
+                and_(Match.match_date == state.last_match_date, Match.id <= state.last_match_id)
+            )
+            corrected = state.updated_at is None or self._finished_matches_query().filter(
+                processed, Match.updated_at > state.updated_at
+            ).with_entities(Match.id).first() is not None
+            if corrected:
+                return self._rebuild_locked(checked_at)
+            
+            new_matches = self._finished_matches_query().filter(
+                or_(
+                    Match.match_date > state.last_match_date,
+                    and_(Match.match_date == state.last_match_date, Match.id > state.last_match_id)
+                )
+            ).all()
+            
+            total_finished = self._finished_matches_query().count()
+            if total_finished != (state.matches_processed or 0) + len(new_matches):
+                return self._rebuild_locked(checked_at)
+            
+            self._load_ratings()
+            self._apply_matches(new_matches, state, checked_at)
+            return {'mode': 'incremental', 'matches_processed': len(new_matches)}
+    
+    def rebuild(self) -> Dict:
+        """Recalcula todos os ratings a partir do zero"""
+        with self._lock:
+            return self._rebuild_locked(datetime.utcnow())
+    
+    def _rebuild_locked(self, checked_at: datetime) -> Dict:
+        TeamRating.query.delete()
+        state = RatingState.query.first()
+        if state is None:
+            state = RatingState()
+            db.session.add(state)
+        state.last_match_id = None
+        state.last_match_date = None
+        state.matches_processed = 0
+        
+        self._ratings = {}
+        matches = self._finished_matches_query().all()
+        self._apply_matches(matches, state, checked_at, rebuild=True)
+        return {'mode': 'rebuild', 'matches_processed': len(matches)}
+    
+    def _apply_matches(self, matches: List, state: RatingState, checked_at: datetime, rebuild: bool = False):
+        """
+        Atualiza os ratings em memória, por ordem cronológica, e persiste-os
+        state.updated_at fica com checked_at: partidas alteradas depois disso
+        são vistas pelo próximo update()
+        """
+        touched = {}
+        
+        for match in matches:
+            home_rating = self._ratings.get(match.home_team_id, self.initial_rating)
+            away_rating = self._ratings.get(match.away_team_id, self.initial_rating)
+            
+            expected_home = AdvancedStatsCalculator.elo_expected_score(home_rating, away_rating)
+            actual_home = AdvancedStatsCalculator.elo_actual_score(match.home_score or 0, match.away_score or 0)
+            delta = self.k_factor * (actual_home - expected_home)
+            
+            self._ratings[match.home_team_id] = home_rating + delta
+            self._ratings[match.away_team_id] = away_rating - delta
+            
+            for team_id in (match.home_team_id, match.away_team_id):
+                count, _ = touched.get(team_id, (0, None))
+                touched[team_id] = (count + 1, match.match_date)
+        
+        if touched:
+            existing = {
+                rating.team_id: rating
+                for rating in TeamRating.query.filter(TeamRating.team_id.in_(list(touched))).all()
+            }
+            now = datetime.utcnow()
+            for team_id, (count, last_date) in touched.items():
+                rating = existing.get(team_id)
+                if rating is None:
+                    rating = TeamRating(team_id=team_id, matches_rated=0)
+                    db.session.add(rating)
+                rating.rating = self._ratings[team_id]
+                rating.matches_rated = (rating.matches_rated or 0) + count
+                rating.last_match_date = last_date
+                rating.updated_at = now
+        
+        if matches:
+            state.last_match_id = matches[-1].id
+            state.last_match_date = matches[-1].match_date
+            state.matches_processed = (state.matches_processed or 0) + len(matches)
+        state.updated_at = checked_at
+        
+        # Um rebuild pode mudar qualquer equipa
+        if rebuild or touched:
+            data_version.bump('elo-ratings', None if rebuild else touched)
+        db.session.commit()
+        self._loaded = True
+    
+    def reload(self):
+        """Relê os ratings persistidos (ex.: alterados por outro processo)"""
+        with self._lock:
+            self._load_ratings()
+            self._loaded = True
+    
+    def _finished_matches_query(self):
+        return Match.query.filter(
+            Match.status == 'finalizado',
+            Match.match_date.isnot(None)
+        ).order_by(Match.match_date, Match.id)
+    
+    def _load_ratings(self):
+        self._ratings = {rating.team_id: rating.rating for rating in TeamRating.query.all()}
+    
+    def _ensure_loaded(self):
+        """Na primeira leitura do processo, carrega os ratings persistidos (sem escrever)"""
+        if self._loaded:
+            return
+        self.reload()
+
+# Instância partilhada pelas rotas (ratings em memória por processo)
+elo_engine = EloRatingEngine()
+data_version.on_external_change(elo_engine.reload)
@@ -0,0 +1,163 @@
+import json
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+from sqlalchemy import exists
+from src.models.football import db, Match, FixturePrediction
+from src.services.championship_sync import PhaseTimer
+from src.services.data_version import DataVersion, data_version
+from src.services.odds_125_system import OddsTargetSystem
+from src.services.team_features import TeamFeatureSnapshot, team_features
+
+class FixturePredictionMaterializer:
+    """
+    Previsões materializadas das partidas por jogar
+    refresh() pontua de uma vez todas as partidas não finalizadas (cenários
+    1.25 e todos os mercados do modelo de Poisson) e reescreve a tabela
+    fixture_predictions numa só transação. As rotas de oportunidades passam
+    a ser um SELECT filtrado e ordenado pelos índices dessa tabela; corre
+    após cada sincronização e recálculo de estatísticas (e por CLI).
+    """
+    
+    INSERT_BATCH = 2000
+    
+    # Partidas que já começaram deixam de ser oportunidades, mesmo antes do próximo refresh()
+    STARTED_STATUSES = ('andamento', 'finalizado')
+    
+    def __init__(self, odds_system: OddsTargetSystem, features: TeamFeatureSnapshot, version: DataVersion):
+        self.odds_system = odds_system
+        self.features = features
+        self.version = version
+        self._lock = threading.Lock()
+        self._last_refresh: Optional[Dict] = None
+    
+    def refresh(self) -> Dict:
+        """Recalcula e reescreve as previsões de todas as partidas por jogar"""
+        with self._lock:
+            timer = PhaseTimer()
+            version = self.version.current
+            
+            with timer.phase('select_fixtures'):
+                fixtures = db.session.query(
+                    Match.id, Match.home_team_id, Match.away_team_id, Match.match_date,
+                    Match.championship_id, Match.championship_name
+                ).filter(Match.status != 'finalizado').all()
+                matches_data = [
+                    {'home_team_id': home_id, 'away_team_id': away_id, 'match_date': match_date,
+                     'championship_name': championship_name}
+                    for _, home_id, away_id, match_date, _, championship_name in fixtures
+                ]
+            
+            with timer.phase('score'):
+                teams_data = self.features.get({team_id for m in matches_data
+                                                 for team_id in (m['home_team_id'], m['away_team_id'])})
+                # Uma equipa não joga duas partidas à mesma hora: (casa, fora, data) identifica a partida
+                scenarios = {
+                    (bet['home_team_id'], bet['away_team_id'], bet['match_date']): bet
+                    for bet in self.odds_system.score_fixtures(matches_data, teams_data, min_confidence=0.0)
+                }
+                markets = {
+                    (prices['home_team_id'], prices['away_team_id'], prices['match_date']): prices['probabilities']
+                    for prices in self.odds_system.price_markets(matches_data, teams_data)
+                }
+            
+            with timer.phase('build_rows'):
+                now = datetime.utcnow()
+                rows = []
+                for match_id, home_id, away_id, match_date, championship_id, championship_name in fixtures:
+                    key = (home_id, away_id, match_date)
+                    if key not in scenarios:
+                        continue  # Equipas sem features
+                    bet = scenarios[key]
+                    has_scenario = bet['confidence'] > 0
+                    rows.append({
+                        'match_id': match_id,
+                        'home_team_id': home_id,
+                        'away_team_id': away_id,
+                        'home_team_name': teams_data[home_id]['name'],
+                        'away_team_name': teams_data[away_id]['name'],
+                        'championship_id': championship_id,
+                        'championship_name': championship_name,
+                        'match_date': match_date,
+                        'recommended_bet': bet['recommended_bet'] if has_scenario else None,
+                        'confidence': bet['confidence'],
+                        'probability': bet['probability'],
+                        'expected_value': bet['expected_value'],
+                        'risk_level': bet['risk_level'] if has_scenario else None,
+                        'supporting_factors': json.dumps(bet['supporting_factors'] if has_scenario else []),
+                        'market_probabilities': json.dumps(markets.get(key)),
+                        'data_version': version,
+                        'created_at': now
+                    })
+            
+            with timer.phase('write'):
+                db.session.query(FixturePrediction).delete(synchronize_session=False)
+                for start in range(0, len(rows), self.INSERT_BATCH):
+                    db.session.execute(FixturePrediction.__table__.insert(), rows[start:start + self.INSERT_BATCH])
+                db.session.commit()
+            
+            self._last_refresh = {
+                'fixtures': len(fixtures),
+                'predictions': len(rows),
+                'opportunities': sum(1 for row in rows if row['confidence'] >= self.odds_system.min_confidence_threshold),
+                'data_version': version,
+                'refreshed_at': now.isoformat(),
+                'timings': timer.summary()
+            }
+            return dict(self._last_refresh)
+    
+    @staticmethod
+    def window(date_from: Optional[datetime] = None, date_to: Optional[datetime] = None,
+               championship_id: Optional[int] = None) -> List:
+        """
+        Filtros das rotas de oportunidades: janela de datas, opcionalmente
+        campeonato, e só partidas que ainda não começaram segundo o estado
+        atual em matches (o ao vivo atualiza-o entre refreshes)
+        """
+        filters = [~exists().where(
+            Match.id == FixturePrediction.match_id,
+            Match.status.in_(FixturePredictionMaterializer.STARTED_STATUSES)
+        )]
+        if date_from is not None:
+            filters.append(FixturePrediction.match_date >= date_from)
+        if date_to is not None:
+            filters.append(FixturePrediction.match_date <= date_to)
+        if championship_id:
+            filters.append(FixturePrediction.championship_id == championship_id)
+        return filters
+    
+    @staticmethod
+    def top(filters: List, min_confidence: float, limit: int):
+        """Query das melhores previsões da janela (confiança, depois valor esperado)"""
+        return FixturePrediction.query.filter(
+            *filters, FixturePrediction.confidence >= min_confidence
+        ).order_by(
+            FixturePrediction.confidence.desc(), FixturePrediction.expected_value.desc(),
+            FixturePrediction.match_date, FixturePrediction.id
+        ).limit(limit)
+    
+    @staticmethod
+    def to_bet(prediction: FixturePrediction) -> Dict:
+        """Linha materializada no formato de OddsTargetSystem.find_high_confidence_bets"""
+        return {
+            'home_team_id': prediction.home_team_id,
+            'away_team_id': prediction.away_team_id,
+            'home_team': prediction.home_team_name,
+            'away_team': prediction.away_team_name,
+            'recommended_bet': prediction.recommended_bet,
+            'confidence': prediction.confidence,
+            'probability': prediction.probability,
+            'expected_value': prediction.expected_value,
+            'risk_level': prediction.risk_level,
+            'supporting_factors': json.loads(prediction.supporting_factors or '[]'),
+            'match_date': prediction.match_date
+        }
+    
+    def stats(self) -> Dict:
+        return {
+            'last_refresh': self._last_refresh,
+            'current_version': self.version.current
+        }
+
+# Instância partilhada (rotas, jobs e CLI)
+fixture_predictions = FixturePredictionMaterializer(OddsTargetSystem(), team_features, data_version)
@@ -1,43 +1,159 @@
+import os
 import requests
 import json
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from src.services.http_cache import HTTPResponseCache
+from src.services.metrics import request_metrics
+
+def default_cache_dir() -> str:
+    """Diretório do cache HTTP (FOOTBALL_API_CACHE_DIR; /tmp na Vercel)"""
+    if os.getenv('FOOTBALL_API_CACHE_DIR'):
+        return os.getenv('FOOTBALL_API_CACHE_DIR')
+    if os.environ.get('VERCEL'):
+        return os.path.join('/tmp', 'football_api_cache')
+    return os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database', 'http_cache')
+
+class BoundedRetry(Retry):
+    """
+    Retry que respeita o Retry-After até max_retry_after segundos
+    Sem limite, um 429 com Retry-After de horas bloqueava o worker durante esse tempo.
+    """
+    
+    def __init__(self, *args, max_retry_after: float = 10, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_retry_after = max_retry_after
+    
+    def new(self, **kwargs):
+        # Cada tentativa cria um novo Retry: o limite tem de passar para ele
+        retry = super().new(**kwargs)
+        retry.max_retry_after = self.max_retry_after
+        return retry
+    
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        return None if retry_after is None else min(retry_after, self.max_retry_after)
 
 class FootballAPIService:
-    def __init__(self, api_key: str):
+    # TTL (segundos) do cache HTTP por endpoint; fora do TTL a resposta é revalidada
+    CACHE_TTLS = {
+        'championships': 3600,
+        'championship_table': 300,
+        'championship_matches': 120
+    }
+    
+    def __init__(self, api_key: str, base_url: Optional[str] = None,
+                 timeout: Union[float, Tuple[float, float]] = None,
+                 max_retries: int = 3, backoff_factor: float = 0.5, max_retry_after: float = 10,
+                 pool_size: int = 16, max_workers: int = 8,
+                 cache: Optional[HTTPResponseCache] = None, use_cache: bool = True,
+                 cache_ttls: Optional[Dict[str, float]] = None):
         self.api_key = api_key
-        self.base_url = "https://api.api-futebol.com.br/v1"
+        self.base_url = (base_url or os.getenv('FOOTBALL_API_BASE_URL', "https://api.api-futebol.com.br/v1")).rstrip('/')
         self.headers = {
             "Authorization": f"Bearer {api_key}",
             "Content-Type": "application/json"
         }
+        # (connect, read) em segundos - sem timeout um upstream parado bloqueava o worker
+        self.timeout = timeout or (
+            float(os.getenv('FOOTBALL_API_CONNECT_TIMEOUT', 3.05)),
+            float(os.getenv('FOOTBALL_API_READ_TIMEOUT', 10))
+        )
+        self.max_workers = max_workers
+        self.session = self._build_session(max_retries, backoff_factor, max_retry_after, pool_size)
+        self.cache = (cache or HTTPResponseCache(default_cache_dir())) if use_cache else None
+        self.cache_ttls = dict(self.CACHE_TTLS, **(cache_ttls or {}))
+    
+    def _build_session(self, max_retries: int, backoff_factor: float, max_retry_after: float,
+                       pool_size: int) -> requests.Session:
+        """Sessão com pool de ligações e retry com backoff em 429/5xx (Retry-After limitado)"""
+        retry = BoundedRetry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(['GET']),
+            respect_retry_after_header=True,
+            max_retry_after=max_retry_after
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        
+        session = requests.Session()
+        session.headers.update(self.headers)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+    
+    def _get(self, path: str, cache_key: Optional[str] = None, revalidate: bool = False):
+        """
+        GET no endpoint da API e devolve o JSON (lança RequestException em erro)
+        Com cache_key, usa o cache HTTP: serve dentro do TTL, revalida com
+        ETag / Last-Modified depois dele e serve a cópia antiga se o upstream falhar.
+        Com revalidate=True pergunta sempre ao upstream (304 reutiliza a cópia)
+        e um erro do upstream é lançado em vez de servir a cópia antiga.
+        """
+        url = f"{self.base_url}{path}"
+        ttl = self.cache_ttls.get(cache_key) if self.cache is not None and cache_key else None
+        if ttl is None:
+            with request_metrics.upstream_call(path):
+                response = self.session.get(url, timeout=self.timeout)
+            response.raise_for_status()
+            return response.json()
+        
+        entry = self.cache.get(url)
+        if entry and not revalidate and self.cache.is_fresh(entry, ttl):
+            self.cache.record('hits')
+            return entry['body']
+        
+        try:
+            with request_metrics.upstream_call(path):
+                response = self.session.get(url, headers=self.cache.conditional_headers(entry), timeout=self.timeout)
+            if response.status_code == 304 and entry:
+                self.cache.record('revalidated')
+                self.cache.renew(url, entry)
+                return entry['body']
+            response.raise_for_status()
+            body = response.json()
+        except requests.exceptions.RequestException:
+            if entry and not revalidate:
+                self.cache.record('stale_served')
+                return entry['body']
+            raise
+        
+        self.cache.record('misses')
+        self.cache.store(url, body, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+        return body
     
     def get_championships(self) -> List[Dict]:
         """Busca lista de campeonatos disponíveis"""
         try:
-            response = requests.get(f"{self.base_url}/campeonatos", headers=self.headers)
-            response.raise_for_status()
-            return response.json()
+            return self._get("/campeonatos", cache_key='championships')
         except requests.exceptions.RequestException as e:
             print(f"Erro ao buscar campeonatos: {e}")
             return []
     
-    def get_championship_matches(self, championship_id: int) -> Dict:
-        """Busca todas as partidas de um campeonato"""
+    def get_championship_matches(self, championship_id: int, revalidate: bool = False,
+                                 raise_errors: bool = False) -> Dict:
+        """
+        Busca todas as partidas de um campeonato
+        A sincronização usa revalidate=True e raise_errors=True: nunca grava
+        uma cópia antiga do cache e um erro do upstream falha a sincronização
+        """
         try:
-            response = requests.get(f"{self.base_url}/campeonatos/{championship_id}/partidas", headers=self.headers)
-            response.raise_for_status()
-            return response.json()
+            return self._get(f"/campeonatos/{championship_id}/partidas", cache_key='championship_matches',
+                             revalidate=revalidate)
         except requests.exceptions.RequestException as e:
+            if raise_errors:
+                raise
             print(f"Erro ao buscar partidas do campeonato {championship_id}: {e}")
             return {}
     
     def get_match_details(self, match_id: int) -> Dict:
         """Busca detalhes de uma partida específica"""
         try:
-            response = requests.get(f"{self.base_url}/partidas/{match_id}", headers=self.headers)
-            response.raise_for_status()
-            return response.json()
+            return self._get(f"/partidas/{match_id}")
         except requests.exceptions.RequestException as e:
             print(f"Erro ao buscar detalhes da partida {match_id}: {e}")
             return {}
@@ -45,9 +161,7 @@ class FootballAPIService:
     def get_team_details(self, team_id: int) -> Dict:
         """Busca detalhes de uma equipa"""
         try:
-            response = requests.get(f"{self.base_url}/times/{team_id}", headers=self.headers)
-            response.raise_for_status()
-            return response.json()
+            return self._get(f"/times/{team_id}")
         except requests.exceptions.RequestException as e:
             print(f"Erro ao buscar detalhes da equipa {team_id}: {e}")
             return {}
@@ -55,22 +169,43 @@ class FootballAPIService:
     def get_championship_table(self, championship_id: int) -> List[Dict]:
         """Busca tabela de classificação de um campeonato"""
         try:
-            response = requests.get(f"{self.base_url}/campeonatos/{championship_id}/tabela", headers=self.headers)
-            response.raise_for_status()
-            return response.json()
+            return self._get(f"/campeonatos/{championship_id}/tabela", cache_key='championship_table')
         except requests.exceptions.RequestException as e:
             print(f"Erro ao buscar tabela do campeonato {championship_id}: {e}")
             return []
     
-    def get_live_matches(self) -> List[Dict]:
-        """Busca partidas ao vivo"""
+    def get_live_matches(self, raise_errors: bool = False) -> List[Dict]:
+        """Busca partidas ao vivo (raise_errors para o poller distinguir erro de lista vazia)"""
         try:
-            response = requests.get(f"{self.base_url}/ao-vivo", headers=self.headers)
-            response.raise_for_status()
-            return response.json()
+            return self._get("/ao-vivo")
         except requests.exceptions.RequestException as e:
+            if raise_errors:
+                raise
             print(f"Erro ao buscar partidas ao vivo: {e}")
             return []
+    
+    def fetch_many(self, fetch: Callable[[int], Dict], ids: Iterable[int],
+                   max_workers: Optional[int] = None) -> Dict[int, Dict]:
+        """
+        Executa `fetch` para vários IDs em paralelo (pool de threads limitado)
+        Devolve {id: resultado}; IDs com erro ficam com {} (como nos métodos individuais)
+        """
+        unique_ids = list(dict.fromkeys(ids))
+        if not unique_ids:
+            return {}
+        
+        workers = max(1, min(max_workers or self.max_workers, len(unique_ids)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(fetch, unique_ids)
+            return dict(zip(unique_ids, results))
+    
+    def get_many_match_details(self, match_ids: Iterable[int], max_workers: Optional[int] = None) -> Dict[int, Dict]:
+        """Busca detalhes de várias partidas em paralelo"""
+        return self.fetch_many(self.get_match_details, match_ids, max_workers)
+    
+    def get_many_team_details(self, team_ids: Iterable[int], max_workers: Optional[int] = None) -> Dict[int, Dict]:
+        """Busca detalhes de várias equipas em paralelo"""
+        return self.fetch_many(self.get_team_details, team_ids, max_workers)
 
 class DataProcessor:
     """Classe para processar e normalizar dados da API"""
@@ -169,7 +304,11 @@ class StatsCalculator:
             else:
                 stats['losses'] += 1
         
-        # Calcular médias
+        return StatsCalculator.calculate_averages(stats)
+    
+    @staticmethod
+    def calculate_averages(stats: Dict) -> Dict:
+        """Preenche médias e percentagem de vitórias a partir dos totais"""
         if stats['matches_played'] > 0:
             stats['goals_per_match'] = stats['goals_for'] / stats['matches_played']
             stats['goals_conceded_per_match'] = stats['goals_against'] / stats['matches_played']
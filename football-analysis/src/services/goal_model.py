@@ -0,0 +1,175 @@
+import math
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+class GoalModel:
+    """
+    Modelo de golos de Poisson (independente) para preçar mercados
+    Para um lote de partidas constrói de uma vez o tensor (n, G, G) com a
+    probabilidade de cada resultado casa x fora e deriva todos os mercados
+    (1X2, dupla hipótese, over/under, ambas marcam, resultado exato) com uma
+    única multiplicação pelas máscaras dos mercados. As matrizes ficam em
+    cache por (casa, fora, versão do modelo).
+    """
+    
+    MODEL_VERSION = 1
+    DEFAULT_LINES = (0.5, 1.5, 2.5, 3.5, 4.5)
+    MIN_EXPECTED_GOALS = 0.01
+    
+    def __init__(self, max_goals: int = 10, cache_size: int = 4096):
+        self.max_goals = max_goals
+        self.cache_size = cache_size
+        self._log_factorial = np.array([math.lgamma(k + 1) for k in range(max_goals + 1)])
+        self._cache: 'OrderedDict[Tuple, Tuple[float, float, np.ndarray]]' = OrderedDict()
+        self._masks: Dict[Tuple[float, ...], Tuple[List[str], np.ndarray]] = {}
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0}
+    
+    @property
+    def version(self) -> str:
+        return f'{self.MODEL_VERSION}:{self.max_goals}'
+    
+    @staticmethod
+    def expected_goals(home_data: Dict, away_data: Dict) -> Tuple[float, float]:
+        """
+        Golos esperados de cada equipa (ataque de uma x defesa da outra),
+        o mesmo critério da expectativa de golos dos cenários 1.25 do OddsTargetSystem
+        """
+        expected_home_goals = home_data.get('goals_per_match', 1.0) * away_data.get('goals_conceded_per_match', 1.0)
+        expected_away_goals = away_data.get('goals_per_match', 1.0) * home_data.get('goals_conceded_per_match', 1.0)
+        return expected_home_goals, expected_away_goals
+    
+    def score_matrices(self, home_expected: Sequence[float], away_expected: Sequence[float]) -> np.ndarray:
+        """
+        Tensor (n, G, G) com P(casa = i, fora = j) para cada partida
+        Os resultados acima de max_goals são descartados e cada matriz é
+        renormalizada para somar 1.
+        """
+        home_expected = np.maximum(np.asarray(home_expected, dtype=np.float64), self.MIN_EXPECTED_GOALS)
+        away_expected = np.maximum(np.asarray(away_expected, dtype=np.float64), self.MIN_EXPECTED_GOALS)
+        goals = np.arange(self.max_goals + 1)
+        
+        def pmf(expected):
+            return np.exp(goals * np.log(expected)[:, None] - expected[:, None] - self._log_factorial)
+        
+        matrices = pmf(home_expected)[:, :, None] * pmf(away_expected)[:, None, :]
+        return matrices / matrices.sum(axis=(1, 2), keepdims=True)
+    
+    def market_masks(self, lines: Sequence[float] = DEFAULT_LINES) -> Tuple[List[str], np.ndarray]:
+        """Nomes dos mercados e máscaras (mercados, G*G) sobre a matriz de resultados"""
+        lines = tuple(lines)
+        if lines not in self._masks:
+            home_goals, away_goals = np.indices((self.max_goals + 1, self.max_goals + 1))
+            total_goals = home_goals + away_goals
+            
+            masks = {
+                'home_win': home_goals > away_goals,
+                'draw': home_goals == away_goals,
+                'away_win': home_goals < away_goals,
+                'home_or_draw': home_goals >= away_goals,
+                'away_or_draw': home_goals <= away_goals,
+                'home_or_away': home_goals != away_goals,
+                'both_teams_score': (home_goals > 0) & (away_goals > 0),
+                'no_both_teams_score': (home_goals == 0) | (away_goals == 0)
+            }
+            for line in lines:
+                masks[f'over_{line}'] = total_goals > line
+                masks[f'under_{line}'] = total_goals < line
+            
+            names = list(masks)
+            self._masks[lines] = (names, np.stack([masks[name].ravel() for name in names]).astype(np.float64))
+        
+        return self._masks[lines]
+    
+    def price_matrices(self, matrices: np.ndarray, lines: Sequence[float] = DEFAULT_LINES) -> Dict[str, np.ndarray]:
+        """Probabilidade de cada mercado para cada matriz (um array por mercado)"""
+        names, masks = self.market_masks(lines)
+        probabilities = matrices.reshape(len(matrices), masks.shape[1]) @ masks.T
+        return {name: probabilities[:, i] for i, name in enumerate(names)}
+    
+    def get_matrices(self, fixtures: List[Tuple[int, int, float, float]]) -> np.ndarray:
+        """
+        Matrizes de resultados para uma lista de (casa, fora, golos esperados
+        casa, golos esperados fora); só as que faltam no cache são calculadas,
+        todas no mesmo passo vetorizado
+        """
+        matrices: List[Optional[np.ndarray]] = [None] * len(fixtures)
+        missing = []
+        
+        with self._lock:
+            for i, (home_id, away_id, home_expected, away_expected) in enumerate(fixtures):
+                entry = self._cache.get((home_id, away_id, self.version))
+                if entry is not None and entry[0] == home_expected and entry[1] == away_expected:
+                    self._cache.move_to_end((home_id, away_id, self.version))
+                    matrices[i] = entry[2]
+                    self._stats['hits'] += 1
+                else:
+                    missing.append(i)
+                    self._stats['misses'] += 1
+        
+        if missing:
+            computed = self.score_matrices(
+                [fixtures[i][2] for i in missing],
+                [fixtures[i][3] for i in missing]
+            )
+            with self._lock:
+                for i, matrix in zip(missing, computed):
+                    home_id, away_id, home_expected, away_expected = fixtures[i]
+                    matrices[i] = matrix
+                    self._cache[(home_id, away_id, self.version)] = (home_expected, away_expected, matrix)
+                    self._cache.move_to_end((home_id, away_id, self.version))
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        
+        if not matrices:
+            return np.empty((0, self.max_goals + 1, self.max_goals + 1))
+        return np.stack(matrices)
+    
+    def price_fixtures(self, fixtures: List[Tuple[int, int, float, float]],
+                       lines: Sequence[float] = DEFAULT_LINES, top_scores: int = 5) -> List[Dict]:
+        """Preços de todos os mercados para um lote de partidas"""
+        matrices = self.get_matrices(fixtures)
+        markets = self.price_matrices(matrices, lines)
+        
+        # Resultados exatos mais prováveis de cada partida
+        flat = matrices.reshape(len(matrices), (self.max_goals + 1) ** 2)
+        top = np.argsort(-flat, axis=1, kind='stable')[:, :top_scores]
+        
+        priced = []
+        for i, (home_id, away_id, home_expected, away_expected) in enumerate(fixtures):
+            probabilities = {name: round(float(values[i]), 4) for name, values in markets.items()}
+            priced.append({
+                'home_team_id': home_id,
+                'away_team_id': away_id,
+                'expected_goals': {
+                    'home': round(float(home_expected), 3),
+                    'away': round(float(away_expected), 3)
+                },
+                'probabilities': probabilities,
+                'fair_odds': {name: round(1 / p, 2) if p > 0 else None for name, p in probabilities.items()},
+                'correct_score': [
+                    {
+                        'score': f'{cell // (self.max_goals + 1)}-{cell % (self.max_goals + 1)}',
+                        'probability': round(float(flat[i, cell]), 4)
+                    }
+                    for cell in top[i].tolist()
+                ]
+            })
+        
+        return priced
+    
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats, entries=len(self._cache), version=self.version)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        return stats
+    
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+# Modelo partilhado pelas rotas
+goal_model = GoalModel()
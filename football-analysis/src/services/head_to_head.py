@@ -0,0 +1,158 @@
+import bisect
+import threading
+import numpy as np
+from typing import Dict, List, Tuple
+from src.services.match_store import MatchStore, FINISHED, match_store
+
+class HeadToHeadRecord:
+    """Agregado dos confrontos entre um par de equipas (low_id < high_id)"""
+    
+    __slots__ = ('low_wins', 'high_wins', 'draws', 'low_goals', 'high_goals', 'total', 'recent')
+    
+    def __init__(self):
+        self.low_wins = 0
+        self.high_wins = 0
+        self.draws = 0
+        self.low_goals = 0
+        self.high_goals = 0
+        self.total = 0
+        self.recent: List[Tuple] = []  # (match_date, match_id, home_id, away_id, home_score, away_score)
+
+class HeadToHeadIndex:
+    """
+    Índice de confrontos diretos indexado pelo par não ordenado (min_id, max_id)
+    Guarda V/E/D, golos e os últimos N encontros de cada par. É construído a
+    partir das partidas finalizadas do MatchStore e atualizado de forma
+    incremental quando novas partidas terminam; a consulta é O(1).
+    """
+    
+    def __init__(self, store: MatchStore, recent_meetings: int = 5):
+        self.store = store
+        self.recent_meetings = recent_meetings
+        self._records: Dict[Tuple[int, int], HeadToHeadRecord] = {}
+        self._known_ids = np.empty(0, dtype=np.int64)
+        self._known_scores = np.empty((0, 2), dtype=np.int16)
+        self._store_version = None
+        self._lock = threading.Lock()
+    
+    def get_record(self, team1_id: int, team2_id: int) -> Dict:
+        """
+        Histórico entre duas equipas no formato de
+        AdvancedStatsCalculator.calculate_head_to_head_record, com golos e
+        últimos encontros
+        """
+        if self._store_version != self.store.version or self._store_version is None:
+            self.update()
+        
+        key = (min(team1_id, team2_id), max(team1_id, team2_id))
+        record = self._records.get(key)
+        if record is None or record.total == 0:
+            return {'total_matches': 0, 'team1_wins': 0, 'team2_wins': 0, 'draws': 0, 'advantage': 'neutral',
+                    'team1_goals': 0, 'team2_goals': 0, 'recent_meetings': []}
+        
+        team1_is_low = team1_id == key[0]
+        team1_wins = record.low_wins if team1_is_low else record.high_wins
+        team2_wins = record.high_wins if team1_is_low else record.low_wins
+        
+        if team1_wins > team2_wins:
+            advantage = 'team1'
+        elif team2_wins > team1_wins:
+            advantage = 'team2'
+        else:
+            advantage = 'neutral'
+        
+        return {
+            'total_matches': record.total,
+            'team1_wins': team1_wins,
+            'team2_wins': team2_wins,
+            'draws': record.draws,
+            'advantage': advantage,
+            'team1_goals': record.low_goals if team1_is_low else record.high_goals,
+            'team2_goals': record.high_goals if team1_is_low else record.low_goals,
+            'recent_meetings': [
+                {
+                    'home_team_id': home_id,
+                    'away_team_id': away_id,
+                    'home_score': home_score,
+                    'away_score': away_score,
+                    'match_date': match_date.isoformat() if match_date else None
+                }
+                for match_date, _, home_id, away_id, home_score, away_score in reversed(record.recent)
+            ]
+        }
+    
+    def update(self) -> Dict:
+        """
+        Acrescenta as partidas finalizadas ainda não indexadas
+        Se uma partida já indexada mudou de resultado (ou deixou de estar
+        finalizada), o índice é reconstruído
+        """
+        with self._lock:
+            columns = self.store.columns()
+            version = self.store.version
+            if version == self._store_version:
+                return {'mode': 'unchanged', 'matches_added': 0}
+            
+            rows = np.flatnonzero(columns.status == FINISHED)
+            ids = columns.match_id[rows]
+            scores = np.column_stack((columns.home_score[rows], columns.away_score[rows]))
+            
+            if len(self._known_ids):
+                position = np.minimum(np.searchsorted(self._known_ids, ids), len(self._known_ids) - 1)
+                known = self._known_ids[position] == ids
+                changed = known & np.any(self._known_scores[position] != scores, axis=1)
+            else:
+                known = np.zeros(len(ids), dtype=bool)
+                changed = known
+            
+            if changed.any() or known.sum() != len(self._known_ids):
+                self._records = {}
+                self._known_ids = np.empty(0, dtype=np.int64)
+                self._known_scores = np.empty((0, 2), dtype=np.int16)
+                known = np.zeros(len(ids), dtype=bool)
+                mode = 'rebuild'
+            else:
+                mode = 'incremental'
+            
+            new_rows = rows[~known]
+            for row in new_rows.tolist():
+                self._add(
+                    int(columns.match_id[row]), int(columns.home_id[row]), int(columns.away_id[row]),
+                    int(columns.home_score[row]), int(columns.away_score[row]),
+                    columns.match_date[row].item()
+                )
+            
+            all_ids = np.concatenate([self._known_ids, ids[~known]])
+            all_scores = np.concatenate([self._known_scores, scores[~known]])
+            order = np.argsort(all_ids, kind='stable')
+            self._known_ids = all_ids[order]
+            self._known_scores = all_scores[order]
+            self._store_version = version
+            
+            return {'mode': mode, 'matches_added': len(new_rows)}
+    
+    def _add(self, match_id: int, home_id: int, away_id: int, home_score: int, away_score: int, match_date):
+        """Adiciona uma partida finalizada ao agregado do seu par"""
+        key = (min(home_id, away_id), max(home_id, away_id))
+        record = self._records.get(key)
+        if record is None:
+            record = HeadToHeadRecord()
+            self._records[key] = record
+        
+        low_score, high_score = (home_score, away_score) if home_id == key[0] else (away_score, home_score)
+        record.total += 1
+        record.low_goals += low_score
+        record.high_goals += high_score
+        if low_score > high_score:
+            record.low_wins += 1
+        elif low_score < high_score:
+            record.high_wins += 1
+        else:
+            record.draws += 1
+        
+        bisect.insort(record.recent, (match_date, match_id, home_id, away_id, home_score, away_score))
+        if len(record.recent) > self.recent_meetings:
+            del record.recent[0]
+
+# Índice partilhado, ligado ao armazém de partidas do processo
+h2h_index = HeadToHeadIndex(match_store)
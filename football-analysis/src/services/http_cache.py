@@ -0,0 +1,135 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, Optional
+
+class HTTPResponseCache:
+    """
+    Cache em disco das respostas da API externa
+    Guarda o corpo JSON com os validadores (ETag / Last-Modified). Dentro do
+    TTL a resposta é servida do cache; depois do TTL é revalidada com
+    If-None-Match / If-Modified-Since, e um 304 só renova a entrada.
+    O diretório fica limitado a max_entries ficheiros e max_bytes: depois
+    de cada gravação acima do limite saem as entradas usadas há mais tempo
+    (mtime, renovado a cada leitura).
+    """
+    
+    def __init__(self, cache_dir: str, max_entries: int = 1000, max_bytes: int = 64 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'revalidated': 0, 'stale_served': 0, 'stores': 0,
+                       'evictions': 0, 'errors': 0}
+        os.makedirs(cache_dir, exist_ok=True)
+    
+    def get(self, key: str) -> Optional[Dict]:
+        """Entrada guardada para a chave (ou None)"""
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            os.utime(path)  # Usada agora: última a sair na evicção
+            return entry
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            self._count('errors')
+            return None
+    
+    def is_fresh(self, entry: Dict, ttl: float) -> bool:
+        return (time.time() - entry.get('stored_at', 0)) < ttl
+    
+    def conditional_headers(self, entry: Optional[Dict]) -> Dict[str, str]:
+        """Cabeçalhos para revalidar uma entrada expirada"""
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+    
+    def store(self, key: str, body, etag: Optional[str] = None, last_modified: Optional[str] = None) -> Dict:
+        """Grava (de forma atómica) o corpo e os validadores de uma resposta"""
+        entry = {
+            'key': key,
+            'body': body,
+            'etag': etag,
+            'last_modified': last_modified,
+            'stored_at': time.time()
+        }
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, self._path(key))
+            self._count('stores')
+        except (OSError, TypeError, ValueError):
+            self._count('errors')
+            return entry
+        self._evict()
+        return entry
+    
+    def renew(self, key: str, entry: Dict) -> Dict:
+        """Após um 304, renova o TTL mantendo o corpo guardado"""
+        return self.store(key, entry['body'], entry.get('etag'), entry.get('last_modified'))
+    
+    def record(self, event: str):
+        """Regista um evento (hits, misses, revalidated, stale_served)"""
+        self._count(event)
+    
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats['hits'] + stats['revalidated'] + stats['misses']
+        stats['hit_ratio'] = round((stats['hits'] + stats['revalidated']) / lookups, 4) if lookups else 0.0
+        return stats
+    
+    def clear(self):
+        """Remove todas as entradas do cache"""
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.json'):
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
+    
+    def _evict(self):
+        """Remove as entradas usadas há mais tempo até caber em max_entries e max_bytes"""
+        files = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.json'):
+                try:
+                    stat = os.stat(os.path.join(self.cache_dir, name))
+                except OSError:
+                    continue  # Removida por outro processo
+                files.append((stat.st_mtime, stat.st_size, name))
+        
+        total_bytes = sum(size for _, size, _ in files)
+        if len(files) <= self.max_entries and total_bytes <= self.max_bytes:
+            return
+        
+        files.sort()
+        remaining = len(files)
+        for _, size, name in files:
+            if remaining <= self.max_entries and total_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+                self._count('evictions')
+            except OSError:
+                pass
+            remaining -= 1
+            total_bytes -= size
+    
+    def _count(self, event: str):
+        with self._lock:
+            self._stats[event] = self._stats.get(event, 0) + 1
+    
+    def _path(self, key: str) -> str:
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f'{digest}.json')
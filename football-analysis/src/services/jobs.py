@@ -0,0 +1,191 @@
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Set
+from flask import current_app
+from sqlalchemy import func
+from src.models.football import db, Job
+from src.services.data_version import process_origin
+
+ACTIVE_STATUSES = ('queued', 'running')
+
+# Intervalo do heartbeat dos jobs ativos e idade a partir da qual um job sem heartbeat é órfão
+HEARTBEAT_INTERVAL = 10
+STALE_AFTER = 60
+
+class JobRunner:
+    """
+    Execução em segundo plano de tarefas longas (sincronização, estatísticas)
+    submit() grava o job na tabela jobs e devolve logo o id; um
+    ThreadPoolExecutor com max_workers limita quantas tarefas correm em
+    paralelo. Cada tarefa corre no seu próprio contexto da aplicação (sessão
+    própria) e reporta o progresso, que fica persistido no SQLite.
+    Os jobs guardam o processo que os executa e um heartbeat renovado a cada
+    HEARTBEAT_INTERVAL segundos, para que outro processo só dê como órfãos
+    os que deixaram de o renovar. Com inline=True (ex.: Vercel, onde o
+    trabalho em segundo plano é terminado no fim do pedido) o job corre no
+    próprio pedido e submit() devolve-o já concluído.
+    """
+    
+    def __init__(self, max_workers: int = 2, inline: bool = False):
+        self.max_workers = max_workers
+        self.inline = inline
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._handlers: Dict[str, Callable] = {}
+        self._lock = threading.Lock()
+        self._owned: Set[str] = set()  # jobs em fila ou a correr neste processo
+        self._heartbeat: Optional[threading.Thread] = None
+    
+    def register(self, job_type: str):
+        """Decorador que associa uma função handler(params, progress) a um tipo de job"""
+        def decorator(handler):
+            self._handlers[job_type] = handler
+            return handler
+        return decorator
+    
+    def submit(self, job_type: str, params: Optional[Dict] = None, dedupe: bool = True) -> Dict:
+        """
+        Cria o job e agenda-o; com dedupe, um job igual (mesmo tipo e
+        parâmetros) ainda em fila ou a correr é devolvido em vez de criar outro
+        """
+        if job_type not in self._handlers:
+            raise ValueError(f'Tipo de job desconhecido: {job_type}')
+        params_json = json.dumps(params or {}, sort_keys=True)
+        
+        with self._lock:
+            # Um job igual de um processo que morreu não deve bloquear o novo
+            self.recover_orphans()
+            if dedupe:
+                existing = Job.query.filter(
+                    Job.job_type == job_type,
+                    Job.status.in_(ACTIVE_STATUSES),
+                    Job.params == params_json
+                ).first()
+                if existing:
+                    return self.to_dict(existing)
+            
+            job = Job(id=str(uuid.uuid4()), job_type=job_type, params=params_json,
+                      status='queued', progress=0.0, message='Em fila',
+                      worker_id=process_origin(), heartbeat_at=datetime.utcnow())
+            db.session.add(job)
+            db.session.commit()
+            job_dict = self.to_dict(job)
+            self._owned.add(job_dict['id'])
+        
+        app = current_app._get_current_object()
+        if self.inline:
+            # O job corre noutra sessão: relê a linha já concluída
+            self._run(app, job_dict['id'], job_type, params or {})
+            db.session.refresh(job)
+            return self.to_dict(job)
+        
+        self._start_heartbeat(app)
+        self._executor.submit(self._run, app, job_dict['id'], job_type, params or {})
+        return job_dict
+    
+    def run_inline(self, job_type: str, params: Dict):
+        """Corre o handler no pedido atual, sem criar job (progresso ignorado)"""
+        return self._handlers[job_type](params, lambda fraction, message=None: None)
+    
+    def _run(self, app, job_id: str, job_type: str, params: Dict):
+        with app.app_context():
+            self._update(job_id, status='running', started_at=datetime.utcnow(), message='Em execução')
+            
+            def progress(fraction: float, message: Optional[str] = None):
+                self._update(job_id, progress=round(min(1.0, max(0.0, fraction)), 4), message=message)
+            
+            try:
+                result = self._handlers[job_type](params, progress)
+                self._update(job_id, status='succeeded', progress=1.0, message='Concluído',
+                             result=json.dumps(result, default=str), finished_at=datetime.utcnow())
+            except Exception as e:
+                db.session.rollback()
+                self._update(job_id, status='failed', message='Falhou', error=str(e),
+                             finished_at=datetime.utcnow())
+            finally:
+                with self._lock:
+                    self._owned.discard(job_id)
+    
+    def _start_heartbeat(self, app):
+        with self._lock:
+            if self._heartbeat is None:
+                self._heartbeat = threading.Thread(target=self._heartbeat_loop, args=(app,),
+                                                   name='job-heartbeat', daemon=True)
+                self._heartbeat.start()
+    
+    def _heartbeat_loop(self, app):
+        """Renova o heartbeat dos jobs deste processo (os que ainda esperam na fila incluídos)"""
+        while True:
+            time.sleep(HEARTBEAT_INTERVAL)
+            with self._lock:
+                job_ids = list(self._owned)
+            if not job_ids:
+                continue
+            with app.app_context():
+                try:
+                    db.session.query(Job).filter(Job.id.in_(job_ids), Job.status.in_(ACTIVE_STATUSES)).update(
+                        {'heartbeat_at': datetime.utcnow()}, synchronize_session=False
+                    )
+                    db.session.commit()
+                except Exception:
+                    db.session.rollback()
+    
+    @staticmethod
+    def _update(job_id: str, **values):
+        values = {key: value for key, value in values.items() if value is not None}
+        values['heartbeat_at'] = datetime.utcnow()
+        db.session.query(Job).filter(Job.id == job_id).update(values)
+        db.session.commit()
+    
+    def get(self, job_id: str) -> Optional[Dict]:
+        job = db.session.get(Job, job_id)
+        return self.to_dict(job) if job else None
+    
+    def recent(self, limit: int = 20, job_type: Optional[str] = None) -> List[Dict]:
+        query = Job.query
+        if job_type:
+            query = query.filter(Job.job_type == job_type)
+        return [self.to_dict(job) for job in query.order_by(Job.created_at.desc()).limit(limit).all()]
+    
+    @staticmethod
+    def recover_orphans(stale_after: float = STALE_AFTER) -> int:
+        """
+        Marca como falhados os jobs ativos cujo processo deixou de renovar o
+        heartbeat (reiniciado ou terminado); os de outros workers vivos ficam
+        """
+        cutoff = datetime.utcnow() - timedelta(seconds=stale_after)
+        count = db.session.query(Job).filter(
+            Job.status.in_(ACTIVE_STATUSES),
+            func.coalesce(Job.heartbeat_at, Job.created_at) < cutoff
+        ).update(
+            {'status': 'failed', 'error': 'Interrompido: o processo do job deixou de responder',
+             'finished_at': datetime.utcnow()},
+            synchronize_session=False
+        )
+        db.session.commit()
+        return count
+    
+    @staticmethod
+    def to_dict(job: Job) -> Dict:
+        return {
+            'id': job.id,
+            'job_type': job.job_type,
+            'params': json.loads(job.params) if job.params else {},
+            'status': job.status,
+            'progress': round((job.progress or 0) * 100, 1),
+            'message': job.message,
+            'result': json.loads(job.result) if job.result else None,
+            'error': job.error,
+            'created_at': job.created_at.isoformat() if job.created_at else None,
+            'started_at': job.started_at.isoformat() if job.started_at else None,
+            'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+            'worker_id': job.worker_id,
+            'heartbeat_at': job.heartbeat_at.isoformat() if job.heartbeat_at else None
+        }
+
+# Executor partilhado (JOB_WORKERS limita jobs em paralelo; na Vercel os jobs correm no pedido)
+job_runner = JobRunner(max_workers=int(os.getenv('JOB_WORKERS', '2')), inline=bool(os.getenv('VERCEL')))
@@ -0,0 +1,213 @@
+import json
+import queue
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from src.models.football import db, Match
+from src.services.data_version import DataVersion
+from src.services.elo_rating import elo_engine
+from src.services.football_api import FootballAPIService, DataProcessor
+from src.services.head_to_head import h2h_index
+from src.services.market_rollups import MarketRollups
+from src.services.match_store import match_store
+
+class LiveScoresPoller:
+    """
+    Poller único de /ao-vivo partilhado por todos os clientes SSE
+    Uma só thread consulta a API enquanto houver subscritores, compara com o
+    último snapshot e envia a cada fila apenas as partidas alteradas (e as
+    que saíram do ao vivo). O intervalo adapta-se: curto logo após mudanças,
+    normal com jogos a decorrer, longo sem jogos ou com erros (backoff).
+    As alterações de marcador/estado são gravadas nas linhas de Match, no
+    armazém de partidas, nos confrontos diretos, nos ratings ELO e nos
+    agregados diários de mercado dos dias afetados.
+    """
+    
+    def __init__(self, api_service: FootballAPIService, version: DataVersion,
+                 rollups: Optional[MarketRollups] = None,
+                 active_interval: float = 15, fast_interval: float = 5,
+                 idle_interval: float = 60, max_interval: float = 300,
+                 queue_size: int = 100):
+        self.api_service = api_service
+        self.version = version
+        self.rollups = rollups
+        self.active_interval = active_interval
+        self.fast_interval = fast_interval
+        self.idle_interval = idle_interval
+        self.max_interval = max_interval
+        self.queue_size = queue_size
+        self._snapshot: Dict[int, Dict] = {}
+        self._subscribers: List[queue.Queue] = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._app = None
+        self._event_id = 0
+        self._errors = 0
+        self._stats = {'polls': 0, 'errors': 0, 'events': 0, 'rows_updated': 0, 'dropped_subscribers': 0}
+    
+    def subscribe(self, app) -> Tuple[queue.Queue, List[Dict]]:
+        """Regista um cliente; devolve a sua fila e o snapshot atual"""
+        subscriber = queue.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._app = app
+            self._subscribers.append(subscriber)
+            snapshot = list(self._snapshot.values())
+            # Um cliente novo recebe o snapshot atual; não antecipa a próxima consulta ao upstream
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name='live-scores-poller', daemon=True)
+                self._thread.start()
+        return subscriber, snapshot
+    
+    def unsubscribe(self, subscriber: queue.Queue):
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+    
+    def is_subscribed(self, subscriber: queue.Queue) -> bool:
+        """False se o cliente foi desligado por não consumir a fila"""
+        with self._lock:
+            return subscriber in self._subscribers
+    
+    def snapshot(self) -> List[Dict]:
+        with self._lock:
+            return list(self._snapshot.values())
+    
+    def _loop(self):
+        """Corre enquanto houver subscritores; a thread termina quando o último sai"""
+        while True:
+            with self._lock:
+                if not self._subscribers:
+                    self._thread = None
+                    return
+            
+            interval = self.poll_once()
+            self._wakeup.wait(interval)
+            self._wakeup.clear()
+    
+    def poll_once(self) -> float:
+        """Uma consulta ao upstream; devolve o intervalo até à próxima"""
+        self._stats['polls'] += 1
+        try:
+            payload = self.api_service.get_live_matches(raise_errors=True)
+        except Exception:
+            self._errors += 1
+            self._stats['errors'] += 1
+            return min(self.max_interval, self.active_interval * (2 ** self._errors))
+        self._errors = 0
+        
+        current = {}
+        for match_data in payload if isinstance(payload, list) else []:
+            match = DataProcessor.process_match_data(match_data)
+            if match['api_id']:
+                current[match['api_id']] = {
+                    'api_id': match['api_id'],
+                    'home_team_id': match['home_team_id'],
+                    'away_team_id': match['away_team_id'],
+                    'home_team': match_data.get('time_mandante', {}).get('nome_popular', ''),
+                    'away_team': match_data.get('time_visitante', {}).get('nome_popular', ''),
+                    'home_score': match['home_score'],
+                    'away_score': match['away_score'],
+                    'status': match['status'],
+                    'championship_name': match['championship_name']
+                }
+        
+        changed, ended = self.diff(self._snapshot, current)
+        with self._lock:
+            self._snapshot = current
+        
+        if changed:
+            self._persist(changed)
+            self._publish('update', changed)
+        if ended:
+            self._publish('ended', ended)
+        
+        if changed or ended:
+            return self.fast_interval
+        return self.active_interval if current else self.idle_interval
+    
+    @staticmethod
+    def diff(previous: Dict[int, Dict], current: Dict[int, Dict]) -> Tuple[List[Dict], List[int]]:
+        """Partidas novas ou com marcador/estado diferente e api_id das que saíram do ao vivo"""
+        fields = ('home_score', 'away_score', 'status')
+        changed = [
+            match for api_id, match in current.items()
+            if api_id not in previous or any(previous[api_id][f] != match[f] for f in fields)
+        ]
+        ended = [api_id for api_id in previous if api_id not in current]
+        return changed, ended
+    
+    def _persist(self, changed: List[Dict]):
+        """Atualiza marcador e estado das partidas existentes (uma escrita em bloco)"""
+        if self._app is None:
+            return
+        with self._app.app_context():
+            try:
+                existing = {
+                    api_id: (match_id, championship_id, match_date)
+                    for match_id, api_id, championship_id, match_date in db.session.query(
+                        Match.id, Match.api_id, Match.championship_id, Match.match_date
+                    ).filter(
+                        Match.api_id.in_([match['api_id'] for match in changed])
+                    ).all()
+                }
+                now = datetime.utcnow()
+                updates = [
+                    {'id': existing[match['api_id']][0], 'home_score': match['home_score'] or 0,
+                     'away_score': match['away_score'] or 0, 'status': match['status'], 'updated_at': now}
+                    for match in changed if match['api_id'] in existing
+                ]
+                if updates:
+                    db.session.bulk_update_mappings(Match, updates)
+                    team_ids = {match[side] for match in changed if match['api_id'] in existing
+                                for side in ('home_team_id', 'away_team_id')}
+                    self.version.bump('live-scores', team_ids)
+                    
+                    # Estado derivado atualizado antes do commit (a sessão já vê as alterações),
+                    # para que a nova versão nunca seja lida com o armazém ainda antigo
+                    match_store.refresh()
+                    h2h_index.update()
+                    elo_engine.update()  # Faz o commit (partidas, versão e ratings das acabadas de finalizar)
+                    db.session.commit()
+                    self._stats['rows_updated'] += len(updates)
+                    if self.rollups is not None:
+                        # Agregados diários dos dias com partidas alteradas (ex.: acabadas de finalizar)
+                        self.rollups.refresh_days({
+                            (championship_id, match_date.date())
+                            for _, championship_id, match_date in existing.values() if match_date is not None
+                        })
+            except Exception:
+                db.session.rollback()
+                self._stats['errors'] += 1
+                # O armazém pode ter lido alterações que não chegaram a ser gravadas
+                try:
+                    match_store.refresh()
+                except Exception:
+                    pass
+    
+    def _publish(self, event: str, data):
+        """Envia o evento a todas as filas; clientes lentos (fila cheia) são desligados"""
+        with self._lock:
+            self._event_id += 1
+            message = self.format_event(event, data, self._event_id)
+            for subscriber in list(self._subscribers):
+                try:
+                    subscriber.put_nowait(message)
+                except queue.Full:
+                    self._subscribers.remove(subscriber)
+                    self._stats['dropped_subscribers'] += 1
+            self._stats['events'] += 1
+    
+    @staticmethod
+    def format_event(event: str, data, event_id: Optional[int] = None) -> str:
+        """Mensagem no formato text/event-stream"""
+        lines = [f'event: {event}']
+        if event_id is not None:
+            lines.append(f'id: {event_id}')
+        lines.append(f'data: {json.dumps(data, default=str)}')
+        return '\n'.join(lines) + '\n\n'
+    
+    def stats(self) -> Dict:
+        with self._lock:
+            return dict(self._stats, subscribers=len(self._subscribers), live_matches=len(self._snapshot),
+                        running=self._thread is not None and self._thread.is_alive())
@@ -0,0 +1,122 @@
+import threading
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import case, func, tuple_
+from src.models.football import db, Match, MarketDailyRollup
+
+# Último bin do histograma de golos (inclui todos os totais acima)
+GOAL_BINS = 7
+HISTOGRAM_COLUMNS = [f'goals_{goals}' for goals in range(GOAL_BINS)]
+COUNT_COLUMNS = ['matches', 'home_wins', 'draws', 'away_wins', 'home_goals', 'away_goals', 'both_scored'] + HISTOGRAM_COLUMNS
+
+class MarketRollups:
+    """
+    Agregados diários do mercado por (campeonato, dia)
+    Contagens de resultados, somas de golos, ambas marcam e histograma do
+    total de golos das partidas finalizadas. As linhas são recalculadas
+    por chave a partir de matches (um GROUP BY), por isso cada atualização
+    é idempotente e só toca nos dias afetados: o campeonato sincronizado ou
+    os dias das partidas que o ao vivo deu como finalizadas. A análise de
+    mercado de qualquer janela é a soma de algumas linhas desta tabela.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {'full_rebuilds': 0, 'partial_refreshes': 0, 'rows_written': 0}
+    
+    def rebuild(self) -> Dict:
+        """Recalcula todos os agregados"""
+        return self._refresh(None, None)
+    
+    def refresh_championships(self, championship_ids: Iterable[int]) -> Dict:
+        """Recalcula todos os dias dos campeonatos indicados"""
+        return self._refresh(list(set(championship_ids)), None)
+    
+    def refresh_days(self, keys: Iterable[Tuple[int, date]]) -> Dict:
+        """Recalcula os pares (campeonato, dia) indicados"""
+        return self._refresh(None, list(set(keys)))
+    
+    def _refresh(self, championship_ids: Optional[List[int]], keys: Optional[List[Tuple[int, date]]]) -> Dict:
+        if (championship_ids is not None and not championship_ids) or (keys is not None and not keys):
+            return {'mode': 'partial', 'rows_written': 0}
+        
+        with self._lock:
+            day = func.date(Match.match_date)
+            total = Match.home_score + Match.away_score
+            query = db.session.query(
+                Match.championship_id, day,
+                func.count(Match.id),
+                func.sum(case((Match.home_score > Match.away_score, 1), else_=0)),
+                func.sum(case((Match.home_score == Match.away_score, 1), else_=0)),
+                func.sum(case((Match.home_score < Match.away_score, 1), else_=0)),
+                func.sum(Match.home_score),
+                func.sum(Match.away_score),
+                func.sum(case(((Match.home_score > 0) & (Match.away_score > 0), 1), else_=0)),
+                *[func.sum(case((total == goals, 1), else_=0)) for goals in range(GOAL_BINS - 1)],
+                func.sum(case((total >= GOAL_BINS - 1, 1), else_=0))
+            ).filter(
+                Match.status == 'finalizado', Match.match_date.isnot(None),
+                # Sem marcador a partida não cabe em nenhuma faixa do histograma
+                Match.home_score.isnot(None), Match.away_score.isnot(None)
+            )
+            stale = db.session.query(MarketDailyRollup)
+            
+            if championship_ids is not None:
+                query = query.filter(Match.championship_id.in_(championship_ids))
+                stale = stale.filter(MarketDailyRollup.championship_id.in_(championship_ids))
+            if keys is not None:
+                query = query.filter(
+                    Match.championship_id.in_({championship_id for championship_id, _ in keys}),
+                    tuple_(Match.championship_id, day).in_([(c, d.isoformat()) for c, d in keys])
+                )
+                stale = stale.filter(tuple_(MarketDailyRollup.championship_id, MarketDailyRollup.day).in_(keys))
+            
+            now = datetime.utcnow()
+            rows = [
+                dict(zip(COUNT_COLUMNS, (int(value or 0) for value in values)),
+                     championship_id=championship_id, day=date.fromisoformat(match_day), updated_at=now)
+                for championship_id, match_day, *values in query.group_by(Match.championship_id, day).all()
+            ]
+            
+            stale.delete(synchronize_session=False)
+            if rows:
+                db.session.execute(MarketDailyRollup.__table__.insert(), rows)
+            db.session.commit()
+            
+            full = championship_ids is None and keys is None
+            self._stats['full_rebuilds' if full else 'partial_refreshes'] += 1
+            self._stats['rows_written'] += len(rows)
+            return {'mode': 'full' if full else 'partial', 'rows_written': len(rows)}
+    
+    @staticmethod
+    def summary_query(date_from: Optional[date] = None, date_to: Optional[date] = None,
+                      championship_id: Optional[int] = None):
+        """Query das somas dos agregados de uma janela (dias inclusivos), opcionalmente de um campeonato"""
+        query = db.session.query(
+            func.count(MarketDailyRollup.id),
+            *[func.sum(getattr(MarketDailyRollup, column)) for column in COUNT_COLUMNS]
+        )
+        if date_from is not None:
+            query = query.filter(MarketDailyRollup.day >= date_from)
+        if date_to is not None:
+            query = query.filter(MarketDailyRollup.day <= date_to)
+        if championship_id is not None:
+            query = query.filter(MarketDailyRollup.championship_id == championship_id)
+        return query
+    
+    @staticmethod
+    def summarize(date_from: Optional[date] = None, date_to: Optional[date] = None,
+                  championship_id: Optional[int] = None) -> Dict:
+        """Somas dos agregados de uma janela (dias inclusivos), opcionalmente de um campeonato"""
+        rollup_rows, *totals = MarketRollups.summary_query(date_from, date_to, championship_id).one()
+        summary = dict(zip(COUNT_COLUMNS, (int(value or 0) for value in totals)))
+        summary['goal_histogram'] = [summary.pop(column) for column in HISTOGRAM_COLUMNS]
+        summary['rollup_rows'] = rollup_rows
+        return summary
+    
+    def stats(self) -> Dict:
+        with self._lock:
+            return dict(self._stats)
+
+# Agregados partilhados pelas rotas, jobs e poller ao vivo
+market_rollups = MarketRollups()
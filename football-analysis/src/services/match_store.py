@@ -0,0 +1,181 @@
+import threading
+import numpy as np
+from typing import Dict, List, Optional
+from src.models.football import db, Match
+from src.services.data_version import data_version
+
+# Códigos fixos para os estados conhecidos da API (novos estados recebem códigos seguintes)
+STATUS_CODES = {
+    'agendado': 0,
+    'andamento': 1,
+    'finalizado': 2,
+    'adiado': 3,
+    'cancelado': 4
+}
+FINISHED = STATUS_CODES['finalizado']
+
+class MatchColumns:
+    """Snapshot imutável das partidas em formato colunar (ordenado por data)"""
+    
+    def __init__(self, rows: List[tuple], status_names: List[str]):
+        n = len(rows)
+        columns = list(zip(*rows)) if rows else [()] * 9
+        
+        self.match_id = np.array(columns[0], dtype=np.int64)
+        self.api_id = np.array(columns[1], dtype=np.int64)
+        self.home_id = np.array(columns[2], dtype=np.int64)
+        self.away_id = np.array(columns[3], dtype=np.int64)
+        self.home_score = np.array([s or 0 for s in columns[4]], dtype=np.int16)
+        self.away_score = np.array([s or 0 for s in columns[5]], dtype=np.int16)
+        self.status = np.array(columns[6], dtype=np.int8)
+        self.match_date = np.array(columns[7], dtype='datetime64[us]')
+        self.championship_id = np.array(columns[8], dtype=np.int64)
+        self.status_names = status_names
+        self.size = n
+        
+        self.team_index = self._build_team_index()
+    
+    def _build_team_index(self) -> Dict[int, np.ndarray]:
+        """Índice por equipa: posições das suas partidas, por ordem cronológica"""
+        if self.size == 0:
+            return {}
+        
+        teams = np.concatenate([self.home_id, self.away_id])
+        rows = np.concatenate([np.arange(self.size), np.arange(self.size)])
+        order = np.lexsort((rows, teams))
+        teams = teams[order]
+        rows = rows[order]
+        
+        unique_teams, starts = np.unique(teams, return_index=True)
+        ends = np.append(starts[1:], len(teams))
+        return {
+            int(team_id): rows[start:end]
+            for team_id, start, end in zip(unique_teams, starts, ends)
+        }
+
+class MatchStore:
+    """
+    Armazém colunar em memória (NumPy) com todas as partidas
+    Partilhado pelo processo e atualizado a partir do SQLite após cada
+    sincronização. O histórico de uma equipa é um slice do índice por equipa,
+    sem percorrer a lista completa de partidas.
+    """
+    
+    def __init__(self):
+        self._columns: Optional[MatchColumns] = None
+        self._lock = threading.Lock()
+        self.version = 0
+    
+    def refresh(self) -> MatchColumns:
+        """Recarrega todas as partidas da base de dados"""
+        with self._lock:
+            rows = db.session.query(
+                Match.id, Match.api_id, Match.home_team_id, Match.away_team_id,
+                Match.home_score, Match.away_score, Match.status,
+                Match.match_date, Match.championship_id
+            ).order_by(Match.match_date, Match.id).all()
+            
+            status_codes = dict(STATUS_CODES)
+            encoded = []
+            for row in rows:
+                code = status_codes.setdefault(row[6], len(status_codes))
+                encoded.append(tuple(row[:6]) + (code,) + tuple(row[7:]))
+            
+            status_names = [name for name, _ in sorted(status_codes.items(), key=lambda item: item[1])]
+            self._columns = MatchColumns(encoded, status_names)
+            self.version += 1
+            return self._columns
+    
+    def columns(self) -> MatchColumns:
+        """Snapshot atual (carregado na primeira utilização)"""
+        columns = self._columns
+        if columns is None:
+            columns = self.refresh()
+        return columns
+    
+    def team_indices(self, team_id: int) -> np.ndarray:
+        """Posições das partidas de uma equipa no snapshot"""
+        return self.columns().team_index.get(team_id, np.empty(0, dtype=np.int64))
+    
+    def head_to_head_indices(self, team1_id: int, team2_id: int) -> np.ndarray:
+        """Posições das partidas entre duas equipas"""
+        return np.intersect1d(self.team_indices(team1_id), self.team_indices(team2_id), assume_unique=True)
+    
+    def team_matches(self, team_id: int) -> List[Dict]:
+        """
+        Histórico de uma equipa no formato usado pelo AdvancedStatsCalculator
+        (is_home, goals_for, goals_against, status, match_date)
+        """
+        columns = self.columns()
+        idx = self.team_indices(team_id)
+        
+        is_home = columns.home_id[idx] == team_id
+        goals_for = np.where(is_home, columns.home_score[idx], columns.away_score[idx])
+        goals_against = np.where(is_home, columns.away_score[idx], columns.home_score[idx])
+        
+        return [
+            {
+                'is_home': home,
+                'goals_for': gf,
+                'goals_against': ga,
+                'status': columns.status_names[status],
+                'match_date': match_date
+            }
+            for home, gf, ga, status, match_date in zip(
+                is_home.tolist(), goals_for.tolist(), goals_against.tolist(),
+                columns.status[idx].tolist(), columns.match_date[idx].tolist()
+            )
+        ]
+    
+    def appearances(self, rows: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+        """
+        Uma linha por participação (equipa, partida) nas posições `rows`
+        (todas por omissão), por ordem cronológica - entrada do BatchStatsCalculator
+        """
+        columns = self.columns()
+        if rows is None:
+            rows = np.arange(columns.size)
+        
+        def interleave(home_values, away_values):
+            return np.column_stack((home_values, away_values)).ravel()
+        
+        home_score = columns.home_score[rows]
+        away_score = columns.away_score[rows]
+        finished = columns.status[rows] == FINISHED
+        match_date = columns.match_date[rows]
+        
+        team_id = interleave(columns.home_id[rows], columns.away_id[rows])
+        team_ids, team_idx = np.unique(team_id, return_inverse=True)
+        
+        return {
+            'team_ids': team_ids,
+            'team_idx': team_idx,
+            'goals_for': interleave(home_score, away_score),
+            'goals_against': interleave(away_score, home_score),
+            'is_home': interleave(np.ones(len(rows), dtype=bool), np.zeros(len(rows), dtype=bool)),
+            'finished': interleave(finished, finished),
+            'match_date': interleave(match_date, match_date)
+        }
+    
+    def match_dicts(self, indices: np.ndarray) -> List[Dict]:
+        """Converte posições do snapshot em dicts de partida (formato das rotas)"""
+        columns = self.columns()
+        return [
+            {
+                'home_team_id': home_id,
+                'away_team_id': away_id,
+                'home_score': home_score,
+                'away_score': away_score,
+                'status': columns.status_names[status],
+                'match_date': match_date
+            }
+            for home_id, away_id, home_score, away_score, status, match_date in zip(
+                columns.home_id[indices].tolist(), columns.away_id[indices].tolist(),
+                columns.home_score[indices].tolist(), columns.away_score[indices].tolist(),
+                columns.status[indices].tolist(), columns.match_date[indices].tolist()
+            )
+        ]
+
+# Instância partilhada pelo processo (recarregada quando outro processo altera os dados)
+match_store = MatchStore()
+data_version.on_external_change(match_store.refresh)
@@ -0,0 +1,180 @@
+import re
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+from flask import Response, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Limites (segundos) dos buckets do histograma de latência
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Limites do histograma de queries SQL por pedido (torna visíveis padrões N+1)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250)
+# IDs nos caminhos da API viram {id} (evita uma série por partida/equipa)
+PATH_IDS = re.compile(r'/\d+')
+
+class RequestStats:
+    """Contadores do pedido em curso (por thread)"""
+    
+    __slots__ = ('started', 'sql_count', 'sql_time', 'upstream_count', 'upstream_time')
+    
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.upstream_count = 0
+        self.upstream_time = 0.0
+
+class Histogram:
+    """Histograma cumulativo no formato Prometheus"""
+    
+    __slots__ = ('bounds', 'counts', 'total', 'count')
+    
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0.0
+        self.count = 0
+    
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.count += 1
+
+class RequestMetrics:
+    """
+    Instrumentação por endpoint
+    Regista por pedido a latência, o número e tempo das queries SQLAlchemy
+    (eventos do Engine) e o tempo gasto nas chamadas ao FootballAPIService.
+    Expõe tudo em /metrics (formato de texto Prometheus) e resume cada
+    pedido no cabeçalho Server-Timing.
+    """
+    
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._latency: Dict[str, Histogram] = {}
+        self._queries: Dict[str, Histogram] = {}
+        self._requests: Dict[Tuple[str, str], int] = {}
+        self._sql_time: Dict[str, float] = {}
+        self._upstream: Dict[Tuple[str, str], List[float]] = {}  # (endpoint, caminho) -> [chamadas, segundos]
+        self._listening = False
+    
+    def init_app(self, app):
+        """Liga os hooks do Flask, os eventos SQL e a rota /metrics"""
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        app.add_url_rule('/metrics', 'metrics', self.metrics_view)
+        
+        if not self._listening:
+            event.listen(Engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', self._after_cursor_execute)
+            self._listening = True
+    
+    @property
+    def current(self) -> Optional[RequestStats]:
+        return getattr(self._local, 'stats', None)
+    
+    def _before_request(self):
+        self._local.stats = RequestStats()
+    
+    def _after_request(self, response):
+        stats = self.current
+        if stats is None:
+            return response
+        
+        endpoint = request.endpoint or 'unknown'
+        elapsed = time.perf_counter() - stats.started
+        with self._lock:
+            self._latency.setdefault(endpoint, Histogram(LATENCY_BUCKETS)).observe(elapsed)
+            self._queries.setdefault(endpoint, Histogram(QUERY_COUNT_BUCKETS)).observe(stats.sql_count)
+            key = (endpoint, str(response.status_code))
+            self._requests[key] = self._requests.get(key, 0) + 1
+            self._sql_time[endpoint] = self._sql_time.get(endpoint, 0.0) + stats.sql_time
+        
+        response.headers['Server-Timing'] = ', '.join([
+            f'app;dur={elapsed * 1000:.1f}',
+            f'db;dur={stats.sql_time * 1000:.1f};desc="{stats.sql_count} queries"',
+            f'upstream;dur={stats.upstream_time * 1000:.1f};desc="{stats.upstream_count} calls"'
+        ])
+        return response
+    
+    def _teardown_request(self, exc=None):
+        self._local.stats = None
+    
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+    
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info['query_started'].pop()
+        stats = self.current
+        if stats is not None:
+            stats.sql_count += 1
+            stats.sql_time += time.perf_counter() - started
+    
+    @contextmanager
+    def upstream_call(self, path: str):
+        """Mede uma chamada à API externa (atribuída ao endpoint do pedido em curso)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            stats = self.current
+            endpoint = request.endpoint if stats is not None and has_request_context() else 'background'
+            if stats is not None:
+                stats.upstream_count += 1
+                stats.upstream_time += elapsed
+            with self._lock:
+                totals = self._upstream.setdefault((endpoint or 'unknown', PATH_IDS.sub('/{id}', path)), [0, 0.0])
+                totals[0] += 1
+                totals[1] += elapsed
+    
+    def render(self) -> str:
+        """Métricas no formato de texto Prometheus"""
+        lines = []
+        with self._lock:
+            lines += ['# HELP http_requests_total Pedidos por endpoint e código de estado',
+                      '# TYPE http_requests_total counter']
+            for (endpoint, status), count in sorted(self._requests.items()):
+                lines.append(f'http_requests_total{{endpoint="{endpoint}",status="{status}"}} {count}')
+            
+            lines += self._render_histogram('http_request_duration_seconds', 'Latência por endpoint', self._latency)
+            lines += self._render_histogram('sql_queries_per_request', 'Queries SQL por pedido', self._queries)
+            
+            lines += ['# HELP sql_query_duration_seconds_total Tempo total em queries SQL por endpoint',
+                      '# TYPE sql_query_duration_seconds_total counter']
+            for endpoint, total in sorted(self._sql_time.items()):
+                lines.append(f'sql_query_duration_seconds_total{{endpoint="{endpoint}"}} {total:.6f}')
+            
+            lines += ['# HELP upstream_requests_total Chamadas à API de futebol por endpoint e caminho',
+                      '# TYPE upstream_requests_total counter']
+            for (endpoint, path), (count, _) in sorted(self._upstream.items()):
+                lines.append(f'upstream_requests_total{{endpoint="{endpoint}",path="{path}"}} {count}')
+            lines += ['# HELP upstream_request_duration_seconds_total Tempo total nas chamadas à API de futebol',
+                      '# TYPE upstream_request_duration_seconds_total counter']
+            for (endpoint, path), (_, total) in sorted(self._upstream.items()):
+                lines.append(f'upstream_request_duration_seconds_total{{endpoint="{endpoint}",path="{path}"}} {total:.6f}')
+        return '\n'.join(lines) + '\n'
+    
+    @staticmethod
+    def _render_histogram(name: str, description: str, histograms: Dict[str, Histogram]) -> List[str]:
+        lines = [f'# HELP {name} {description}', f'# TYPE {name} histogram']
+        for endpoint, histogram in sorted(histograms.items()):
+            cumulative = 0
+            for bound, count in zip(histogram.bounds, histogram.counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{{endpoint="{endpoint}",le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{endpoint="{endpoint}",le="+Inf"}} {histogram.count}')
+            lines.append(f'{name}_sum{{endpoint="{endpoint}"}} {histogram.total:.6f}')
+            lines.append(f'{name}_count{{endpoint="{endpoint}"}} {histogram.count}')
+        return lines
+    
+    def metrics_view(self):
+        return Response(self.render(), mimetype='text/plain; version=0.0.4')
+
+# Instância partilhada pela aplicação
+request_metrics = RequestMetrics()
@@ -0,0 +1,148 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Dict, Optional, Tuple
+from flask import Response, make_response, request
+from src.services.data_version import DataVersion, data_version
+
+class CachedResponse:
+    """Corpo, cabeçalhos e ETag de uma resposta 200 guardada"""
+    
+    __slots__ = ('body', 'headers', 'mimetype', 'etag', 'version', 'stored_at', 'ttl')
+    
+    def __init__(self, body: bytes, headers: list, mimetype: str, etag: str, version: int, ttl: Optional[float]):
+        self.body = body
+        self.headers = headers
+        self.mimetype = mimetype
+        self.etag = etag
+        self.version = version
+        self.stored_at = time.time()
+        self.ttl = ttl
+    
+    def is_fresh(self) -> bool:
+        return self.ttl is None or (time.time() - self.stored_at) < self.ttl
+
+class ResponseCache:
+    """
+    Cache em memória das respostas dos nossos endpoints de leitura
+    A chave é (endpoint, argumentos da query, versão dos dados do namespace
+    do cache); como a versão entra na chave, uma sincronização invalida tudo
+    de uma vez, mas escritas de outros namespaces (ex.: previsões guardadas)
+    não. A versão é lida uma vez, antes de executar a rota: a resposta fica
+    guardada sob a versão que os dados já tinham, nunca sob uma mais recente.
+    Cada resposta leva um ETag forte (hash do corpo) e um If-None-Match igual
+    é respondido com 304 sem executar a rota. Entradas LRU, despejadas
+    quando o total de bytes passa de max_bytes.
+    """
+    
+    # Cabeçalhos gerados pelo Flask em cada resposta (não são guardados)
+    SKIPPED_HEADERS = {'content-length', 'content-type', 'etag', 'date', 'set-cookie'}
+    
+    def __init__(self, version: DataVersion, namespace: str = DataVersion.DEFAULT_NAMESPACE,
+                 max_bytes: int = 32 * 1024 * 1024):
+        self.version = version
+        self.namespace = namespace
+        self.max_bytes = max_bytes
+        self._latest_version = 0
+        self._entries: 'OrderedDict[Tuple, CachedResponse]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'not_modified': 0, 'stores': 0, 'evictions': 0}
+    
+    def key(self, version: int, view_args: Optional[Dict] = None) -> Tuple:
+        """Chave do pedido atual para a versão lida no início do pedido"""
+        args = tuple(sorted(request.args.items(multi=True)))
+        return request.endpoint, args, tuple(sorted((view_args or {}).items())), version
+    
+    def get(self, key: Tuple) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and not entry.is_fresh():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return entry
+    
+    def store(self, key: Tuple, response: Response, ttl: Optional[float]) -> CachedResponse:
+        body = response.get_data()
+        headers = [(name, value) for name, value in response.headers.items() if name.lower() not in self.SKIPPED_HEADERS]
+        version = key[-1]
+        entry = CachedResponse(body, headers, response.mimetype, hashlib.sha256(body).hexdigest()[:32], version, ttl)
+        
+        with self._lock:
+            # Entradas de versões antigas já não podem ser servidas
+            if version > self._latest_version:
+                self._latest_version = version
+                for old_key in [k for k in self._entries if k[-1] < version]:
+                    self._remove(old_key)
+            
+            if key in self._entries:
+                self._remove(key)
+            # Um pedido que começou antes de outro já ter visto uma versão mais recente não é guardado
+            if version == self._latest_version and len(body) <= self.max_bytes:
+                self._entries[key] = entry
+                self._bytes += len(body)
+                self._stats['stores'] += 1
+                while self._bytes > self.max_bytes:
+                    self._remove(next(iter(self._entries)))
+                    self._stats['evictions'] += 1
+        return entry
+    
+    def _remove(self, key: Tuple):
+        entry = self._entries.pop(key)
+        self._bytes -= len(entry.body)
+    
+    def respond(self, entry: CachedResponse) -> Response:
+        """Resposta a partir de uma entrada (304 se o cliente já tiver o ETag)"""
+        if entry.etag in request.if_none_match:
+            with self._lock:
+                self._stats['not_modified'] += 1
+            response = Response(status=304)
+        else:
+            response = Response(entry.body, mimetype=entry.mimetype)
+            response.headers.extend(entry.headers)
+        response.set_etag(entry.etag)
+        response.headers['X-Data-Version'] = str(entry.version)
+        return response
+    
+    def cached(self, ttl: Optional[float] = None):
+        """
+        Decorador para rotas GET; ttl (segundos) limita entradas cujo
+        conteúdo depende também da hora atual (ex.: últimos 30 dias)
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                key = self.key(self.version.version_of(self.namespace), kwargs)
+                entry = self.get(key)
+                if entry is None:
+                    response = make_response(view(*args, **kwargs))
+                    if response.status_code != 200:
+                        return response
+                    entry = self.store(key, response, ttl)
+                return self.respond(entry)
+            return wrapper
+        return decorator
+    
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats, entries=len(self._entries), bytes=self._bytes, max_bytes=self.max_bytes)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        stats['version'] = self.version.version_of(self.namespace)
+        return stats
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._latest_version = 0
+
+# Cache partilhado pelos blueprints
+response_cache = ResponseCache(data_version)
@@ -0,0 +1,237 @@
+import os
+import threading
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+from src.services.match_store import MatchStore, FINISHED, match_store
+
+# Estados que já não serão jogados (o resto conta como partida por disputar)
+CLOSED_STATUSES = ('finalizado', 'cancelado')
+
+def _simulate_chunk(seed_sequence: np.random.SeedSequence, n_simulations: int,
+                    home_expected: np.ndarray, away_expected: np.ndarray,
+                    home_incidence: np.ndarray, away_incidence: np.ndarray,
+                    base_points: np.ndarray, base_goal_diff: np.ndarray,
+                    base_goals_for: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Joga as partidas restantes n_simulations vezes e devolve a contagem de
+    posições finais (equipas x posições) e a soma dos pontos de cada equipa
+    Função de módulo para poder correr num ProcessPoolExecutor.
+    """
+    rng = np.random.default_rng(seed_sequence)
+    n_teams = len(base_points)
+    n_fixtures = len(home_expected)
+    
+    home_goals = rng.poisson(home_expected, size=(n_simulations, n_fixtures)).astype(np.float64)
+    away_goals = rng.poisson(away_expected, size=(n_simulations, n_fixtures)).astype(np.float64)
+    
+    home_points = np.where(home_goals > away_goals, 3.0, np.where(home_goals == away_goals, 1.0, 0.0))
+    away_points = np.where(away_goals > home_goals, 3.0, np.where(home_goals == away_goals, 1.0, 0.0))
+    
+    # Acumula por equipa com um produto pelas matrizes de incidência (partidas x equipas)
+    points = base_points + home_points @ home_incidence + away_points @ away_incidence
+    goals_for = base_goals_for + home_goals @ home_incidence + away_goals @ away_incidence
+    goals_against = away_goals @ home_incidence + home_goals @ away_incidence
+    goal_diff = base_goal_diff + goals_for - base_goals_for - goals_against
+    
+    # Critérios: pontos, saldo de golos, golos marcados; empates totais por sorteio
+    draw = rng.random((n_simulations, n_teams))
+    order = np.lexsort((draw, -goals_for, -goal_diff, -points), axis=-1)
+    positions = np.empty_like(order)
+    np.put_along_axis(positions, order, np.arange(n_teams)[None, :], axis=1)
+    
+    counts = np.bincount(
+        (np.arange(n_teams)[None, :] * n_teams + positions).ravel(),
+        minlength=n_teams * n_teams
+    ).reshape(n_teams, n_teams)
+    
+    return {'position_counts': counts, 'points_sum': points.sum(axis=0)}
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+def _process_pool() -> ProcessPoolExecutor:
+    """Pool de processos partilhado (criado na primeira simulação paralela)"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=os.cpu_count() or 1)
+        return _pool
+
+class SeasonSimulator:
+    """
+    Simulador Monte Carlo do resto de um campeonato
+    Parte da classificação atual (partidas finalizadas) e joga as partidas
+    por disputar com golos de Poisson, em lotes vetorizados de simulações.
+    A força de cada equipa é o ataque/defesa relativos à média da liga,
+    regredidos para a média com `prior_matches` jogos fictícios. A semente
+    fixa torna o resultado reprodutível, com ou sem processos paralelos
+    (cada lote tem a sua própria semente derivada).
+    """
+    
+    MIN_EXPECTED_GOALS = 0.05
+    
+    def __init__(self, store: MatchStore, chunk_size: int = 10000, prior_matches: float = 5.0,
+                 max_chunk_cells: int = 1000000):
+        self.store = store
+        self.chunk_size = chunk_size
+        self.prior_matches = prior_matches
+        # Limite de simulações x partidas por lote (cada array do lote ocupa 8 bytes por célula)
+        self.max_chunk_cells = max_chunk_cells
+    
+    def prepare(self, championship_id: int) -> Optional[Dict]:
+        """Classificação atual, partidas restantes e golos esperados de cada uma"""
+        columns = self.store.columns()
+        rows = np.flatnonzero(columns.championship_id == championship_id)
+        if len(rows) == 0:
+            return None
+        
+        home_id = columns.home_id[rows]
+        away_id = columns.away_id[rows]
+        team_ids, team_idx = np.unique(np.concatenate([home_id, away_id]), return_inverse=True)
+        home_idx = team_idx[:len(rows)]
+        away_idx = team_idx[len(rows):]
+        n_teams = len(team_ids)
+        
+        status = columns.status[rows]
+        finished = status == FINISHED
+        closed_codes = [columns.status_names.index(name) for name in CLOSED_STATUSES if name in columns.status_names]
+        remaining = ~np.isin(status, closed_codes)
+        
+        home_score = columns.home_score[rows].astype(np.float64)
+        away_score = columns.away_score[rows].astype(np.float64)
+        
+        def per_team(idx, values):
+            return np.bincount(idx, weights=values, minlength=n_teams)
+        
+        f_home, f_away = home_idx[finished], away_idx[finished]
+        f_home_score, f_away_score = home_score[finished], away_score[finished]
+        home_points = np.where(f_home_score > f_away_score, 3.0, np.where(f_home_score == f_away_score, 1.0, 0.0))
+        away_points = np.where(f_away_score > f_home_score, 3.0, np.where(f_home_score == f_away_score, 1.0, 0.0))
+        
+        played_home = per_team(f_home, None)
+        played_away = per_team(f_away, None)
+        scored_home = per_team(f_home, f_home_score)
+        scored_away = per_team(f_away, f_away_score)
+        conceded_home = per_team(f_home, f_away_score)
+        conceded_away = per_team(f_away, f_home_score)
+        
+        points = per_team(f_home, home_points) + per_team(f_away, away_points)
+        goals_for = scored_home + scored_away
+        goals_against = conceded_home + conceded_away
+        
+        # Médias da liga (golos da equipa da casa / visitante por jogo)
+        n_finished = max(1, int(finished.sum()))
+        league_home = f_home_score.sum() / n_finished if finished.any() else 1.4
+        league_away = f_away_score.sum() / n_finished if finished.any() else 1.1
+        league_avg = max((league_home + league_away) / 2, self.MIN_EXPECTED_GOALS)
+        
+        # Ataque e defesa relativos, regredidos para 1.0 com jogos fictícios
+        played = played_home + played_away
+        attack = (goals_for + self.prior_matches * league_avg) / ((played + self.prior_matches) * league_avg)
+        defence = (goals_against + self.prior_matches * league_avg) / ((played + self.prior_matches) * league_avg)
+        
+        r_home, r_away = home_idx[remaining], away_idx[remaining]
+        home_expected = np.maximum(league_home * attack[r_home] * defence[r_away], self.MIN_EXPECTED_GOALS)
+        away_expected = np.maximum(league_away * attack[r_away] * defence[r_home], self.MIN_EXPECTED_GOALS)
+        
+        home_incidence = np.zeros((len(r_home), n_teams))
+        away_incidence = np.zeros((len(r_away), n_teams))
+        home_incidence[np.arange(len(r_home)), r_home] = 1.0
+        away_incidence[np.arange(len(r_away)), r_away] = 1.0
+        
+        return {
+            'team_ids': team_ids,
+            'points': points,
+            'goals_for': goals_for,
+            'goal_diff': goals_for - goals_against,
+            'played': played.astype(np.int64),
+            'attack': attack,
+            'defence': defence,
+            'home_expected': home_expected,
+            'away_expected': away_expected,
+            'home_incidence': home_incidence,
+            'away_incidence': away_incidence,
+            'matches_remaining': int(remaining.sum())
+        }
+    
+    def simulate(self, championship_id: int, n_simulations: int = 100000, seed: int = 42,
+                 workers: int = 0) -> Optional[Dict]:
+        """
+        Distribuição das posições finais de cada equipa
+        workers > 1 reparte os lotes pelo pool de processos partilhado; o
+        resultado é o mesmo para a mesma semente, com ou sem processos.
+        """
+        prepared = self.prepare(championship_id)
+        if prepared is None:
+            return None
+        
+        n_teams = len(prepared['team_ids'])
+        chunk_size = max(1, min(self.chunk_size, self.max_chunk_cells // max(1, prepared['matches_remaining'])))
+        chunks = [
+            min(chunk_size, n_simulations - start)
+            for start in range(0, n_simulations, chunk_size)
+        ]
+        seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+        arguments = (
+            prepared['home_expected'], prepared['away_expected'],
+            prepared['home_incidence'], prepared['away_incidence'],
+            prepared['points'], prepared['goal_diff'], prepared['goals_for']
+        )
+        
+        if workers and workers > 1 and len(chunks) > 1:
+            executor = _process_pool()
+            futures = [executor.submit(_simulate_chunk, s, n, *arguments) for s, n in zip(seeds, chunks)]
+            results = [future.result() for future in futures]
+        else:
+            results = [_simulate_chunk(s, n, *arguments) for s, n in zip(seeds, chunks)]
+        
+        position_counts = np.zeros((n_teams, n_teams), dtype=np.int64)
+        points_sum = np.zeros(n_teams)
+        for result in results:
+            position_counts += result['position_counts']
+            points_sum += result['points_sum']
+        
+        return {
+            'team_ids': prepared['team_ids'],
+            'current_points': prepared['points'],
+            'goal_diff': prepared['goal_diff'],
+            'played': prepared['played'],
+            'matches_remaining': prepared['matches_remaining'],
+            'simulations': n_simulations,
+            'seed': seed,
+            'position_probabilities': position_counts / max(1, n_simulations),
+            'expected_points': points_sum / max(1, n_simulations)
+        }
+    
+    @staticmethod
+    def summarize(result: Dict, names: Dict[int, str], title_spots: int = 1,
+                  top_spots: int = 4, relegation_spots: int = 4) -> List[Dict]:
+        """Probabilidades de título, top N e descida por equipa, ordenadas pelos pontos esperados"""
+        probabilities = result['position_probabilities']
+        n_teams = probabilities.shape[0]
+        relegation_spots = min(relegation_spots, n_teams)
+        positions = np.arange(1, n_teams + 1)
+        
+        summary = []
+        for i, team_id in enumerate(result['team_ids'].tolist()):
+            row = probabilities[i]
+            summary.append({
+                'team_id': team_id,
+                'team_name': names.get(team_id, 'Desconhecido'),
+                'matches_played': int(result['played'][i]),
+                'current_points': int(result['current_points'][i]),
+                'goal_difference': int(result['goal_diff'][i]),
+                'expected_points': round(float(result['expected_points'][i]), 2),
+                'expected_position': round(float(row @ positions), 2),
+                'title_probability': round(float(row[:title_spots].sum()) * 100, 2),
+                'top_probability': round(float(row[:top_spots].sum()) * 100, 2),
+                'relegation_probability': round(float(row[n_teams - relegation_spots:].sum()) * 100, 2) if relegation_spots else 0.0,
+                'position_probabilities': [round(float(p) * 100, 2) for p in row]
+            })
+        
+        summary.sort(key=lambda team: (-team['expected_points'], team['expected_position']))
+        return summary
+
+# Instância partilhada pelas rotas
+season_simulator = SeasonSimulator(match_store)
@@ -0,0 +1,111 @@
+import threading
+import numpy as np
+from typing import Dict, Iterable, List, Optional
+from src.models.football import db, Team, TeamStats
+from src.services.advanced_analytics import BatchStatsCalculator
+from src.services.data_version import DataVersion, data_version
+from src.services.elo_rating import EloRatingEngine, elo_engine
+from src.services.match_store import MatchStore, match_store
+
+class TeamFeatureSnapshot:
+    """
+    Snapshot em memória das features de cada equipa (api_id)
+    Junta TeamStats, rating ELO da liga e índice de forma, no formato
+    teams_data do OddsTargetSystem (as features que as regras dos cenários
+    1.25 e o modelo de golos leem). Fica associado a uma versão de dados: quando a versão
+    avança, só as equipas alteradas desde então são recarregadas.
+    Só entram equipas com TeamStats (como nas rotas originais).
+    """
+    
+    def __init__(self, store: MatchStore, ratings: EloRatingEngine, version: DataVersion):
+        self.store = store
+        self.ratings = ratings
+        self.version = version
+        self._features: Dict[int, Dict] = {}
+        self._snapshot_version: Optional[int] = None
+        self._lock = threading.Lock()
+        self._stats = {'full_rebuilds': 0, 'partial_rebuilds': 0, 'teams_reloaded': 0}
+    
+    def get(self, team_ids: Iterable[int]) -> Dict[int, Dict]:
+        """Features das equipas pedidas (as que não têm estatísticas ficam de fora)"""
+        features = self._current()
+        return {team_id: features[team_id] for team_id in team_ids if team_id in features}
+    
+    def get_team(self, team_id: int) -> Optional[Dict]:
+        return self._current().get(team_id)
+    
+    def _current(self) -> Dict[int, Dict]:
+        if self._snapshot_version != self.version.current:
+            self.refresh()
+        return self._features
+    
+    def refresh(self) -> Dict:
+        """Atualiza o snapshot para a versão de dados atual"""
+        with self._lock:
+            target = self.version.current
+            if self._snapshot_version == target:
+                return {'mode': 'current', 'teams_reloaded': 0}
+            
+            changed = None if self._snapshot_version is None else self.version.changed_teams(self._snapshot_version)
+            features = {team_id: dict(team) for team_id, team in self._features.items()} if changed is not None else {}
+            loaded = self._load(changed)
+            if changed is not None:
+                for team_id in changed:
+                    features.pop(team_id, None)
+            features.update(loaded)
+            
+            # Substituição atómica: leitores concorrentes veem o snapshot antigo ou o novo
+            self._features = features
+            self._snapshot_version = target
+            self._stats['full_rebuilds' if changed is None else 'partial_rebuilds'] += 1
+            self._stats['teams_reloaded'] += len(loaded)
+            return {'mode': 'full' if changed is None else 'partial', 'teams_reloaded': len(loaded)}
+    
+    def _load(self, team_ids: Optional[set]) -> Dict[int, Dict]:
+        """Features das equipas indicadas (None = todas) - uma query mais um passo vetorizado"""
+        if team_ids is not None and not team_ids:
+            return {}
+        
+        query = db.session.query(
+            Team.api_id, Team.popular_name, TeamStats.matches_played, TeamStats.goals_per_match,
+            TeamStats.goals_conceded_per_match, TeamStats.win_percentage
+        ).join(TeamStats, TeamStats.team_id == Team.id).order_by(TeamStats.id)
+        if team_ids is not None:
+            query = query.filter(Team.api_id.in_(list(team_ids)))
+        rows = query.all()
+        if not rows:
+            return {}
+        
+        api_ids = [row[0] for row in rows]
+        ratings = self.ratings.get_ratings(api_ids)
+        form = self._form_indices(api_ids if team_ids is not None else None)
+        
+        features = {}
+        for api_id, name, played, scored, conceded, win_percentage in rows:
+            if api_id in features:
+                continue  # Mais de uma linha de TeamStats: fica a primeira, como .first()
+            features[api_id] = {
+                'name': name,
+                'matches_played': played or 0,
+                'elo_rating': ratings[api_id],
+                'goals_per_match': scored or 0.0,
+                'goals_conceded_per_match': conceded or 0.0,
+                'win_percentage': win_percentage or 0.0,
+                'form_index': form.get(api_id, 0.5)
+            }
+        return features
+    
+    def _form_indices(self, team_ids: Optional[List[int]]) -> Dict[int, float]:
+        """Índice de forma (últimos 10 jogos) a partir do MatchStore"""
+        rows = None
+        if team_ids is not None:
+            indices = [self.store.team_indices(team_id) for team_id in team_ids]
+            rows = np.unique(np.concatenate(indices)) if indices else np.empty(0, dtype=np.int64)
+        store_ids, metrics = BatchStatsCalculator.calculate_from_store(self.store, rows)
+        return dict(zip(store_ids.tolist(), metrics['form_index'].tolist()))
+    
+    def stats(self) -> Dict:
+        return dict(self._stats, teams=len(self._features), version=self._snapshot_version)
+
+# Snapshot partilhado pelas rotas
+team_features = TeamFeatureSnapshot(match_store, elo_engine, data_version)
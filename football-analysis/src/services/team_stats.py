@@ -0,0 +1,151 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+from sqlalchemy import case, func, select, union_all
+from src.models.football import db, Team, Match, TeamStats
+from src.services.championship_sync import PhaseTimer
+from src.services.data_version import data_version
+from src.services.football_api import StatsCalculator
+
+class TeamStatsRecalculator:
+    """
+    Recalcula a tabela team_stats de forma set-based
+    Vitórias, empates, derrotas e golos de todas as equipas saem de um único
+    agregado SQL (GROUP BY sobre as participações casa + fora) e são gravados
+    com atualização/inserção em bloco. O modo incremental só recalcula as
+    equipas com partidas alteradas depois do seu TeamStats.last_updated.
+    """
+    
+    @staticmethod
+    def recalculate(mode: str = 'full') -> Dict:
+        """Recalcula estatísticas (mode: 'full' ou 'incremental')"""
+        if mode not in ('full', 'incremental'):
+            raise ValueError(f'Modo inválido: {mode}')
+        
+        timer = PhaseTimer()
+        
+        with timer.phase('select_teams'):
+            teams = {api_id: team_id for team_id, api_id in db.session.query(Team.id, Team.api_id).all()}
+            if mode == 'incremental':
+                team_api_ids = TeamStatsRecalculator.changed_team_ids()
+            else:
+                team_api_ids = list(teams)
+        
+        with timer.phase('aggregate'):
+            totals = TeamStatsRecalculator.aggregate(team_api_ids if mode == 'incremental' else None)
+        
+        with timer.phase('write'):
+            existing = {}
+            for stats_id, team_id in db.session.query(TeamStats.id, TeamStats.team_id).order_by(TeamStats.id).all():
+                existing.setdefault(team_id, stats_id)
+            
+            now = datetime.utcnow()
+            updates = []
+            inserts = []
+            for api_id in team_api_ids:
+                team_id = teams.get(api_id)
+                if team_id is None:
+                    continue
+                stats = StatsCalculator.calculate_averages(dict(totals.get(api_id, TeamStatsRecalculator._empty_totals())))
+                stats['last_updated'] = now
+                if team_id in existing:
+                    stats['id'] = existing[team_id]
+                    updates.append(stats)
+                else:
+                    stats['team_id'] = team_id
+                    inserts.append(stats)
+            
+            if updates:
+                db.session.bulk_update_mappings(TeamStats, updates)
+            if inserts:
+                db.session.bulk_insert_mappings(TeamStats, inserts)
+            data_version.bump('calculate-stats', team_api_ids if mode == 'incremental' else None)
+            db.session.commit()
+        
+        return {
+            'mode': mode,
+            'teams_updated': len(updates) + len(inserts),
+            'team_ids': team_api_ids,
+            'timings': timer.summary()
+        }
+    
+    @staticmethod
+    def aggregate(team_api_ids: Optional[List[int]] = None) -> Dict[int, Dict]:
+        """Totais por equipa (api_id) das partidas finalizadas, numa só query"""
+        appearances = TeamStatsRecalculator._appearances(finished_only=True)
+        goals_for = func.coalesce(appearances.c.goals_for, 0)
+        goals_against = func.coalesce(appearances.c.goals_against, 0)
+        
+        query = select(
+            appearances.c.team_id,
+            func.count(),
+            func.sum(case((goals_for > goals_against, 1), else_=0)),
+            func.sum(case((goals_for == goals_against, 1), else_=0)),
+            func.sum(case((goals_for < goals_against, 1), else_=0)),
+            func.sum(goals_for),
+            func.sum(goals_against)
+        ).group_by(appearances.c.team_id)
+        
+        if team_api_ids is not None:
+            if not team_api_ids:
+                return {}
+            query = query.where(appearances.c.team_id.in_(team_api_ids))
+        
+        totals = {}
+        for team_id, played, wins, draws, losses, scored, conceded in db.session.execute(query):
+            totals[team_id] = dict(
+                TeamStatsRecalculator._empty_totals(),
+                matches_played=played, wins=wins, draws=draws, losses=losses,
+                goals_for=scored, goals_against=conceded
+            )
+        return totals
+    
+    @staticmethod
+    def changed_team_ids() -> List[int]:
+        """
+        api_id das equipas sem estatísticas ou com partidas alteradas desde o
+        último cálculo (partidas sem updated_at contam como alteradas)
+        """
+        appearances = TeamStatsRecalculator._appearances(finished_only=False)
+        query = select(appearances.c.team_id).distinct().join(
+            Team, Team.api_id == appearances.c.team_id
+        ).outerjoin(
+            TeamStats, TeamStats.team_id == Team.id
+        ).where(
+            (TeamStats.id.is_(None)) | (appearances.c.updated_at.is_(None)) |
+            (appearances.c.updated_at > TeamStats.last_updated)
+        )
+        return [row[0] for row in db.session.execute(query)]
+    
+    @staticmethod
+    def _appearances(finished_only: bool):
+        """Participações (equipa, golos marcados, golos sofridos) casa + fora"""
+        home = select(
+            Match.home_team_id.label('team_id'),
+            Match.home_score.label('goals_for'),
+            Match.away_score.label('goals_against'),
+            Match.updated_at.label('updated_at')
+        )
+        away = select(
+            Match.away_team_id.label('team_id'),
+            Match.away_score.label('goals_for'),
+            Match.home_score.label('goals_against'),
+            Match.updated_at.label('updated_at')
+        )
+        if finished_only:
+            home = home.where(Match.status == 'finalizado')
+            away = away.where(Match.status == 'finalizado')
+        return union_all(home, away).subquery()
+    
+    @staticmethod
+    def _empty_totals() -> Dict:
+        return {
+            'matches_played': 0,
+            'wins': 0,
+            'draws': 0,
+            'losses': 0,
+            'goals_for': 0,
+            'goals_against': 0,
+            'goals_per_match': 0.0,
+            'goals_conceded_per_match': 0.0,
+            'win_percentage': 0.0
+        }
@@ -5,6 +5,8 @@ const API_BASE_URL = '/api';
 let appState = {
     teams: [],
     matches: [],
+    matchesCursor: null,
+    matchesTotal: 0,
     currentSection: 'dashboard',
     loading: false
 };
@@ -143,8 +145,11 @@ async function loadDashboardData() {
         const matches = await matchesResponse.json();
         const performance = await performanceResponse.json();
         
+        // Total de partidas (a listagem é paginada)
+        const totalMatches = parseInt(matchesResponse.headers.get('X-Total-Count'), 10);
+        
         // Atualizar estatísticas
-        updateDashboardStats(teams, matches, performance);
+        updateDashboardStats(teams, matches, performance, totalMatches);
         
         // Carregar oportunidades de hoje
         loadTodayOpportunities();
@@ -157,9 +162,9 @@ async function loadDashboardData() {
     }
 }
 
-function updateDashboardStats(teams, matches, performance) {
+function updateDashboardStats(teams, matches, performance, totalMatches) {
     document.getElementById('total-teams').textContent = teams.length || 0;
-    document.getElementById('total-matches').textContent = matches.length || 0;
+    document.getElementById('total-matches').textContent = totalMatches || matches.length || 0;
     
     if (performance.overall_metrics) {
         document.getElementById('success-rate').textContent = `${performance.overall_metrics.win_rate || 0}%`;
@@ -312,11 +317,34 @@ function filterTeams() {
     `).join('');
 }
 
-async function loadMatches() {
+async function loadMatches(append = false) {
     try {
-        const response = await fetch(`${API_BASE_URL}/football/matches`);
+        // Filtros aplicados no servidor (a listagem é paginada por cursor)
+        const params = new URLSearchParams();
+        const championshipFilter = document.getElementById('championship-filter');
+        const statusFilter = document.getElementById('status-filter');
+        
+        if (championshipFilter && championshipFilter.value) {
+            params.set('championship_id', championshipFilter.value);
+        }
+        
+        if (statusFilter && statusFilter.value) {
+            params.set('status', statusFilter.value);
+        }
+        
+        if (append && appState.matchesCursor) {
+            params.set('cursor', appState.matchesCursor);
+        }
+        
+        const response = await fetch(`${API_BASE_URL}/football/matches?${params}`);
         const matches = await response.json();
-        appState.matches = matches;
+        appState.matches = append ? appState.matches.concat(matches) : matches;
+        appState.matchesCursor = response.headers.get('X-Next-Cursor');
+        
+        // O total só vem na primeira página
+        if (!append) {
+            appState.matchesTotal = parseInt(response.headers.get('X-Total-Count'), 10) || matches.length;
+        }
         
         if (appState.currentSection === 'matches') {
             displayMatches();
@@ -327,6 +355,10 @@ async function loadMatches() {
     }
 }
 
+function loadMoreMatches() {
+    return loadMatches(true);
+}
+
 function displayMatches() {
     const tbody = document.getElementById('matches-tbody');
     
@@ -361,6 +393,19 @@ function displayMatches() {
             </td>
         </tr>
     `).join('');
+    
+    // Página seguinte (cursor devolvido pelo servidor)
+    if (appState.matchesCursor) {
+        tbody.innerHTML += `
+            <tr>
+                <td colspan="7" class="text-center">
+                    <button class="btn btn-sm btn-secondary" onclick="loadMoreMatches()">
+                        Carregar mais (${appState.matches.length} de ${appState.matchesTotal})
+                    </button>
+                </td>
+            </tr>
+        `;
+    }
 }
 
 function getStatusClass(status) {
@@ -373,43 +418,9 @@ function getStatusClass(status) {
 }
 
 function filterMatches() {
-    // Implementar filtros de partidas
-    const championship = document.getElementById('championship-filter').value;
-    const status = document.getElementById('status-filter').value;
-    
-    let filteredMatches = appState.matches;
-    
-    if (championship) {
-        filteredMatches = filteredMatches.filter(match => 
-            match.championship_name.includes(championship)
-        );
-    }
-    
-    if (status) {
-        filteredMatches = filteredMatches.filter(match => match.status === status);
-    }
-    
-    // Atualizar tabela com partidas filtradas
-    const tbody = document.getElementById('matches-tbody');
-    tbody.innerHTML = filteredMatches.map(match => `
-        <tr>
-            <td>${match.match_date ? new Date(match.match_date).toLocaleDateString('pt-PT') : 'N/A'}</td>
-            <td>${match.home_team}</td>
-            <td class="text-center">
-                ${match.status === 'finalizado' ? `${match.home_score} - ${match.away_score}` : '-'}
-            </td>
-            <td>${match.away_team}</td>
-            <td>${match.championship_name}</td>
-            <td>
-                <span class="badge ${getStatusClass(match.status)}">${match.status}</span>
-            </td>
-            <td>
-                <button class="btn btn-sm btn-secondary" onclick="analyzeSpecificMatch(${match.api_id})">
-                    <i class="fas fa-analytics"></i>
-                </button>
-            </td>
-        </tr>
-    `).join('');
+    // Os filtros voltam à primeira página
+    appState.matchesCursor = null;
+    loadMatches();
 }
 
 // Funções de Odds 1.25
@@ -783,22 +794,25 @@ async function syncData() {
         showLoading();
         showToast('Iniciando sincronização de dados...', 'info');
         
-        // Sincronizar campeonatos principais (IDs de exemplo)
+        // Sincronizar campeonatos principais (IDs de exemplo) em jobs paralelos
         const championshipIds = [2, 6, 10]; // Copa do Brasil, Carioca, etc.
         
-        for (const id of championshipIds) {
-            try {
-                const response = await fetch(`${API_BASE_URL}/football/sync-championship/${id}`, {
-                    method: 'POST'
-                });
-                
-                if (response.ok) {
-                    const result = await response.json();
-                    showToast(`Campeonato ${id}: ${result.teams_synced} equipas, ${result.matches_synced} partidas`, 'success');
+        const response = await fetch(`${API_BASE_URL}/jobs/sync-championships`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ championship_ids: championshipIds })
+        });
+        
+        if (response.ok) {
+            const { jobs } = await response.json();
+            await Promise.all(jobs.map(async ({ championship_id, job_id }) => {
+                const job = await waitForJob(job_id);
+                if (job.status === 'succeeded') {
+                    showToast(`Campeonato ${championship_id}: ${job.result.teams_synced} equipas, ${job.result.matches_synced} partidas`, 'success');
+                } else {
+                    console.error(`Erro ao sincronizar campeonato ${championship_id}:`, job.error);
                 }
-            } catch (error) {
-                console.error(`Erro ao sincronizar campeonato ${id}:`, error);
-            }
+            }));
         }
         
         // Calcular estatísticas
@@ -825,8 +839,13 @@ async function calculateAllStats() {
         });
         
         if (response.ok) {
-            const result = await response.json();
-            showToast(`Estatísticas calculadas para ${result.teams_updated} equipas`, 'success');
+            const { job_id } = await response.json();
+            const job = await waitForJob(job_id);
+            if (job.status === 'succeeded') {
+                showToast(`Estatísticas calculadas para ${job.result.teams_updated} equipas`, 'success');
+            } else {
+                showToast('Erro ao calcular estatísticas', 'error');
+            }
         }
     } catch (error) {
         console.error('Erro ao calcular estatísticas:', error);
@@ -834,6 +853,19 @@ async function calculateAllStats() {
     }
 }
 
+// Aguarda o fim de um job em segundo plano (consulta /api/jobs/<id>, no máximo maxAttempts vezes)
+async function waitForJob(jobId, intervalMs = 1000, maxAttempts = 600) {
+    for (let attempt = 0; attempt < maxAttempts; attempt++) {
+        const response = await fetch(`${API_BASE_URL}/jobs/${jobId}`);
+        const job = await response.json();
+        if (!response.ok || job.status === 'succeeded' || job.status === 'failed') {
+            return job;
+        }
+        await new Promise(resolve => setTimeout(resolve, intervalMs));
+    }
+    return { id: jobId, status: 'failed', error: 'Tempo de espera do job esgotado' };
+}
+
 // Funções de UI
 function showLoading() {
     document.getElementById('loading-overlay').style.display = 'flex';
@@ -0,0 +1,112 @@
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Base de dados própria para os testes (src.main cria as tabelas ao ser importado)
+TEST_DATABASE = os.path.join(tempfile.mkdtemp(prefix='football-tests-'), 'test.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{TEST_DATABASE}'
+os.environ.pop('VERCEL', None)
+
+# Partidas da liga sintética (duas épocas completas e a atual a meio, com jogos por jogar)
+SEED_MATCHES = 1000
+
+@pytest.fixture(scope='session')
+def app():
+    from src.main import app
+    return app
+
+@pytest.fixture(scope='session')
+def seeded(app):
+    """Liga sintética com estatísticas, ratings, armazém e agregados já calculados"""
+    from benchmarks.run_benchmarks import seed_database
+    from src.models.football import db, Team, Match
+    from src.services.elo_rating import elo_engine
+    from src.services.fixture_predictions import fixture_predictions
+    from src.services.head_to_head import h2h_index
+    from src.services.market_rollups import market_rollups
+    from src.services.match_store import match_store
+    from src.services.team_stats import TeamStatsRecalculator
+
+    with app.app_context():
+        dataset = seed_database(db, Team, Match, SEED_MATCHES)
+        TeamStatsRecalculator.recalculate('full')
+        elo_engine.update()
+        match_store.refresh()
+        h2h_index.update()
+        fixture_predictions.refresh()
+        market_rollups.rebuild()
+    return dataset
+
+@pytest.fixture
+def app_context(app, seeded):
+    with app.app_context():
+        yield
+
+class StubAPI:
+    """
+    Servidor HTTP local com respostas programadas por caminho
+    Cada resposta é (estado, corpo, cabeçalhos, atraso em segundos); a
+    última de cada caminho repete-se.
+    """
+    
+    def __init__(self):
+        self.responses = {}
+        self.requests = []
+        self.request_headers = []
+        stub = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.requests.append(self.path)
+                stub.request_headers.append(dict(self.headers))
+                queue = stub.responses.get(self.path, [(404, {'erro': 'não encontrado'}, {}, 0)])
+                status, body, headers, delay = queue.pop(0) if len(queue) > 1 else queue[0]
+                time.sleep(delay)
+                payload = json.dumps(body).encode() if body is not None else b''
+                try:
+                    self.send_response(status)
+                    for name, value in headers.items():
+                        self.send_header(name, value)
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # O cliente desistiu (timeout)
+            
+            def log_message(self, *args):
+                pass
+        
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+    
+    def respond(self, path, *responses):
+        self.responses[path] = [tuple(response) + ({}, 0)[len(response) - 2:] for response in responses]
+    
+    def count(self, path):
+        return self.requests.count(path)
+
+@pytest.fixture(scope='module')
+def stub_server():
+    server = StubAPI()
+    yield server
+    server.server.shutdown()
+    server.server.server_close()
+
+@pytest.fixture
+def stub(stub_server):
+    stub_server.responses.clear()
+    stub_server.requests.clear()
+    stub_server.request_headers.clear()
+    return stub_server
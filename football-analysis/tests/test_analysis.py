@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from src.models.football import Match
+from src.services.advanced_analytics import AdvancedStatsCalculator, BatchStatsCalculator, PredictionEngine
+from src.services.match_store import match_store
+
+def _match_dicts():
+    """Partidas no formato das rotas originais, por ordem cronológica (como o MatchStore)"""
+    return [
+        {
+            'home_team_id': match.home_team_id,
+            'away_team_id': match.away_team_id,
+            'home_score': match.home_score,
+            'away_score': match.away_score,
+            'status': match.status,
+            'match_date': match.match_date
+        }
+        for match in Match.query.order_by(Match.match_date, Match.id).all()
+    ]
+
+@pytest.mark.parametrize('home_team_id, away_team_id', [(1, 2), (5, 17), (20, 3)])
+def test_analysis_from_store_matches_comprehensive_analysis(app_context, home_team_id, away_team_id):
+    engine = PredictionEngine()
+
+    expected = engine.generate_comprehensive_analysis(home_team_id, away_team_id, _match_dicts())
+    actual = engine.generate_analysis_from_store(home_team_id, away_team_id, match_store)
+
+    assert _close(actual, expected)
+
+def test_batch_metrics_match_per_team_functions(app_context):
+    calculator = AdvancedStatsCalculator()
+    all_matches = _match_dicts()
+    team_ids, metrics = BatchStatsCalculator.calculate_from_store(match_store)
+
+    assert len(team_ids) > 0
+    for i, team_id in enumerate(team_ids.tolist()):
+        prepared = [
+            {
+                'is_home': match['home_team_id'] == team_id,
+                'goals_for': match['home_score'] if match['home_team_id'] == team_id else match['away_score'],
+                'goals_against': match['away_score'] if match['home_team_id'] == team_id else match['home_score'],
+                'status': match['status'],
+                'match_date': match['match_date']
+            }
+            for match in all_matches if team_id in (match['home_team_id'], match['away_team_id'])
+        ]
+        batch = BatchStatsCalculator.team_metrics_dict(metrics, i)
+
+        # A janela de forma (10 jogos mais recentes) é escolhida pela própria função, como no batch
+        assert batch['form_index'] == pytest.approx(calculator.calculate_form_index(prepared))
+        assert _close(batch['attacking_efficiency'], calculator.calculate_attacking_efficiency(prepared))
+        assert _close(batch['defensive_solidity'], calculator.calculate_defensive_solidity(prepared))
+        assert _close(batch['home_away_performance'], calculator.calculate_home_away_performance(prepared))
+
+def test_single_team_metrics_match_batch(app_context):
+    team_ids, metrics = BatchStatsCalculator.calculate_from_store(match_store)
+    position = int(np.flatnonzero(team_ids == 7)[0])
+
+    assert _close(BatchStatsCalculator.team_metrics_from_store(match_store, 7),
+                  BatchStatsCalculator.team_metrics_dict(metrics, position))
+
+def _close(actual, expected) -> bool:
+    """Igualdade recursiva de dicts/listas, com tolerância nos floats"""
+    if isinstance(expected, dict):
+        assert set(actual) == set(expected)
+        return all(_close(actual[key], expected[key]) for key in expected)
+    if isinstance(expected, (list, tuple)):
+        assert len(actual) == len(expected)
+        return all(_close(a, e) for a, e in zip(actual, expected))
+    if isinstance(expected, float):
+        assert actual == pytest.approx(expected)
+        return True
+    assert actual == expected
+    return True
@@ -0,0 +1,102 @@
+import json
+import threading
+import time
+
+from src.services import analysis_cache as analysis_cache_module
+from src.services.analysis_cache import AnalysisCache
+
+class FixedVersion:
+    """Versão controlada pelo teste (equipas alteradas desde cada versão)"""
+    
+    def __init__(self):
+        self.current = 1
+        self.changed = {}
+    
+    def changed_teams(self, since):
+        return self.changed.get(since)
+
+def test_concurrent_requests_for_the_same_key_compute_once():
+    cache = AnalysisCache(FixedVersion())
+    release = threading.Event()
+    calls = []
+    results = []
+    threads_count = 8
+
+    def compute():
+        calls.append(1)
+        release.wait(timeout=10)
+        return {'home': 1, 'away': 2}
+
+    def worker():
+        results.append(cache.get_or_compute(1, 2, compute))
+
+    threads = [threading.Thread(target=worker) for _ in range(threads_count)]
+    for thread in threads:
+        thread.start()
+    # Todos os seguidores já estão à espera do cálculo do primeiro
+    deadline = time.monotonic() + 10
+    while cache.stats()['coalesced'] < threads_count - 1 and time.monotonic() < deadline:
+        time.sleep(0.005)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [{'home': 1, 'away': 2}] * threads_count
+    assert cache.stats()['inflight'] == 0
+    assert cache.get(1, 2) == {'home': 1, 'away': 2}
+
+def test_least_recently_used_entry_is_evicted_over_the_cap():
+    value = {'analysis': 'x' * 100}
+    size = len(json.dumps(value))
+    cache = AnalysisCache(FixedVersion(), max_bytes=2 * size)
+
+    cache.put(1, 2, value)
+    cache.put(3, 4, value)
+    cache.get(1, 2)  # (3, 4) passa a ser a menos usada
+    cache.put(5, 6, value)
+
+    assert cache.get(3, 4) is None
+    assert cache.get(1, 2) == value
+    assert cache.get(5, 6) == value
+    assert cache.stats()['evictions'] == 1
+    assert cache.stats()['bytes'] <= cache.max_bytes
+
+def test_entry_larger_than_the_cap_is_not_stored():
+    cache = AnalysisCache(FixedVersion(), max_bytes=50)
+
+    cache.put(1, 2, {'analysis': 'x' * 100})
+
+    assert cache.get(1, 2) is None
+    assert cache.stats()['entries'] == 0
+
+def test_expired_entry_is_recomputed(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(analysis_cache_module.time, 'time', lambda: now[0])
+    cache = AnalysisCache(FixedVersion(), ttl=60)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {'calls': len(calls)}
+
+    assert cache.get_or_compute(1, 2, compute) == {'calls': 1}
+    now[0] += 59
+    assert cache.get_or_compute(1, 2, compute) == {'calls': 1}
+    now[0] += 2
+    assert cache.get_or_compute(1, 2, compute) == {'calls': 2}
+    assert cache.stats()['expired'] == 1
+
+def test_new_version_only_recomputes_pairs_with_changed_teams():
+    version = FixedVersion()
+    cache = AnalysisCache(version)
+    cache.put(1, 2, {'pair': '1-2'})
+    cache.put(3, 4, {'pair': '3-4'})
+
+    version.current = 2
+    version.changed[1] = {3}
+
+    assert cache.get(1, 2) == {'pair': '1-2'}
+    assert cache.get(3, 4) is None
+    assert cache.stats()['revalidated'] == 1
+    assert cache.stats()['stale'] == 1
@@ -0,0 +1,15 @@
+from src.models.football import Match
+from src.services.backtest import backtest_engine, settle_bet
+
+def test_backtest_settles_each_recommendation_on_its_own_fixture(app_context):
+    result = backtest_engine.run(bankroll=1000)
+    scores = {
+        (match.home_team_id, match.away_team_id, match.match_date): (match.home_score, match.away_score)
+        for match in Match.query.filter(Match.status == 'finalizado').all()
+    }
+
+    assert result['bets']
+    for bet in result['bets']:
+        home_score, away_score = scores[(bet['home_team_id'], bet['away_team_id'], bet['match_date'])]
+        assert bet['won'] == settle_bet(bet['bet_type'], home_score, away_score)
+        assert bet['stake'] > 0
@@ -0,0 +1,81 @@
+import copy
+import time
+
+import pytest
+
+from src.models.football import db, Match, Team
+from src.services.championship_sync import ChampionshipSync
+from src.services.data_version import data_version
+
+CHAMPIONSHIP_ID = 9901
+TEAM_IDS = (990001, 990002)
+MATCH_IDS = (9900001, 9900002)
+
+def _team(team_id):
+    return {'time_id': team_id, 'nome': f'Clube {team_id}', 'nome_popular': f'Clube {team_id}',
+            'sigla': f'C{team_id % 100}', 'escudo': ''}
+
+def _payload():
+    home, away = TEAM_IDS
+    return {
+        'campeonato': {'campeonato_id': CHAMPIONSHIP_ID, 'nome': 'Liga de Teste'},
+        'partidas': {
+            'fase-1': {
+                'rodada-1': {
+                    'ida': {'partida_id': MATCH_IDS[0], 'time_mandante': _team(home), 'time_visitante': _team(away),
+                            'placar_mandante': 2, 'placar_visitante': 1, 'status': 'finalizado',
+                            'data_realizacao_iso': '2024-03-02T16:00:00'},
+                    'volta': {'partida_id': MATCH_IDS[1], 'time_mandante': _team(away), 'time_visitante': _team(home),
+                              'placar_mandante': 0, 'placar_visitante': 0, 'status': 'agendado',
+                              'data_realizacao_iso': '2024-03-09T16:00:00'}
+                }
+            }
+        }
+    }
+
+def _rows():
+    return {match.api_id: (match.home_score, match.away_score, match.status, match.updated_at)
+            for match in Match.query.filter(Match.api_id.in_(MATCH_IDS))}
+
+@pytest.fixture
+def sync_rows(app_context):
+    yield
+    # As partidas e equipas da liga de teste não ficam para os outros testes
+    Match.query.filter(Match.api_id.in_(MATCH_IDS)).delete(synchronize_session=False)
+    Team.query.filter(Team.api_id.in_(TEAM_IDS)).delete(synchronize_session=False)
+    data_version.bump('sync-championship', TEAM_IDS)
+    db.session.commit()
+
+def test_resync_of_the_same_payload_writes_nothing(sync_rows):
+    first = ChampionshipSync.sync(_payload(), CHAMPIONSHIP_ID)
+    before = _rows()
+
+    second = ChampionshipSync.sync(_payload(), CHAMPIONSHIP_ID)
+
+    assert (first['teams_synced'], first['matches_synced']) == (2, 2)
+    assert (second['teams_synced'], second['teams_updated']) == (0, 0)
+    assert (second['matches_synced'], second['matches_updated']) == (0, 0)
+    assert Match.query.filter(Match.api_id.in_(MATCH_IDS)).count() == 2
+    assert Team.query.filter(Team.api_id.in_(TEAM_IDS)).count() == 2
+    # Linhas sem mudanças nem sequer têm updated_at reescrito
+    assert _rows() == before
+
+def test_resync_updates_only_changed_rows(sync_rows):
+    ChampionshipSync.sync(_payload(), CHAMPIONSHIP_ID)
+    before = _rows()
+    time.sleep(0.01)
+
+    payload = copy.deepcopy(_payload())
+    played = payload['partidas']['fase-1']['rodada-1']['volta']
+    played.update(placar_mandante=1, placar_visitante=3, status='finalizado')
+    payload['partidas']['fase-1']['rodada-1']['ida']['time_mandante']['nome_popular'] = 'Clube Renomeado'
+    played['time_visitante']['nome_popular'] = 'Clube Renomeado'
+    result = ChampionshipSync.sync(payload, CHAMPIONSHIP_ID)
+    after = _rows()
+
+    assert (result['matches_synced'], result['matches_updated']) == (0, 1)
+    assert (result['teams_synced'], result['teams_updated']) == (0, 1)
+    assert after[MATCH_IDS[1]][:3] == (1, 3, 'finalizado')
+    assert after[MATCH_IDS[1]][3] > before[MATCH_IDS[1]][3]
+    assert after[MATCH_IDS[0]] == before[MATCH_IDS[0]]
+    assert Team.query.filter_by(api_id=TEAM_IDS[0]).one().popular_name == 'Clube Renomeado'
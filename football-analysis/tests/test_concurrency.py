@@ -0,0 +1,102 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from src.models.database import sqlite_pragmas
+from src.models.football import db, Match
+from src.services.championship_sync import ChampionshipSync
+from src.services.response_cache import response_cache
+
+READ_URLS = (
+    '/api/football/matches?limit=50',
+    '/api/football/teams',
+    '/api/advanced/team-metrics'
+)
+READS_PER_THREAD = 6
+READERS = 4
+
+def test_reads_do_not_wait_for_an_open_bulk_write(app, seeded):
+    """
+    Uma transação longa reescreve as partidas em lotes (como a sincronização
+    de um campeonato) e fica aberta enquanto várias threads leem as rotas:
+    com WAL as leituras respondem sem "database is locked" nem esperar pelo commit
+    """
+    with app.app_context():
+        assert db.engine.url.database  # Base de dados em ficheiro, não em memória
+        assert sqlite_pragmas(db.engine)['journal_mode'] == 'wal'
+        rows = [
+            {column: getattr(match, column) for column in
+             ('api_id', 'home_team_id', 'away_team_id', 'home_score', 'away_score', 'status',
+              'match_date', 'championship_id', 'championship_name')}
+            for match in Match.query.filter(Match.status == 'finalizado').all()
+        ]
+    
+    write_open = threading.Event()
+    reads_done = threading.Event()
+    write_result = {}
+    
+    def writer():
+        with app.app_context():
+            try:
+                for start in range(0, len(rows), ChampionshipSync.BATCH_SIZE):
+                    batch = [dict(row, home_score=row['home_score'] + 1) for row in
+                             rows[start:start + ChampionshipSync.BATCH_SIZE]]
+                    ChampionshipSync._upsert(Match, batch, ChampionshipSync.MATCH_UPDATE_COLUMNS)
+                write_open.set()
+                write_result['held'] = reads_done.wait(timeout=60)
+            except Exception as e:
+                write_result['error'] = str(e)
+            finally:
+                # Nada fica gravado: as partidas semeadas são partilhadas pelos outros testes
+                db.session.rollback()
+                write_open.set()
+    
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    
+    def reader(index):
+        client = app.test_client()
+        write_open.wait(timeout=60)
+        for i in range(index, index + READS_PER_THREAD):
+            url = READ_URLS[i % len(READ_URLS)]
+            response_cache.clear()
+            started = time.perf_counter()
+            response = client.get(url)
+            elapsed = time.perf_counter() - started
+            with lock:
+                if response.status_code != 200:
+                    errors.append(f'{url}: {response.status_code} {response.get_data(as_text=True)[:200]}')
+                else:
+                    latencies.append(elapsed)
+    
+    write_thread = threading.Thread(target=writer)
+    readers = [threading.Thread(target=reader, args=(index,)) for index in range(READERS)]
+    write_thread.start()
+    for thread in readers:
+        thread.start()
+    for thread in readers:
+        thread.join()
+    
+    # A escrita continua a segurar o lock: outro escritor ficaria bloqueado
+    with app.app_context():
+        other = sqlite3.connect(db.engine.url.database, timeout=0.1)
+    try:
+        with pytest.raises(sqlite3.OperationalError, match='database is locked'):
+            other.execute('BEGIN IMMEDIATE')
+    finally:
+        other.close()
+        reads_done.set()
+    write_thread.join()
+    
+    assert 'error' not in write_result, write_result
+    assert write_result['held']
+    assert errors == []
+    assert len(latencies) == READERS * READS_PER_THREAD
+    # Nenhuma leitura esperou pelo lock de escrita (busy_timeout de 5 s)
+    assert max(latencies) < 5
+    
+    with app.app_context():
+        assert Match.query.filter(Match.status == 'finalizado').count() == len(rows)
@@ -0,0 +1,43 @@
+from datetime import datetime
+
+from sqlalchemy import insert
+
+from src.models.football import db, DataChange
+from src.services.data_version import data_version
+from src.services.match_store import match_store
+
+def _external_change(team_ids: str = None) -> int:
+    """Escrita de outro processo: uma ligação própria, com outra origem"""
+    with db.engine.begin() as connection:
+        result = connection.execute(insert(DataChange).values(
+            reason='sync-championship', team_ids=team_ids, origin='outro-host:1', created_at=datetime.utcnow()
+        ))
+        return result.inserted_primary_key[0]
+
+def test_version_follows_other_processes(app_context):
+    before = data_version.current
+    store_version = match_store.version
+
+    version = _external_change('[3, 7]')
+    data_version._checked_at = 0.0
+
+    assert data_version.current == version > before
+    assert data_version.changed_teams(before) == {3, 7}
+    # O estado em memória é recarregado quando a escrita vem de outro processo
+    assert match_store.version == store_version + 1
+
+    _external_change(None)
+    data_version._checked_at = 0.0
+    assert data_version.changed_teams(before) is None
+
+def test_bump_is_part_of_the_write_transaction(app_context):
+    before = data_version.sync()
+
+    data_version.bump('predict-odds', [])
+    db.session.rollback()
+    assert data_version.sync() == before
+
+    version = data_version.bump('predict-odds', [1])
+    db.session.commit()
+    assert data_version.current == version
+    assert data_version.changed_teams(before) == {1}
@@ -0,0 +1,58 @@
+from datetime import datetime
+
+import pytest
+
+from src.models.football import db, DataChange, Match, RatingState, TeamRating
+from src.services.advanced_analytics import AdvancedStatsCalculator
+from src.services.elo_rating import EloRatingEngine, elo_engine
+
+def _replayed_ratings():
+    """Ratings calculados de raiz sobre os marcadores atuais"""
+    ratings = {}
+    for match in Match.query.filter_by(status='finalizado').order_by(Match.match_date, Match.id):
+        home = ratings.get(match.home_team_id, elo_engine.initial_rating)
+        away = ratings.get(match.away_team_id, elo_engine.initial_rating)
+        delta = elo_engine.k_factor * (AdvancedStatsCalculator.elo_actual_score(match.home_score, match.away_score)
+                                       - AdvancedStatsCalculator.elo_expected_score(home, away))
+        ratings[match.home_team_id] = home + delta
+        ratings[match.away_team_id] = away - delta
+    return ratings
+
+@pytest.fixture
+def processed_match(app_context):
+    """Partida finalizada já processada; o marcador original é reposto no fim"""
+    elo_engine.update()
+    match = Match.query.filter_by(status='finalizado').order_by(Match.match_date).first()
+    original = (match.home_score, match.away_score)
+    yield match
+    match.home_score, match.away_score = original
+    match.updated_at = datetime.utcnow()
+    db.session.commit()
+    elo_engine.update()
+
+def test_score_correction_of_a_processed_match_rebuilds_the_ratings(processed_match):
+    assert elo_engine.update()['mode'] == 'incremental'
+
+    processed_match.home_score, processed_match.away_score = processed_match.away_score + 3, processed_match.home_score
+    processed_match.updated_at = datetime.utcnow()
+    db.session.commit()
+    result = elo_engine.update()
+
+    assert result['mode'] == 'rebuild'
+    assert elo_engine.get_ratings() == pytest.approx(_replayed_ratings())
+    # Sem novas correções volta ao modo incremental
+    assert elo_engine.update()['mode'] == 'incremental'
+
+def test_reading_ratings_does_not_write(app_context):
+    elo_engine.update()
+    state_updated_at = RatingState.query.first().updated_at
+    last_change = db.session.query(db.func.max(DataChange.id)).scalar()
+
+    engine = EloRatingEngine()
+    ratings = engine.get_ratings([1, 2])
+
+    assert ratings == {rating.team_id: rating.rating for rating in
+                       TeamRating.query.filter(TeamRating.team_id.in_([1, 2]))}
+    assert not (db.session.new or db.session.dirty or db.session.deleted)
+    assert RatingState.query.first().updated_at == state_updated_at
+    assert db.session.query(db.func.max(DataChange.id)).scalar() == last_change
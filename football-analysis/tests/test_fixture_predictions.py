@@ -0,0 +1,22 @@
+from src.models.football import db, Match, FixturePrediction
+from src.services.fixture_predictions import fixture_predictions
+
+def _predicted_match_ids():
+    return {prediction.match_id for prediction in fixture_predictions.top(fixture_predictions.window(), 0.0, 100000)}
+
+def test_started_matches_leave_the_opportunities_before_refresh(app_context):
+    match_id = db.session.query(FixturePrediction.match_id).join(Match, Match.id == FixturePrediction.match_id).filter(
+        Match.status == 'agendado'
+    ).order_by(FixturePrediction.match_id).first()[0]
+    assert match_id in _predicted_match_ids()
+
+    match = db.session.get(Match, match_id)
+    original_status = match.status
+    try:
+        # Como o ao vivo: só a linha de matches muda, fixture_predictions fica por refrescar
+        match.status = 'andamento'
+        db.session.commit()
+        assert match_id not in _predicted_match_ids()
+    finally:
+        match.status = original_status
+        db.session.commit()
@@ -0,0 +1,56 @@
+import time
+
+import pytest
+import requests
+
+from src.services.football_api import FootballAPIService
+
+def _service(stub, **kwargs):
+    options = dict(base_url=stub.url, timeout=(1, 1), backoff_factor=0.01, use_cache=False)
+    options.update(kwargs)
+    return FootballAPIService('chave-teste', **options)
+
+@pytest.mark.parametrize('status', [500, 502, 503, 504, 429])
+def test_retries_transient_errors(stub, status):
+    stub.respond('/partidas/1', (status, {'erro': 'tente de novo'}), (200, {'partida_id': 1}))
+
+    assert _service(stub).get_match_details(1) == {'partida_id': 1}
+    assert stub.count('/partidas/1') == 2
+
+def test_gives_up_after_max_retries(stub):
+    stub.respond('/partidas/1', (503, {'erro': 'indisponível'}))
+
+    assert _service(stub, max_retries=2).get_match_details(1) == {}
+    assert stub.count('/partidas/1') == 3
+
+def test_retry_after_is_capped(stub):
+    stub.respond('/partidas/1', (429, {'erro': 'limite'}, {'Retry-After': '3600'}), (200, {'partida_id': 1}))
+
+    started = time.perf_counter()
+    result = _service(stub, max_retry_after=0.2).get_match_details(1)
+
+    assert result == {'partida_id': 1}
+    assert time.perf_counter() - started < 5
+
+def test_read_timeout_raises_instead_of_blocking(stub):
+    stub.respond('/ao-vivo', (200, [], {}, 2))
+    service = _service(stub, timeout=(1, 0.2), max_retries=0)
+
+    started = time.perf_counter()
+    with pytest.raises(requests.exceptions.RequestException):
+        service.get_live_matches(raise_errors=True)
+    assert time.perf_counter() - started < 1.5
+
+def test_fetch_many_keeps_input_order_and_isolates_errors(stub):
+    # Os primeiros IDs respondem mais tarde: a ordem de chegada é a inversa da pedida
+    for match_id, delay in ((1, 0.3), (2, 0.2), (3, 0.1)):
+        stub.respond(f'/partidas/{match_id}', (200, {'partida_id': match_id}, {}, delay))
+    stub.respond('/partidas/4', (404, {'erro': 'não encontrado'}))
+
+    results = _service(stub, max_retries=0).get_many_match_details([1, 2, 4, 3, 2], max_workers=4)
+
+    assert list(results) == [1, 2, 4, 3]
+    assert results[1] == {'partida_id': 1}
+    assert results[3] == {'partida_id': 3}
+    assert results[4] == {}
+    assert stub.count('/partidas/2') == 1
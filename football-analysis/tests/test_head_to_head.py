@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.models.football import db, Match
+from src.services.head_to_head import HeadToHeadIndex
+from src.services.match_store import match_store
+
+NEW_MATCH_ID = 9800001
+
+@pytest.fixture
+def new_match(app_context):
+    yield
+    Match.query.filter_by(api_id=NEW_MATCH_ID).delete(synchronize_session=False)
+    db.session.commit()
+    match_store.refresh()
+
+def _add_match(home_score, away_score):
+    match = Match.query.filter_by(api_id=NEW_MATCH_ID).first()
+    if match is None:
+        match = Match(api_id=NEW_MATCH_ID, home_team_id=1, away_team_id=2, status='finalizado',
+                      match_date=datetime.now() - timedelta(hours=1), championship_id=1,
+                      championship_name='Liga 1')
+        db.session.add(match)
+    match.home_score, match.away_score = home_score, away_score
+    match.updated_at = datetime.utcnow()
+    db.session.commit()
+    match_store.refresh()
+
+def test_record_includes_a_newly_finished_match(new_match):
+    index = HeadToHeadIndex(match_store)
+    before = index.get_record(2, 1)
+
+    _add_match(3, 0)
+    after = index.get_record(2, 1)
+
+    assert after['total_matches'] == before['total_matches'] + 1
+    assert after['team2_wins'] == before['team2_wins'] + 1
+    assert after['team1_wins'] == before['team1_wins']
+    assert after['team2_goals'] == before['team2_goals'] + 3
+    latest = after['recent_meetings'][0]
+    assert (latest['home_team_id'], latest['away_team_id'], latest['home_score'], latest['away_score']) == (1, 2, 3, 0)
+    assert len(after['recent_meetings']) <= index.recent_meetings
+    # A ordem das equipas só troca os lados
+    mirrored = index.get_record(1, 2)
+    assert (mirrored['team1_wins'], mirrored['team2_wins']) == (after['team2_wins'], after['team1_wins'])
+
+def test_score_correction_rebuilds_the_record(new_match):
+    index = HeadToHeadIndex(match_store)
+    before = index.get_record(1, 2)
+    _add_match(3, 0)
+    assert index.get_record(1, 2)['team1_wins'] == before['team1_wins'] + 1
+
+    _add_match(0, 0)
+    corrected = index.get_record(1, 2)
+
+    assert corrected['team1_wins'] == before['team1_wins']
+    assert corrected['draws'] == before['draws'] + 1
+    assert index.update()['mode'] == 'unchanged'
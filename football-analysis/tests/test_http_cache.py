@@ -0,0 +1,90 @@
+import os
+
+import pytest
+import requests
+
+from src.services import http_cache as http_cache_module
+from src.services.football_api import FootballAPIService
+from src.services.http_cache import HTTPResponseCache
+
+CHAMPIONSHIPS = [{'campeonato_id': 10, 'nome': 'Liga'}]
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(http_cache_module.time, 'time', lambda: now[0])
+    return now
+
+def _service(stub, cache):
+    return FootballAPIService('chave-teste', base_url=stub.url, timeout=(1, 1), max_retries=0,
+                              cache=cache, cache_ttls={'championships': 60, 'championship_matches': 60})
+
+def test_entry_is_served_within_ttl_and_refetched_after(stub, tmp_path, clock):
+    stub.respond('/campeonatos', (200, CHAMPIONSHIPS))
+    cache = HTTPResponseCache(str(tmp_path))
+    service = _service(stub, cache)
+
+    assert service.get_championships() == CHAMPIONSHIPS
+    clock[0] += 59
+    assert service.get_championships() == CHAMPIONSHIPS
+    assert stub.count('/campeonatos') == 1
+
+    clock[0] += 2
+    assert service.get_championships() == CHAMPIONSHIPS
+    assert stub.count('/campeonatos') == 2
+    assert cache.stats()['hits'] == 1
+
+def test_expired_entry_is_revalidated_with_etag(stub, tmp_path, clock):
+    stub.respond('/campeonatos', (200, CHAMPIONSHIPS, {'ETag': '"v1"'}), (304, None))
+    cache = HTTPResponseCache(str(tmp_path))
+    service = _service(stub, cache)
+
+    service.get_championships()
+    clock[0] += 120
+    assert service.get_championships() == CHAMPIONSHIPS
+
+    assert stub.request_headers[-1]['If-None-Match'] == '"v1"'
+    assert cache.stats()['revalidated'] == 1
+    # O 304 renova o TTL: o pedido seguinte não vai ao upstream
+    service.get_championships()
+    assert stub.count('/campeonatos') == 2
+
+def test_stale_copy_is_served_when_upstream_fails(stub, tmp_path, clock):
+    stub.respond('/campeonatos/10/partidas', (200, {'partidas': []}), (503, {'erro': 'indisponível'}))
+    cache = HTTPResponseCache(str(tmp_path))
+    service = _service(stub, cache)
+
+    service.get_championship_matches(10)
+    clock[0] += 120
+
+    assert service.get_championship_matches(10) == {'partidas': []}
+    assert cache.stats()['stale_served'] == 1
+    # A sincronização nunca grava uma cópia antiga: o erro chega a quem chamou
+    with pytest.raises(requests.exceptions.RequestException):
+        service.get_championship_matches(10, revalidate=True, raise_errors=True)
+
+def test_least_recently_used_entries_are_evicted_over_max_entries(tmp_path):
+    cache = HTTPResponseCache(str(tmp_path), max_entries=2)
+    cache.store('a', {'n': 1})
+    cache.store('b', {'n': 2})
+    os.utime(cache._path('a'), (1, 1))
+    os.utime(cache._path('b'), (2, 2))
+    cache.get('a')  # Leitura renova a entrada: 'b' passa a ser a mais antiga
+
+    cache.store('c', {'n': 3})
+
+    assert cache.get('b') is None
+    assert cache.get('a')['body'] == {'n': 1}
+    assert cache.get('c')['body'] == {'n': 3}
+    assert cache.stats()['evictions'] == 1
+
+def test_entries_are_evicted_over_max_bytes(tmp_path):
+    cache = HTTPResponseCache(str(tmp_path), max_bytes=3000)
+    for i in range(5):
+        cache.store(f'chave-{i}', {'dados': 'x' * 1000})
+        os.utime(cache._path(f'chave-{i}'), (i + 1, i + 1))
+
+    sizes = [os.path.getsize(os.path.join(tmp_path, name)) for name in os.listdir(tmp_path)]
+    assert sum(sizes) <= 3000
+    assert cache.get('chave-4') is not None
+    assert cache.get('chave-0') is None
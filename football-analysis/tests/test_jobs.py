@@ -0,0 +1,28 @@
+from datetime import datetime, timedelta
+
+from src.models.football import db, Job
+from src.services.jobs import JobRunner, STALE_AFTER
+
+def _active_job(job_id: str, heartbeat_age: float) -> Job:
+    heartbeat = datetime.utcnow() - timedelta(seconds=heartbeat_age)
+    return Job(id=job_id, job_type='calculate-stats', params='{}', status='running',
+               worker_id='outro-host:1', created_at=heartbeat, heartbeat_at=heartbeat)
+
+def test_recover_orphans_only_fails_stale_jobs(app_context):
+    db.session.add_all([_active_job('job-vivo', 1), _active_job('job-orfao', STALE_AFTER * 2)])
+    db.session.commit()
+
+    assert JobRunner.recover_orphans() == 1
+
+    assert db.session.get(Job, 'job-vivo').status == 'running'
+    assert db.session.get(Job, 'job-orfao').status == 'failed'
+
+def test_inline_runner_finishes_job_in_request(app):
+    runner = JobRunner(max_workers=1, inline=True)
+    runner.register('echo')(lambda params, progress: {'value': params['value']})
+
+    with app.test_request_context():
+        job = runner.submit('echo', {'value': 3})
+
+    assert job['status'] == 'succeeded'
+    assert job['result'] == {'value': 3}
@@ -0,0 +1,42 @@
+import pytest
+
+from src.models.football import db, Match
+from src.services.data_version import data_version
+from src.services.elo_rating import elo_engine
+from src.services.live_scores import LiveScoresPoller
+from src.services.match_store import match_store
+
+@pytest.fixture
+def scheduled_match(app, app_context):
+    """Primeira partida por jogar; o marcador, estado e updated_at originais são repostos no fim"""
+    match = Match.query.filter(Match.status != 'finalizado').order_by(Match.match_date, Match.id).first()
+    original = {'api_id': match.api_id, 'home_team_id': match.home_team_id, 'away_team_id': match.away_team_id,
+                'home_score': match.home_score, 'away_score': match.away_score, 'status': match.status}
+    updated_at = match.updated_at
+    yield match
+
+    # Mesmo caminho de escrita do poller: armazém, ratings e versão voltam ao estado semeado
+    poller = LiveScoresPoller(api_service=None, version=data_version)
+    poller._app = app
+    poller._persist([original])
+    Match.query.filter_by(id=match.id).update({'updated_at': updated_at}, synchronize_session=False)
+    db.session.commit()
+
+def test_persist_refreshes_store_ratings_and_version(app, scheduled_match):
+    match = scheduled_match
+    home_rating = elo_engine.get_rating(match.home_team_id)
+    version = data_version.current
+
+    poller = LiveScoresPoller(api_service=None, version=data_version)
+    poller._app = app
+    poller._persist([{'api_id': match.api_id, 'home_team_id': match.home_team_id,
+                      'away_team_id': match.away_team_id, 'home_score': 3, 'away_score': 0,
+                      'status': 'finalizado'}])
+
+    columns = match_store.columns()
+    row = int((columns.match_id == match.id).nonzero()[0][0])
+    assert columns.status_names[columns.status[row]] == 'finalizado'
+    assert (columns.home_score[row], columns.away_score[row]) == (3, 0)
+    assert elo_engine.get_rating(match.home_team_id) > home_rating
+    assert data_version.current > version
+    assert poller.stats()['errors'] == 0
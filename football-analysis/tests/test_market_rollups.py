@@ -0,0 +1,27 @@
+from datetime import datetime
+
+from src.models.football import db, Match
+from src.services.market_rollups import market_rollups
+
+def test_finished_matches_without_score_are_left_out(app_context):
+    # Inserção direta: pelo ORM o default da coluna trocaria o NULL por 0
+    db.session.execute(Match.__table__.insert(), [{
+        'api_id': 999001, 'home_team_id': 1, 'away_team_id': 2, 'home_score': None, 'away_score': None,
+        'status': 'finalizado', 'match_date': datetime(2030, 1, 1, 16), 'championship_id': 999,
+        'championship_name': 'Sem marcador'
+    }])
+    db.session.commit()
+    try:
+        market_rollups.refresh_championships([999])
+        summary = market_rollups.summarize(championship_id=999)
+        assert summary['matches'] == sum(summary['goal_histogram']) == 0
+    finally:
+        Match.query.filter_by(api_id=999001).delete()
+        db.session.commit()
+        market_rollups.refresh_championships([999])
+
+def test_summary_histogram_covers_every_match(app_context):
+    summary = market_rollups.summarize()
+
+    assert summary['matches'] > 0
+    assert sum(summary['goal_histogram']) == summary['matches']
@@ -0,0 +1,81 @@
+import re
+
+from flask import Flask, jsonify
+from sqlalchemy import create_engine, text
+
+from src.services.metrics import LATENCY_BUCKETS, Histogram, RequestMetrics
+
+def _metrics_app():
+    app = Flask(__name__)
+    metrics = RequestMetrics()
+    metrics.init_app(app)
+    engine = create_engine('sqlite://')
+
+    @app.route('/items/<int:item_id>')
+    def item(item_id):
+        with engine.connect() as connection:
+            for _ in range(3):
+                connection.execute(text('SELECT 1'))
+        with metrics.upstream_call(f'/partidas/{item_id}'):
+            pass
+        return jsonify({'id': item_id})
+
+    @app.route('/missing')
+    def missing():
+        return jsonify({'error': 'não encontrado'}), 404
+
+    return app, metrics
+
+def _sample(rendered, name, **labels):
+    selector = ','.join(f'{key}="{value}"' for key, value in labels.items())
+    match = re.search(rf'^{re.escape(name)}{{{re.escape(selector)}}} (\S+)$', rendered, re.MULTILINE)
+    return float(match.group(1)) if match else None
+
+def test_histogram_buckets_give_cumulative_percentiles():
+    histogram = Histogram(LATENCY_BUCKETS)
+    for value in [0.004] * 50 + [0.03] * 40 + [0.2] * 9 + [40.0]:
+        histogram.observe(value)
+
+    cumulative = []
+    for count in histogram.counts:
+        cumulative.append(count + (cumulative[-1] if cumulative else 0))
+    by_bound = dict(zip(LATENCY_BUCKETS + (float('inf'),), cumulative))
+
+    # p50 em le=0.005, p90 em le=0.05, p99 em le=0.25; o valor acima do último limite só em +Inf
+    assert by_bound[0.005] == 50
+    assert by_bound[0.05] == 90
+    assert by_bound[0.25] == 99
+    assert by_bound[30.0] == 99
+    assert by_bound[float('inf')] == histogram.count == 100
+    assert abs(histogram.total - (50 * 0.004 + 40 * 0.03 + 9 * 0.2 + 40.0)) < 1e-9
+
+def test_request_counters_sql_and_upstream_per_endpoint():
+    app, metrics = _metrics_app()
+    client = app.test_client()
+
+    response = client.get('/items/7')
+    client.get('/items/8')
+    client.get('/missing')
+    rendered = metrics.render()
+
+    assert _sample(rendered, 'http_requests_total', endpoint='item', status='200') == 2
+    assert _sample(rendered, 'http_requests_total', endpoint='missing', status='404') == 1
+    assert _sample(rendered, 'http_request_duration_seconds_count', endpoint='item') == 2
+    assert _sample(rendered, 'http_request_duration_seconds_bucket', endpoint='item', le='+Inf') == 2
+    # 3 queries por pedido: os dois pedidos ficam no bucket le=5 e nenhum no le=2
+    assert _sample(rendered, 'sql_queries_per_request_bucket', endpoint='item', le='2') == 0
+    assert _sample(rendered, 'sql_queries_per_request_bucket', endpoint='item', le='5') == 2
+    assert _sample(rendered, 'sql_queries_per_request_sum', endpoint='item') == 6
+    # Os IDs do caminho da API externa são agrupados
+    assert _sample(rendered, 'upstream_requests_total', endpoint='item', path='/partidas/{id}') == 2
+    assert 'desc="3 queries"' in response.headers['Server-Timing']
+    assert 'desc="1 calls"' in response.headers['Server-Timing']
+
+def test_upstream_calls_outside_requests_count_as_background():
+    metrics = RequestMetrics()
+
+    with metrics.upstream_call('/campeonatos/10/partidas'):
+        pass
+
+    assert _sample(metrics.render(), 'upstream_requests_total',
+                   endpoint='background', path='/campeonatos/{id}/partidas') == 1
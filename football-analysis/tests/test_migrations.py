@@ -0,0 +1,73 @@
+import os
+import shutil
+
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.orm import Session
+
+from src.models.football import db, Match
+from src.models.migrations import explain_hot_queries, upgrade_schema
+
+# Tabela matches do esquema original (antes de updated_at e dos índices)
+ORIGINAL_MATCHES = """
+CREATE TABLE matches (
+    id INTEGER PRIMARY KEY,
+    api_id INTEGER NOT NULL UNIQUE,
+    home_team_id INTEGER NOT NULL,
+    away_team_id INTEGER NOT NULL,
+    home_score INTEGER,
+    away_score INTEGER,
+    status VARCHAR(20) NOT NULL,
+    match_date DATETIME NOT NULL,
+    championship_id INTEGER NOT NULL,
+    championship_name VARCHAR(100) NOT NULL,
+    created_at DATETIME
+)
+"""
+
+def test_upgrade_schema_adds_and_backfills_updated_at(app, tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'original.db'}")
+    with engine.begin() as connection:
+        connection.execute(text(ORIGINAL_MATCHES))
+        connection.execute(text(
+            "INSERT INTO matches VALUES (1, 10, 1, 2, 2, 1, 'finalizado', '2024-01-01 16:00:00', 1, 'Liga', "
+            "'2024-01-02 00:00:00'), (2, 11, 2, 1, 0, 0, 'finalizado', '2024-01-08 16:00:00', 1, 'Liga', NULL)"
+        ))
+
+    applied = upgrade_schema(engine, db.metadata)
+
+    assert 'add column matches.updated_at' in applied
+    assert 'backfill matches.updated_at' in applied
+    with engine.connect() as connection:
+        rows = dict(connection.execute(text('SELECT id, updated_at FROM matches')).fetchall())
+    assert rows[1] == '2024-01-02 00:00:00'
+    assert rows[2] is not None
+
+    # Segunda execução não altera nada
+    assert upgrade_schema(engine, db.metadata) == []
+
+def test_match_queries_work_on_upgraded_shipped_database(app, tmp_path):
+    # Cópia da app.db do repositório com a tabela matches de antes de updated_at
+    database = tmp_path / 'app.db'
+    shutil.copy(os.path.join(app.root_path, 'database', 'app.db'), database)
+    engine = create_engine(f'sqlite:///{database}')
+    with engine.begin() as connection:
+        connection.execute(text(ORIGINAL_MATCHES))
+        connection.execute(text(
+            "INSERT INTO matches VALUES (1, 10, 1, 2, 2, 1, 'finalizado', '2024-01-01 16:00:00', 1, 'Liga', "
+            "'2024-01-02 00:00:00')"
+        ))
+
+    upgrade_schema(engine, db.metadata)
+
+    with Session(engine) as session:
+        matches = session.scalars(select(Match)).all()
+        changed = session.scalars(select(Match.api_id).where(Match.updated_at > '2024-01-01')).all()
+    assert [match.api_id for match in matches] == [10]
+    assert changed == [10]
+
+def test_hot_queries_use_indexes(app_context):
+    results = explain_hot_queries(db.engine)
+
+    assert results
+    assert [result['query'] for result in results if not result['uses_index']] == [], \
+        {result['query']: result['plan'] for result in results}
@@ -0,0 +1,55 @@
+import pytest
+
+from src.services.goal_model import GoalModel
+from src.services.odds_125_system import OddsTargetSystem
+
+TEAMS = {
+    1: {'name': 'Forte', 'goals_per_match': 2.2, 'goals_conceded_per_match': 0.5},
+    2: {'name': 'Fraca', 'goals_per_match': 0.6, 'goals_conceded_per_match': 1.9},
+    3: {'name': 'Fechada', 'goals_per_match': 0.5, 'goals_conceded_per_match': 0.6},
+    4: {'name': 'Aberta', 'goals_per_match': 2.6, 'goals_conceded_per_match': 2.4}
+}
+FIXTURES = [
+    {'home_team_id': home_id, 'away_team_id': away_id, 'match_date': None}
+    for home_id in TEAMS for away_id in TEAMS if home_id != away_id
+]
+
+def test_market_prices_come_from_cached_goal_model_matrices():
+    odds_system = OddsTargetSystem()
+    model = GoalModel()
+
+    first = odds_system.price_markets(FIXTURES, TEAMS, model=model)
+    second = odds_system.price_markets(FIXTURES, TEAMS, model=model)
+
+    assert model.stats()['hits'] == len(FIXTURES)
+    assert [p['probabilities'] for p in first] == [p['probabilities'] for p in second]
+    for prices in first:
+        home_expected, away_expected = model.expected_goals(TEAMS[prices['home_team_id']], TEAMS[prices['away_team_id']])
+        matrix = model.score_matrices([home_expected], [away_expected])
+        expected = model.price_matrices(matrix, GoalModel.DEFAULT_LINES)
+        assert prices['probabilities']['home_win'] == pytest.approx(float(expected['home_win'][0]), abs=1e-4)
+
+def test_scenarios_follow_the_rules_not_the_market_prices():
+    odds_system = OddsTargetSystem()
+
+    bets = odds_system.score_fixtures([{'home_team_id': 1, 'away_team_id': 2, 'match_date': None}], TEAMS)
+
+    # Forte x Fraca: diferença de força de 200 -> vitória da casa com 0.9
+    assert [(bet['recommended_bet'], bet['risk_level']) for bet in bets] == [('home_win', 'Baixo')]
+    assert bets[0]['confidence'] == pytest.approx(0.9)
+
+def test_scenarios_respect_threshold_and_order():
+    odds_system = OddsTargetSystem()
+
+    bets = odds_system.find_high_confidence_bets(FIXTURES, TEAMS)
+
+    assert bets
+    assert all(bet['confidence'] >= odds_system.min_confidence_threshold for bet in bets)
+    assert [bet['confidence'] for bet in bets] == sorted((bet['confidence'] for bet in bets), reverse=True)
+
+def test_empty_batches():
+    odds_system = OddsTargetSystem()
+
+    assert odds_system.score_fixtures([], TEAMS) == []
+    assert odds_system.price_markets([], TEAMS) == []
+    assert odds_system.score_fixtures([{'home_team_id': 1, 'away_team_id': 99}], TEAMS) == []
@@ -0,0 +1,102 @@
+import itertools
+import math
+
+import pytest
+
+from src.models.football import Match
+from src.services.odds_125_system import OddsTargetSystem
+from src.services.team_features import team_features
+
+def _team_strength(team_data, is_home=False):
+    """Força da equipa como no caminho por partida original"""
+    return (team_data.get('elo_rating', 1500)
+            + (team_data.get('goals_per_match', 1.0) - team_data.get('goals_conceded_per_match', 1.0)) * 50
+            + (team_data.get('win_percentage', 50) - 50) * 2
+            + (team_data.get('form_index', 0.5) - 0.5) * 100
+            + (50 if is_home else 0))
+
+def _best_scenario(home_data, away_data, threshold):
+    """Referência por partida: cada regra avaliada em Python, fica o primeiro máximo estrito"""
+    scenarios = []
+    strength_diff = _team_strength(home_data, True) - _team_strength(away_data)
+    if strength_diff >= 200:
+        scenarios.append(('home_win', 'Baixo', min(0.9, 0.7 + strength_diff / 1000)))
+
+    avg_goals = (home_data.get('goals_per_match', 1.0) * away_data.get('goals_conceded_per_match', 1.0)
+                 + away_data.get('goals_per_match', 1.0) * home_data.get('goals_conceded_per_match', 1.0))
+    if avg_goals >= 2.8:
+        scenarios.append(('over_2.5', 'Médio', min(0.85, 0.6 + (avg_goals - 2.5) * 0.1)))
+    elif avg_goals <= 1.8:
+        scenarios.append(('under_2.5', 'Baixo', min(0.83, 0.65 + (2.0 - avg_goals) * 0.1)))
+
+    btts = (min(0.9, home_data.get('goals_per_match', 1.0) / 2.0)
+            * min(0.9, away_data.get('goals_per_match', 1.0) / 2.0))
+    if btts >= 0.82:
+        scenarios.append(('both_teams_score', 'Médio', btts))
+    elif btts <= 0.18 and 1 - btts >= 0.82:
+        scenarios.append(('no_both_teams_score', 'Baixo', 1 - btts))
+
+    home_or_draw = 1 / (1 + math.exp(-strength_diff / 400)) + 0.25
+    if home_or_draw >= 0.82:
+        scenarios.append(('home_or_draw', 'Baixo', home_or_draw))
+
+    home_form, away_form = home_data.get('form_index', 0.5), away_data.get('form_index', 0.5)
+    if home_form >= 0.8 and away_form <= 0.3:
+        scenarios.append(('home_win', 'Médio', min(0.85, 0.7 + (home_form - away_form) * 0.3)))
+
+    best, max_confidence = None, 0
+    for scenario in scenarios:
+        if scenario[2] > max_confidence:
+            best, max_confidence = scenario, scenario[2]
+    return best if max_confidence >= threshold else None
+
+def _assert_same_as_reference(matches_data, teams_data):
+    odds_system = OddsTargetSystem()
+    bets = {(bet['home_team_id'], bet['away_team_id']): bet
+            for bet in odds_system.score_fixtures(matches_data, teams_data)}
+
+    expected = {}
+    for match in matches_data:
+        key = (match['home_team_id'], match['away_team_id'])
+        if key[0] in teams_data and key[1] in teams_data:
+            scenario = _best_scenario(teams_data[key[0]], teams_data[key[1]], odds_system.min_confidence_threshold)
+            if scenario is not None:
+                expected[key] = scenario
+
+    assert set(bets) == set(expected)
+    for key, (outcome, risk_level, confidence) in expected.items():
+        assert (bets[key]['recommended_bet'], bets[key]['risk_level']) == (outcome, risk_level)
+        assert bets[key]['confidence'] == pytest.approx(confidence)
+    return bets
+
+def test_vectorized_rules_match_per_fixture_path_on_seeded_fixtures(app_context):
+    matches_data = [
+        {'home_team_id': match.home_team_id, 'away_team_id': match.away_team_id, 'match_date': match.match_date}
+        for match in Match.query.filter(Match.status != 'finalizado').all()
+    ]
+    teams_data = team_features.get({team_id for m in matches_data for team_id in (m['home_team_id'], m['away_team_id'])})
+
+    assert matches_data and teams_data
+    _assert_same_as_reference(matches_data, teams_data)
+
+def test_vectorized_rules_match_per_fixture_path_on_every_rule():
+    # Equipas extremas para que cada regra (e as suas fronteiras) seja exercitada
+    profiles = {
+        1: {'elo_rating': 1700, 'goals_per_match': 2.4, 'goals_conceded_per_match': 0.4, 'win_percentage': 80, 'form_index': 0.9},
+        2: {'elo_rating': 1350, 'goals_per_match': 0.3, 'goals_conceded_per_match': 2.2, 'win_percentage': 15, 'form_index': 0.1},
+        3: {'elo_rating': 1500, 'goals_per_match': 0.4, 'goals_conceded_per_match': 0.5, 'win_percentage': 40, 'form_index': 0.5},
+        4: {'elo_rating': 1520, 'goals_per_match': 2.0, 'goals_conceded_per_match': 2.1, 'win_percentage': 50, 'form_index': 0.85},
+        5: {'goals_per_match': 1.9, 'goals_conceded_per_match': 1.8},
+        6: {'elo_rating': 1480, 'goals_per_match': 1.0, 'goals_conceded_per_match': 1.0, 'win_percentage': 45, 'form_index': 0.3}
+    }
+    matches_data = [{'home_team_id': home, 'away_team_id': away, 'match_date': None}
+                    for home, away in itertools.permutations(profiles, 2)]
+
+    bets = _assert_same_as_reference(matches_data, profiles)
+    assert len({(bet['recommended_bet'], bet['risk_level']) for bet in bets.values()}) >= 3
+
+def test_team_feature_snapshot_only_holds_features_the_rules_read(app_context):
+    features = next(iter(team_features._current().values()))
+    _, arrays = OddsTargetSystem.team_feature_arrays({1: features})
+
+    assert set(features) == set(arrays) | {'name', 'matches_played'}
@@ -0,0 +1,101 @@
+from flask import Flask, jsonify
+
+from src.models.football import db
+from src.services import response_cache as response_cache_module
+from src.services.data_version import data_version
+from src.services.response_cache import ResponseCache
+
+class FixedVersion:
+    """Versão controlada pelo teste, com o número de leituras"""
+    
+    def __init__(self):
+        self.value = 1
+        self.reads = 0
+    
+    def version_of(self, namespace):
+        self.reads += 1
+        return self.value
+
+def _cached_app(cache, ttl=None, during_view=None):
+    app = Flask(__name__)
+    calls = []
+
+    @app.route('/items')
+    @cache.cached(ttl=ttl)
+    def items():
+        calls.append(1)
+        if during_view:
+            during_view()
+        return jsonify({'calls': len(calls)})
+
+    return app.test_client(), calls
+
+def test_second_request_is_a_hit_with_the_same_etag():
+    version = FixedVersion()
+    cache = ResponseCache(version)
+    client, calls = _cached_app(cache)
+
+    first = client.get('/items')
+    second = client.get('/items')
+    not_modified = client.get('/items', headers={'If-None-Match': first.headers['ETag']})
+
+    assert len(calls) == 1
+    assert second.get_json() == first.get_json()
+    assert not_modified.status_code == 304
+    assert cache.stats()['hits'] == 2
+    # Uma leitura da versão por pedido (mais a de stats)
+    assert version.reads == 4
+
+def test_version_bump_is_a_miss():
+    version = FixedVersion()
+    cache = ResponseCache(version)
+    client, calls = _cached_app(cache)
+
+    client.get('/items')
+    version.value = 2
+    response = client.get('/items')
+
+    assert len(calls) == 2
+    assert response.get_json() == {'calls': 2}
+    assert response.headers['X-Data-Version'] == '2'
+    assert cache.stats()['entries'] == 1
+
+def test_expired_entry_is_recomputed(monkeypatch):
+    cache = ResponseCache(FixedVersion())
+    client, calls = _cached_app(cache, ttl=60)
+    now = [1000.0]
+    monkeypatch.setattr(response_cache_module.time, 'time', lambda: now[0])
+
+    client.get('/items')
+    now[0] += 59
+    client.get('/items')
+    assert len(calls) == 1
+
+    now[0] += 2
+    assert client.get('/items').get_json() == {'calls': 2}
+
+def test_response_computed_across_a_bump_is_stored_under_the_old_version():
+    version = FixedVersion()
+    cache = ResponseCache(version)
+
+    def bump():
+        version.value = 2
+
+    client, calls = _cached_app(cache, during_view=bump)
+    response = client.get('/items')
+
+    # Os dados podem já ser os da versão 2, mas a entrada fica na versão lida no início
+    assert response.headers['X-Data-Version'] == '1'
+    client.get('/items')
+    assert len(calls) == 2
+
+def test_prediction_writes_do_not_invalidate_the_data_namespace(app_context):
+    data_version.sync()
+    before = data_version.version_of('data')
+
+    data_version.bump('predict-odds', [], namespace='predictions')
+    db.session.commit()
+    data_version.sync()
+
+    assert data_version.version_of('data') == before
+    assert data_version.version_of('predictions') > before
@@ -0,0 +1,92 @@
+def test_matches_pagination_follows_cursor(app, seeded):
+    client = app.test_client()
+
+    first = client.get('/api/football/matches?limit=300')
+    total = int(first.headers['X-Total-Count'])
+    seen = [match['id'] for match in first.get_json()]
+    cursor = first.headers.get('X-Next-Cursor')
+
+    while cursor:
+        page = client.get(f'/api/football/matches?limit=300&cursor={cursor}')
+        # O total só é contado na primeira página
+        assert 'X-Total-Count' not in page.headers
+        seen.extend(match['id'] for match in page.get_json())
+        cursor = page.headers.get('X-Next-Cursor')
+
+    assert total == seeded_total(app)
+    assert len(seen) == len(set(seen)) == total
+
+def test_matches_status_filter(app, seeded):
+    client = app.test_client()
+    response = client.get('/api/football/matches?status=agendado&limit=1000')
+
+    matches = response.get_json()
+    assert matches and all(match['status'] == 'agendado' for match in matches)
+    assert int(response.headers['X-Total-Count']) == len(matches)
+
+def test_analyze_matches_rejects_non_numeric_ids(app, seeded):
+    client = app.test_client()
+
+    response = client.post('/api/advanced/analyze-matches', json={'pairings': [[1, 2], ['abc', 3]]})
+
+    assert response.status_code == 400
+    assert 'inteiros' in response.get_json()['error']
+
+def test_market_analysis_rejects_days_outside_the_window(app, seeded):
+    client = app.test_client()
+
+    for days in (0, -5, 3651, 10 ** 9):
+        for route in ('market-analysis', 'performance-tracking'):
+            response = client.get(f'/api/odds/{route}?days={days}')
+            assert response.status_code == 400, (route, days)
+            assert '3650' in response.get_json()['error']
+
+    assert client.get('/api/odds/market-analysis?days=3650').status_code == 200
+
+def seeded_total(app) -> int:
+    from src.models.football import Match
+    with app.app_context():
+        return Match.query.count()
+
+def test_performance_tracking_reports_backtest_bets(app, seeded):
+    from datetime import datetime, timedelta
+    from src.services.backtest import backtest_engine
+
+    with app.app_context():
+        since = datetime.now() - timedelta(days=365)
+        bets = [bet for bet in backtest_engine.run()['bets'] if bet['match_date'] >= since]
+
+    response = app.test_client().get('/api/odds/performance-tracking?days=365')
+    metrics = response.get_json()['overall_metrics']
+
+    assert response.status_code == 200
+    assert bets
+    assert metrics['total_predictions'] == len(bets)
+    assert metrics['wins'] == sum(bet['won'] for bet in bets)
+
+def test_season_simulation_rejects_spots_outside_the_league(app, seeded):
+    client = app.test_client()
+    base = '/api/advanced/season-simulation/1?simulations=1000'
+
+    for spots in ('top_spots=-1', 'relegation_spots=-2', 'top_spots=21', 'relegation_spots=1000'):
+        response = client.get(f'{base}&{spots}')
+        assert response.status_code == 400, spots
+        assert 'error' in response.get_json()
+
+    response = client.get(f'{base}&top_spots=0&relegation_spots=20')
+    assert response.status_code == 200
+
+def test_market_prices_rejects_non_numeric_lines(app, seeded):
+    client = app.test_client()
+    fixtures = [{'home_team_id': 1, 'away_team_id': 2}]
+
+    for lines in (['abc'], [2.5, None], 'nan', ['inf'], 3):
+        response = client.post('/api/odds/market-prices', json={'fixtures': fixtures, 'lines': lines})
+        assert response.status_code == 400, lines
+        assert 'lines' in response.get_json()['error']
+
+    response = client.post('/api/odds/market-prices', json={'fixtures': [{'home_team_id': 'x', 'away_team_id': 2}]})
+    assert response.status_code == 400
+
+    response = client.post('/api/odds/market-prices', json={'fixtures': fixtures, 'lines': ['1.5', 2.5]})
+    assert response.status_code == 200
@@ -0,0 +1,24 @@
+import numpy as np
+
+from src.services.match_store import match_store
+from src.services.season_simulator import SeasonSimulator, _simulate_chunk
+
+def test_tiebreak_orders_by_goals_for_above_99():
+    # Sem partidas por jogar: a classificação é a atual, empatada em pontos e saldo
+    no_fixtures = np.zeros(0)
+    no_incidence = np.zeros((0, 2))
+    result = _simulate_chunk(
+        np.random.SeedSequence(1), 50, no_fixtures, no_fixtures, no_incidence, no_incidence,
+        np.array([60.0, 60.0]), np.array([20.0, 20.0]), np.array([100.0, 120.0])
+    )
+
+    assert result['position_counts'].tolist() == [[0, 50], [50, 0]]
+
+def test_simulation_is_reproducible_across_workers_and_chunks(app_context, seeded):
+    championship_id = int(match_store.columns().championship_id[-1])
+    sequential = SeasonSimulator(match_store, chunk_size=700).simulate(championship_id, 3000, seed=7)
+    parallel = SeasonSimulator(match_store, chunk_size=700).simulate(championship_id, 3000, seed=7, workers=2)
+
+    assert sequential['matches_remaining'] > 0
+    assert np.array_equal(sequential['position_probabilities'], parallel['position_probabilities'])
+    assert np.allclose(sequential['position_probabilities'].sum(axis=1), 1.0)